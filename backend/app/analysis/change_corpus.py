@@ -0,0 +1,158 @@
+import os
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, Optional, Sequence
+
+from app.analysis.extract_changes_csv import DocxSource, iter_parser_rows, resolve_method
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # só a exportação colunar precisa dela (está em requirements.txt)
+    pa = None
+    pq = None
+
+# Corpus colunar (Parquet) das linhas hierárquicas (M3/M4/M5). O ground truth do reverse prompting
+# sai do M5 (hierarquico_comentarios); em CSV ele perde os tipos e precisa ser lido inteiro.
+# Aqui cada coluna tem tipo próprio, as strings repetidas (arquivo, seção, tipo, autor) são
+# dicionarizadas e as linhas de vários arquivos de origem se juntam em row groups de até
+# ROW_GROUP_ROWS linhas (um corpus de milhares de contratos pequenos não vira milhares de row
+# groups minúsculos): o loader lê só as colunas pedidas e usa as estatísticas dos row groups
+# para pular o que os filtros descartam.
+
+DEFAULT_CORPUS_METHOD = 'hierarquico_comentarios'
+# Métodos com as colunas hierárquicas (M3/M4/M5)
+CORPUS_METHODS = ('hierarquico', 'hierarquico_filtrado', 'hierarquico_comentarios')
+ROW_GROUP_ROWS = 50_000
+
+COLUMNS = [
+    'arquivo', 'index_p', 'tipo_secao', 'tipo', 'texto',
+    'posicao_inicio', 'posicao_fim', 'comentario', 'autor', 'data_hora',
+]
+
+
+def is_corpus_method(method: str) -> bool:
+    """Método que o parser de fato roteia para M3/M4/M5 (nomes desconhecidos caem no padrão)."""
+    return resolve_method(method) in CORPUS_METHODS
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise RuntimeError("Exportação colunar requer o pacote 'pyarrow' (pip install -r requirements.txt)")
+
+
+def corpus_schema():
+    _require_pyarrow()
+    category = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema([
+        ('arquivo', category),
+        ('index_p', pa.int32()),
+        ('tipo_secao', category),
+        ('tipo', category),
+        ('texto', pa.string()),
+        ('posicao_inicio', pa.int32()),
+        ('posicao_fim', pa.int32()),
+        ('comentario', pa.string()),
+        ('autor', category),
+        ('data_hora', pa.timestamp('ms', tz='UTC')),
+    ])
+
+
+def _parse_posicao(posicao: str) -> tuple[Optional[int], Optional[int]]:
+    start, sep, end = (posicao or '').partition('-')
+    if not sep:
+        return None, None
+    try:
+        return int(start), int(end)
+    except ValueError:
+        return None, None
+
+
+def _parse_data_hora(value: str) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def rows_to_columns(rows: Iterable[dict]) -> dict[str, list]:
+    """Converte linhas hierárquicas (get_parser_rows M3/M4/M5) em listas por coluna já tipadas."""
+    columns = {name: [] for name in COLUMNS}
+    for row in rows:
+        inicio, fim = _parse_posicao(row.get('posicao', ''))
+        columns['arquivo'].append(row.get('Nome_arquivo') or '')
+        columns['index_p'].append(row.get('Index_p'))
+        columns['tipo_secao'].append(row.get('tipo_secao') or '')
+        columns['tipo'].append(row.get('tipo') or '')
+        columns['texto'].append(row.get('texto') or '')
+        columns['posicao_inicio'].append(inicio)
+        columns['posicao_fim'].append(fim)
+        columns['comentario'].append(row.get('comentario') or '')
+        columns['autor'].append(row.get('nome_usuario') or '')
+        columns['data_hora'].append(_parse_data_hora(row.get('data_hora', '')))
+    return columns
+
+
+def rows_to_table(rows: Iterable[dict]):
+    return pa.Table.from_pydict(rows_to_columns(rows), schema=corpus_schema())
+
+
+def _iter_row_batches(rows: Iterator[dict], batch_rows: int) -> Iterator[list[dict]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_rows:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def write_change_corpus(
+    files: Iterable[tuple[DocxSource, str]],
+    output_path: str,
+    method: str = DEFAULT_CORPUS_METHOD,
+    row_group_rows: int = ROW_GROUP_ROWS,
+    compression: str = 'zstd',
+) -> int:
+    """Extrai cada (docx, nome_arquivo) e grava as linhas em um Parquet, arquivo a arquivo.
+
+    As linhas seguem de um arquivo para o outro no mesmo buffer, que vira um row group a cada
+    `row_group_rows` linhas (o último pode ser menor). Retorna o total de linhas.
+    """
+    _require_pyarrow()
+    if not is_corpus_method(method):
+        raise ValueError(f"O corpus colunar usa as colunas hierárquicas; método '{method}' não suportado. "
+                         f"Use: {', '.join(CORPUS_METHODS)}")
+    total = 0
+    with pq.ParquetWriter(output_path, corpus_schema(), compression=compression) as writer:
+        rows = (
+            row
+            for source, nome_arquivo in files
+            for row in iter_parser_rows(source, nome_arquivo, method=method)
+        )
+        for batch in _iter_row_batches(rows, row_group_rows):
+            writer.write_table(rows_to_table(batch), row_group_size=row_group_rows)
+            total += len(batch)
+    return total
+
+
+def load_change_corpus(
+    path: str,
+    columns: Optional[Sequence[str]] = None,
+    filters=None,
+):
+    """Lê um corpus Parquet (arquivo ou pasta de arquivos) como pyarrow.Table.
+
+    `columns` limita as colunas lidas; `filters` segue o formato do pyarrow, por exemplo
+    [('tipo', '=', 'Comentário'), ('autor', 'in', ['Ana', 'Bruno'])]. Row groups cujas
+    estatísticas não atendem aos filtros nem são descomprimidos.
+    """
+    _require_pyarrow()
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+    return pq.read_table(path, columns=list(columns) if columns else None, filters=filters)
@@ -0,0 +1,169 @@
+import datetime as dt
+from typing import Dict, List, Optional, Set, Union
+
+from docx.comments import Comment
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
+from docx.shared import RGBColor
+from docx.text.paragraph import Paragraph
+from docx.text.run import Run
+
+# Escrita em lote dos comentarios do revisor. O doc.add_comment do python-docx procura o
+# proximo id com um xpath sobre todos os comentarios ja criados (custo quadratico no numero
+# de achados) e formata os runs um a um. Aqui as ancoras sao apenas registradas durante a
+# busca dos trechos; no flush os ids sao atribuidos sequencialmente, os w:comment sao
+# anexados ao comments.xml de uma vez e os marcadores de intervalo sao inseridos na mesma
+# ordem em que o add_comment os inseriria, produzindo o mesmo XML.
+#
+# Como os marcadores so entram no flush, a fragmentacao posterior de runs (_slice_run)
+# precisa ser informada via `track_split`: o fim do intervalo acompanha o ultimo fragmento
+# e a formatacao (sublinhado vermelho) se propaga aos fragmentos, como acontecia quando o
+# rPr ja formatado era copiado no momento do corte.
+
+COMMENT_TEMPLATE = (
+    '<w:comment {nsdecls} w:id="{comment_id}" w:author="">'
+    '<w:p><w:pPr><w:pStyle w:val="CommentText"/></w:pPr>'
+    '<w:r><w:rPr><w:rStyle w:val="CommentReference"/></w:rPr><w:annotationRef/></w:r>'
+    '</w:p>'
+    '</w:comment>'
+)
+
+# Ancora: elemento w:r do documento ou indice (int) de um comentario pendente, cujo run de
+# referencia ainda sera criado no flush.
+AnchorKey = Union[object, int]
+
+
+class ReferenceRunAnchor:
+    """Run de referencia de um comentario ainda nao gravado (texto sempre vazio)."""
+    __slots__ = ('pending_index',)
+
+    def __init__(self, pending_index: int):
+        self.pending_index = pending_index
+
+    @property
+    def text(self) -> str:
+        return ''
+
+
+class BulkCommentWriter:
+    def __init__(self, doc, author: str = '', initials: Optional[str] = ''):
+        self._doc = doc
+        self.author = author
+        self.initials = initials
+        # [ancora inicial, ancora final, texto] de cada comentario, na ordem de registro.
+        self._pending: List[List] = []
+        # Ancora final -> comentarios pendentes que terminam nela (na ordem de registro).
+        self._ending_at: Dict[AnchorKey, List[int]] = {}
+        self._formatted: Set[AnchorKey] = set()
+        # Mantem vivos os proxies lxml usados como chave.
+        self._keep_alive: List[object] = []
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    @staticmethod
+    def _key(run: Union[Run, ReferenceRunAnchor]) -> AnchorKey:
+        if isinstance(run, ReferenceRunAnchor):
+            return run.pending_index
+        return run._r
+
+    def add(self, runs: List[Union[Run, ReferenceRunAnchor]], text: str) -> int:
+        """Registra um comentario ancorado do primeiro ao ultimo run; retorna o indice pendente."""
+        first_key = self._key(runs[0])
+        last_key = self._key(runs[-1])
+        pending_index = len(self._pending)
+        self._pending.append([first_key, last_key, text])
+        self._ending_at.setdefault(last_key, []).append(pending_index)
+        for run in runs:
+            key = self._key(run)
+            self._formatted.add(key)
+            if not isinstance(key, int):
+                self._keep_alive.append(key)
+        return pending_index
+
+    def track_split(self, original: Run, pieces: List[Run]) -> None:
+        """Informa que `original` foi fragmentado em `pieces` (na ordem do documento).
+
+        Comentarios ja registrados que terminavam em `original` passam a terminar no ultimo
+        fragmento, pois os novos runs sao inseridos antes do commentRangeEnd.
+        """
+        original_key = original._r
+        tail_key = pieces[-1]._r
+        self._keep_alive.extend(piece._r for piece in pieces)
+        if tail_key is not original_key and original_key in self._ending_at:
+            moved = self._ending_at.pop(original_key)
+            for pending_index in moved:
+                self._pending[pending_index][1] = tail_key
+            self._ending_at[tail_key] = moved
+        if original_key in self._formatted:
+            self._formatted.update(piece._r for piece in pieces)
+
+    def last_run(self, paragraph: Paragraph) -> Optional[Union[Run, ReferenceRunAnchor]]:
+        """Ultimo run do paragrafo como ficaria com os comentarios pendentes ja gravados.
+
+        Quando um comentario pendente termina no ultimo run, o ultimo w:r do paragrafo passa
+        a ser o run de referencia do primeiro desses comentarios (e assim sucessivamente).
+        """
+        runs = paragraph.runs
+        if not runs:
+            return None
+        anchor: Union[Run, ReferenceRunAnchor] = runs[-1]
+        key = self._key(anchor)
+        while key in self._ending_at:
+            key = self._ending_at[key][0]
+            anchor = ReferenceRunAnchor(key)
+        return anchor
+
+    def _new_comment(self, comment_id: int, text: str, date: dt.datetime, comments_part):
+        comment_elm = parse_xml(COMMENT_TEMPLATE.format(nsdecls=nsdecls('w'), comment_id=comment_id))
+        comment_elm.author = self.author
+        comment_elm.initials = self.initials
+        comment_elm.date = date
+        if text:
+            comment = Comment(comment_elm, comments_part)
+            para_texts = iter(text.split('\n'))
+            comment.paragraphs[0].add_run(next(para_texts))
+            for para_text in para_texts:
+                comment.add_paragraph(text=para_text)
+        return comment_elm
+
+    def flush(self) -> int:
+        """Grava comments.xml, marcadores de intervalo e formatacao; retorna o total gravado."""
+        if not self._pending:
+            return 0
+
+        comments = self._doc.comments
+        comments_elm = comments._comments_elm
+        comments_part = comments._comments_part
+        first_id = comments_elm._next_available_comment_id()
+        date = dt.datetime.now(dt.timezone.utc)
+
+        comment_elms = [
+            self._new_comment(first_id + i, text, date, comments_part)
+            for i, (_, _, text) in enumerate(self._pending)
+        ]
+        comments_elm.extend(comment_elms)
+
+        reference_runs: List[object] = []
+        for i, (first_key, last_key, _) in enumerate(self._pending):
+            comment_id = first_id + i
+            first_elm = reference_runs[first_key] if isinstance(first_key, int) else first_key
+            last_elm = reference_runs[last_key] if isinstance(last_key, int) else last_key
+            first_elm.insert_comment_range_start_above(comment_id)
+            last_elm.insert_comment_range_end_and_reference_below(comment_id)
+            # commentRangeEnd fica logo apos o ultimo run, seguido do run de referencia.
+            reference_runs.append(last_elm.getnext().getnext())
+
+        red = RGBColor(255, 0, 0)
+        for key in self._formatted:
+            r = reference_runs[key] if isinstance(key, int) else key
+            font = Run(r, None).font
+            font.underline = True
+            font.color.rgb = red
+
+        written = len(self._pending)
+        self._pending.clear()
+        self._ending_at.clear()
+        self._formatted.clear()
+        self._keep_alive.clear()
+        return written
@@ -4,7 +4,10 @@ from docx.oxml.table import CT_Tbl
 from docx.oxml.text.paragraph import CT_P
 from docx.table import Table
 import re
-from typing import Iterable, Optional
+from array import array
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional, Sequence, Union
 
 ZERO_WIDTH_CHARACTERS = {
     '\u200b',  # zero width space
@@ -34,6 +37,11 @@ MANUAL_NUMBERING_PATTERN = re.compile(r'^\s*\d+(\.\d+)+\s+')
 CLAUSE_TITLE_PATTERN = re.compile(r'^(CLÁUSULA \w+)|(CAPÍTULO \w+)|(Art\.)', re.IGNORECASE)
 SUBCLAUSE_PATTERN = re.compile(r'^\s*\d+(\.\d+)+\s+')
 
+W_NAMESPACE = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+
+# Tabela de estilos: style_id -> (is_heading, is_title). A chave None guarda o estilo padrão.
+StyleFlags = dict[Optional[str], tuple[bool, bool]]
+
 
 def _local_name(tag: str) -> str:
     if isinstance(tag, str) and '}' in tag:
@@ -59,6 +67,70 @@ def normalize_visible_text(text: str) -> str:
     return text.replace(',,', ',')
 
 
+def _w(attr: str) -> str:
+    return f"{{{W_NAMESPACE}}}{attr}"
+
+
+def _style_name_flags(style_name: str) -> tuple[bool, bool]:
+    name = (style_name or '').lower()
+    is_heading = name.startswith('heading') or name.startswith('título')
+    is_title = 'title' in name or 'título' in name
+    return is_heading, is_title
+
+
+def build_style_flags(doc: Document) -> StyleFlags:
+    """Pré-calcula, uma vez por documento, a classificação de cada estilo de parágrafo seguindo `basedOn`."""
+    try:
+        styles_element = doc.styles.element
+    except Exception:
+        return {}
+
+    own_flags: dict[str, tuple[bool, bool]] = {}
+    based_on: dict[str, str] = {}
+    default_style_id: Optional[str] = None
+
+    for style in styles_element.iterchildren(_w('style')):
+        if style.get(_w('type')) != 'paragraph':
+            continue
+        style_id = style.get(_w('styleId'))
+        if not style_id:
+            continue
+        name_el = style.find(_w('name'))
+        name = name_el.get(_w('val')) if name_el is not None else ''
+        own_flags[style_id] = _style_name_flags(name or '')
+        based_el = style.find(_w('basedOn'))
+        if based_el is not None and based_el.get(_w('val')):
+            based_on[style_id] = based_el.get(_w('val'))
+        if style.get(_w('default')) in ('1', 'true', 'on') and default_style_id is None:
+            default_style_id = style_id
+
+    flags: StyleFlags = {}
+    for style_id in own_flags:
+        is_heading, is_title = False, False
+        visited: set[str] = set()
+        current: Optional[str] = style_id
+        # Herança: um estilo derivado de um heading/título também é heading/título.
+        while current is not None and current in own_flags and current not in visited:
+            visited.add(current)
+            heading, title = own_flags[current]
+            is_heading = is_heading or heading
+            is_title = is_title or title
+            current = based_on.get(current)
+        flags[style_id] = (is_heading, is_title)
+
+    flags[None] = flags.get(default_style_id, (False, False)) if default_style_id else (False, False)
+    return flags
+
+
+def _paragraph_style_flags(p: Paragraph, style_flags: StyleFlags) -> tuple[bool, bool]:
+    try:
+        style_id = p._p.style
+    except Exception:
+        style_id = None
+    # Estilo inexistente cai no padrão, como o python-docx faz em `p.style`.
+    return style_flags.get(style_id) or style_flags.get(None) or (False, False)
+
+
 def _create_sub_title(title: str, paragraphs: list[Paragraph], part_index: Optional[int] = None, start_idx: int = 0, max_len: int = 80) -> str:
     if len(paragraphs) == 1:
         return f"{title} - {paragraphs[start_idx].text.strip()[:max_len]}..."
@@ -90,17 +162,19 @@ def get_paragraph_raw_text(p: Paragraph) -> str:
         combined = normalize_visible_text(p.text or "")
     return combined
 
-def is_new_clause(p: Paragraph) -> bool:
-    # Verifica se parágrafo é início de nova cláusula (estilo, maiúsculas, regex, negrito).
-    text = p.text.strip()
-    
-    # Se o parágrafo estiver totalmente vazio, não é uma nova cláusula.
-    if not text:
-        return False
-    
+# Cada regra de detecção de título retorna True (é título), False (não é, encerra a avaliação)
+# ou None (indecisa, passa para a próxima regra da estratégia).
+ClauseRule = Callable[[Paragraph, str, Optional[StyleFlags]], Optional[bool]]
+
+
+def _rule_heading_style(p: Paragraph, text: str, style_flags: Optional[StyleFlags]) -> Optional[bool]:
     # ---
     # REGRA 1: Pelo estilo do Word (APENAS HEADINGS PRINCIPAIS)
     # ---
+    if style_flags is not None:
+        if _paragraph_style_flags(p, style_flags)[0]:
+            return True
+        return None
     try:
         if p.style and hasattr(p.style, 'name') and p.style.name:
             style_name = p.style.name.lower()
@@ -109,7 +183,10 @@ def is_new_clause(p: Paragraph) -> bool:
                 return True
     except:
         pass
-    
+    return None
+
+
+def _rule_all_caps(p: Paragraph, text: str, style_flags: Optional[StyleFlags]) -> Optional[bool]:
     # ---
     # REGRA 2: Pelo formato (TODO EM MAIÚSCULAS) - PRIORIDADE PARA TÍTULOS
     # ---
@@ -124,15 +201,20 @@ def is_new_clause(p: Paragraph) -> bool:
         if len(normalized_token) >= 3 and len(set(normalized_token)) == 1:
             return False
         return True
-        
+    return None
+
+
+def _rule_numbered_title(p: Paragraph, text: str, style_flags: Optional[StyleFlags]) -> Optional[bool]:
     # ---
     # REGRA 3: Padrão de Regex para cláusulas numeradas
     # ---
     # "CLÁUSULA X", "CAPÍTULO Y", "Art.", ou numeração manual como 1.1, 15.11, etc.
-    
     if CLAUSE_TITLE_PATTERN.match(text) or MANUAL_NUMBERING_PATTERN.match(text):
         return True
-    
+    return None
+
+
+def _rule_bold_title(p: Paragraph, text: str, style_flags: Optional[StyleFlags]) -> Optional[bool]:
     # ---
     # REGRA 4: Pelo formato (negrito) - apenas títulos curtos em negrito
     # ---
@@ -140,8 +222,84 @@ def is_new_clause(p: Paragraph) -> bool:
         len(text) < 50 and 
         len(text.split()) <= 5):
         return True
-            
-    return False
+    return None
+
+
+CLAUSE_RULES: dict[str, ClauseRule] = {
+    'estilo': _rule_heading_style,
+    'maiusculas': _rule_all_caps,
+    'regex': _rule_numbered_title,
+    'negrito': _rule_bold_title,
+}
+
+
+@dataclass(frozen=True)
+class SegmentationStrategy:
+    """Combinação de regras de título (avaliadas em ordem) e da política de subdivisão."""
+    name: str
+    rules: tuple[str, ...]
+    subdivide: bool = True
+    description: str = ''
+
+    def is_new_clause(self, p: Paragraph, style_flags: Optional[StyleFlags] = None) -> bool:
+        text = p.text.strip()
+        # Se o parágrafo estiver totalmente vazio, não é uma nova cláusula.
+        if not text:
+            return False
+        for rule_name in self.rules:
+            verdict = CLAUSE_RULES[rule_name](p, text, style_flags)
+            if verdict is not None:
+                return verdict
+        return False
+
+
+DEFAULT_SEGMENTATION_STRATEGY = 'padrao'
+
+SEGMENTATION_STRATEGIES: dict[str, SegmentationStrategy] = {}
+
+
+def register_segmentation_strategy(strategy: SegmentationStrategy) -> SegmentationStrategy:
+    unknown = [r for r in strategy.rules if r not in CLAUSE_RULES]
+    if unknown:
+        raise ValueError(f"Regras de segmentação desconhecidas: {', '.join(unknown)}")
+    SEGMENTATION_STRATEGIES[strategy.name] = strategy
+    return strategy
+
+
+def get_segmentation_strategy(strategy: Union[str, SegmentationStrategy, None] = None) -> SegmentationStrategy:
+    if isinstance(strategy, SegmentationStrategy):
+        return strategy
+    name = strategy or DEFAULT_SEGMENTATION_STRATEGY
+    if name not in SEGMENTATION_STRATEGIES:
+        raise ValueError(f"Estratégia de segmentação '{name}' não registrada")
+    return SEGMENTATION_STRATEGIES[name]
+
+
+register_segmentation_strategy(SegmentationStrategy(
+    'padrao', ('estilo', 'maiusculas', 'regex', 'negrito'),
+    description='Heurísticas completas (estilo, maiúsculas, regex, negrito) com subdivisão.',
+))
+register_segmentation_strategy(SegmentationStrategy(
+    'padrao_sem_subdivisao', ('estilo', 'maiusculas', 'regex', 'negrito'), subdivide=False,
+    description='Mesmas regras do padrão, mantendo cada cláusula inteira (menos chamadas ao LLM).',
+))
+register_segmentation_strategy(SegmentationStrategy(
+    'estrutural', ('estilo', 'regex'),
+    description='Apenas estilos de título e numeração/"CLÁUSULA X".',
+))
+register_segmentation_strategy(SegmentationStrategy(
+    'sem_negrito', ('estilo', 'maiusculas', 'regex'),
+    description='Padrão sem a regra de negrito (modelos com destaques em negrito no corpo).',
+))
+register_segmentation_strategy(SegmentationStrategy(
+    'estilos', ('estilo',),
+    description='Somente estilos de título do Word.',
+))
+
+
+def is_new_clause(p: Paragraph, style_flags: Optional[StyleFlags] = None) -> bool:
+    # Verifica se parágrafo é início de nova cláusula (estilo, maiúsculas, regex, negrito).
+    return SEGMENTATION_STRATEGIES[DEFAULT_SEGMENTATION_STRATEGY].is_new_clause(p, style_flags)
 
 def subdivide_large_clause(title: str, paragraphs: list[Paragraph], max_paragraphs: int = 10, max_chars: int = 4000) -> list[tuple[str, list[Paragraph]]]:
     # Subdivide cláusula grande em sub-cláusulas menores para análise eficiente.
@@ -198,7 +356,7 @@ def subdivide_large_clause(title: str, paragraphs: list[Paragraph], max_paragrap
         subclauses.append((sub_title, current_subparagraphs))
     return subclauses
 
-def is_document_title(p: Paragraph) -> bool:
+def is_document_title(p: Paragraph, style_flags: Optional[StyleFlags] = None) -> bool:
     # Verifica se parágrafo é título principal do documento (não cláusula).
     text = p.text.strip()
     
@@ -210,6 +368,8 @@ def is_document_title(p: Paragraph) -> bool:
         return True
     
     # Estilo específico de título (se existir)
+    if style_flags is not None:
+        return _paragraph_style_flags(p, style_flags)[1]
     try:
         if p.style and hasattr(p.style, 'name') and p.style.name:
             style_name = p.style.name.lower()
@@ -243,21 +403,23 @@ def iter_document_paragraphs(doc: Document) -> Iterable[Paragraph]:
                     for paragraph in cell.paragraphs:
                         yield paragraph
 
-def segment_document(doc: Document) -> list[tuple[str, list[Paragraph]]]:
+def segment_document(doc: Document, strategy: Union[str, SegmentationStrategy, None] = None) -> list[tuple[str, list[Paragraph]]]:
+    strategy = get_segmentation_strategy(strategy)
     logical_clauses = []
     current_paragraphs = []
     current_title = "Preâmbulo" # Cláusulas antes do primeiro título
     found_first_clause = False
+    style_flags = build_style_flags(doc)
 
     for p in iter_document_paragraphs(doc):
-        if is_document_title(p):
+        if is_document_title(p, style_flags):
             # Pula títulos principais do documento - não os trata como cláusulas
             continue
         elif is_subclause(p):
             # Subcláusula: adiciona ao conteúdo da cláusula atual (não cria nova cláusula)
             if get_paragraph_raw_text(p):
                 current_paragraphs.append(p)
-        elif is_new_clause(p):
+        elif strategy.is_new_clause(p, style_flags):
             # Salva a cláusula anterior se ela tiver conteúdo (incluindo o preâmbulo)
             if current_paragraphs:
                 logical_clauses.append((current_title, current_paragraphs))
@@ -279,10 +441,87 @@ def segment_document(doc: Document) -> list[tuple[str, list[Paragraph]]]:
     final_clauses = []
     for title, paragraphs in logical_clauses:
         # Não subdivide o preâmbulo - mantém como uma única cláusula
-        if "Preâmbulo" in title:
+        if "Preâmbulo" in title or not strategy.subdivide:
             final_clauses.append((title, paragraphs))
         else:
             subdivided = subdivide_large_clause(title, paragraphs)
             final_clauses.extend(subdivided)
         
-    return final_clauses
\ No newline at end of file
+    return final_clauses
+
+
+class Segment:
+    """Representação compacta de uma cláusula segmentada.
+
+    title: título da cláusula; paragraph_indices: índices dos parágrafos na ordem de
+    iter_document_paragraphs (resolve() devolve os Paragraph); texts: texto original de cada
+    parágrafo; text: textos unidos por "\n", calculado uma única vez; offsets: início de cada
+    parágrafo em text (paragraph_at faz o caminho inverso); token_estimate: estimativa de tokens.
+    """
+    __slots__ = ('title', 'paragraph_indices', 'texts', 'text', 'offsets', 'token_estimate')
+
+    def __init__(self, title: str, paragraph_indices: Sequence[int], texts: Sequence[str]):
+        self.title = title
+        self.paragraph_indices = array('i', paragraph_indices)
+        self.texts = tuple(texts)
+        self.text = "\n".join(self.texts)
+        self.offsets = array('I')
+        cursor = 0
+        for text in self.texts:
+            self.offsets.append(cursor)
+            cursor += len(text) + 1
+        self.token_estimate = estimate_tokens(self.text)
+
+    def __len__(self) -> int:
+        return len(self.paragraph_indices)
+
+    def __repr__(self) -> str:
+        return f"Segment(title={self.title!r}, paragraphs={len(self)}, tokens~{self.token_estimate})"
+
+    def paragraph_at(self, char_offset: int) -> int:
+        """Posição (dentro do segmento) do parágrafo que contém o offset no texto unido."""
+        return max(0, bisect_right(self.offsets, char_offset) - 1)
+
+    def find_paragraph_index(self, text: str) -> Optional[int]:
+        """Índice (em iter_document_paragraphs) do parágrafo com a 1ª ocorrência exata de `text`
+        no texto unido, ou None. Um trecho sem quebra de linha nunca atravessa parágrafos."""
+        offset = self.text.find(text) if text and '\n' not in text else -1
+        if offset == -1:
+            return None
+        return self.paragraph_indices[self.paragraph_at(offset)]
+
+    def resolve(self, ordered_paragraphs: Sequence[Paragraph]) -> list[Paragraph]:
+        """Recupera os proxies Paragraph a partir da lista retornada por iter_document_paragraphs."""
+        total = len(ordered_paragraphs)
+        return [ordered_paragraphs[idx] for idx in self.paragraph_indices if 0 <= idx < total]
+
+
+def estimate_tokens(text: str) -> int:
+    # Heurística usual (~4 caracteres por token) - suficiente para dimensionar chamadas ao LLM.
+    if not text:
+        return 0
+    return max(1, (len(text) + 3) // 4)
+
+
+def to_segments(clauses: Iterable[tuple[str, list[Paragraph]]], ordered_paragraphs: Sequence[Paragraph]) -> list[Segment]:
+    """Converte a saída de segment_document em Segments, sem manter referências aos parágrafos."""
+    positions = {p._p: idx for idx, p in enumerate(ordered_paragraphs)}
+    segments = []
+    for title, paragraphs in clauses:
+        segments.append(Segment(
+            title,
+            [positions.get(p._p, -1) for p in paragraphs],
+            [get_paragraph_raw_text(p) for p in paragraphs],
+        ))
+    return segments
+
+
+def build_segments(doc: Document, strategy: Union[str, SegmentationStrategy, None] = None) -> list[Segment]:
+    # A lista mantém os proxies lxml vivos, garantindo a identidade dos elementos usados como chave.
+    ordered = list(iter_document_paragraphs(doc))
+    return to_segments(segment_document(doc, strategy), ordered)
+
+
+def whole_document_segment(doc: Document, title: str = "Documento inteiro") -> Segment:
+    ordered = list(iter_document_paragraphs(doc))
+    return to_segments([(title, list(doc.paragraphs))], ordered)[0]
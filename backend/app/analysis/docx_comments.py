@@ -1,22 +1,31 @@
 import io
+import math
+import re
+from array import array
+from bisect import bisect_right
 from collections import defaultdict
 from copy import deepcopy
 from dataclasses import dataclass
-from difflib import SequenceMatcher
-from typing import Dict, List, Optional, Tuple
+from itertools import repeat
+from typing import Callable, Dict, List, Optional, Tuple
 
 from docx import Document
 from docx.oxml import OxmlElement
-from docx.shared import RGBColor
 from docx.text.paragraph import Paragraph
 from docx.text.run import Run
 
+from app.analysis.comment_writer import BulkCommentWriter
 from app.analysis.doc_parser import (
     NON_BREAKING_SPACES,
     ZERO_WIDTH_CHARACTERS,
+    Segment,
+    iter_document_paragraphs,
     normalize_visible_text,
-    segment_document,
 )
+from app.analysis.docx_package_writer import save_docx_reusing_source
+from app.analysis.fuzzy_match import QGramIndex, find_longest_block
+from app.analysis.segment_cache import get_cached_segments
+from app.core.config import settings
 
 # Modulo responsavel por localizar trechos normalizados e inserir comentarios nativos em arquivos DOCX.
 # Extrai o nome local de uma tag XML considerando namespaces.
@@ -51,10 +60,11 @@ class RunSpan:
 class ParagraphIndex:
     text: str
     spans: List[RunSpan]
-    norm_to_raw: List[int]
+    norm_to_raw: array
     raw_to_run: List[Tuple[int, int]]
     runs: List[Run]
     run_raw_texts: List[str]
+    qgrams: Optional[QGramIndex] = None
 
 
 @dataclass
@@ -79,127 +89,86 @@ def _run_original_text(run) -> str:
     return ''.join(parts)
 
 
-# Normaliza sequencias de pontos duplos mantendo o mapeamento de offsets.
-def _collapse_double_dots(chars: List[str], mapping: List[int]) -> Tuple[List[str], List[int]]:
-    result_chars: List[str] = []
-    result_map: List[int] = []
-    i = 0
-    while i < len(chars):
-        if (
-            chars[i] == '.'
-            and i + 1 < len(chars)
-            and chars[i + 1] == '.'
-            and (i == 0 or chars[i - 1] != '.')
-            and (i + 2 >= len(chars) or chars[i + 2] != '.')
-        ):
-            result_chars.append('.')
-            result_map.append(mapping[i])
-            i += 2
-            continue
-        result_chars.append(chars[i])
-        result_map.append(mapping[i])
-        i += 1
-    return result_chars, result_map
-
-
-# Normaliza padroes ", ," preservando os offsets originais.
-def _collapse_comma_space_comma(chars: List[str], mapping: List[int]) -> Tuple[List[str], List[int]]:
-    result_chars: List[str] = []
-    result_map: List[int] = []
-    i = 0
-    while i < len(chars):
-        if (
-            chars[i] == ','
-            and i + 2 < len(chars)
-            and chars[i + 1] == ' '
-            and chars[i + 2] == ','
-        ):
-            result_chars.append(',')
-            result_map.append(mapping[i])
-            result_chars.append(' ')
-            result_map.append(mapping[i + 1])
-            i += 3
-            continue
-        result_chars.append(chars[i])
-        result_map.append(mapping[i])
-        i += 1
-    return result_chars, result_map
-
-
-# Evita a duplicacao de virgulas consecutivas sem perder o mapeamento.
-def _collapse_double_commas(chars: List[str], mapping: List[int]) -> Tuple[List[str], List[int]]:
-    result_chars: List[str] = []
-    result_map: List[int] = []
-    i = 0
-    while i < len(chars):
-        if chars[i] == ',' and i + 1 < len(chars) and chars[i + 1] == ',':
-            result_chars.append(',')
-            result_map.append(mapping[i])
-            i += 2
-            continue
-        result_chars.append(chars[i])
-        result_map.append(mapping[i])
-        i += 1
-    return result_chars, result_map
+# Normalizacao com mapa de offsets feita por passagens de regex sobre spans: os trechos
+# entre ocorrencias sao copiados por fatia (texto e array de offsets), e apenas as
+# ocorrencias passam por Python. Reproduz exatamente normalize_visible_text:
+# 1) larguras zero removidas, espacos nao separaveis viram espaco, cada sequencia de
+#    espacos vira um unico espaco (mapeado ao primeiro espaco) e as pontas sao removidas;
+# 2) ".." isolado vira "." e ",\s*," vira ", " (a troca final de ",," por "," nunca
+#    encontra ocorrencias depois desta etapa).
+_ZERO_WIDTH_CLASS = ''.join(sorted(ZERO_WIDTH_CHARACTERS))
+_NBSP_TRANSLATION = str.maketrans({ch: ' ' for ch in NON_BREAKING_SPACES})
+# Um espaco simples entre palavras ja esta normalizado e nao e visitado: so casam sequencias
+# de 2+ espacos/larguras zero, espacos diferentes de ' ' e larguras zero isoladas.
+_ZERO_WIDTH_OR_SPACE_RE = re.compile(f'[\\s{_ZERO_WIDTH_CLASS}]{{2,}}|[^\\S ]|[{_ZERO_WIDTH_CLASS}]')
+_FIRST_SPACE_RE = re.compile(r'\s')
+_PUNCTUATION_RE = re.compile(r'(?<!\.)\.\.(?!\.)|, ?,')
+
+
+def _sub_with_map(
+    pattern: re.Pattern,
+    text: str,
+    mapping: array,
+    replace: Callable[[re.Match, array], Tuple[str, array]],
+) -> Tuple[str, array]:
+    pieces: List[str] = []
+    result_map = array('l')
+    last = 0
+    for match in pattern.finditer(text):
+        start, end = match.span()
+        pieces.append(text[last:start])
+        result_map.extend(mapping[last:start])
+        replacement, offsets = replace(match, mapping)
+        pieces.append(replacement)
+        result_map.extend(offsets)
+        last = end
+    if not pieces:
+        return text, mapping
+    pieces.append(text[last:])
+    result_map.extend(mapping[last:])
+    return ''.join(pieces), result_map
+
+
+def _replace_space_run(match: re.Match, mapping: array) -> Tuple[str, array]:
+    text = match.string
+    start, end = match.span()
+    if start == 0 or end == len(text):
+        return '', array('l')
+    space = _FIRST_SPACE_RE.search(text, start, end)
+    if space is None:
+        # Apenas caracteres de largura zero: removidos.
+        return '', array('l')
+    return ' ', mapping[space.start():space.start() + 1]
+
+
+def _replace_punctuation(match: re.Match, mapping: array) -> Tuple[str, array]:
+    start = match.start()
+    if match.string[start] == '.':
+        return '.', mapping[start:start + 1]
+    return ', ', mapping[start:start + 2]
 
 
 # Aplica a mesma normalizacao textual usada pelo parser original guardando os offsets em cada etapa.
-def _normalize_with_map(text: str) -> Tuple[str, List[int]]:
+def _normalize_with_map(text: str) -> Tuple[str, array]:
     if not text:
-        return '', []
-
-    chars: List[str] = []
-    mapping: List[int] = []
-    i = 0
-    length = len(text)
-    seen_non_space = False
-
-    while i < length:
-        ch = text[i]
-        if ch in ZERO_WIDTH_CHARACTERS:
-            i += 1
-            continue
-        if ch in NON_BREAKING_SPACES:
-            ch = ' '
-        if ch.isspace():
-            ws_start = i
-            i += 1
-            while i < length:
-                nxt = text[i]
-                if nxt in ZERO_WIDTH_CHARACTERS:
-                    i += 1
-                    continue
-                if nxt in NON_BREAKING_SPACES:
-                    nxt = ' '
-                if not nxt.isspace():
-                    break
-                i += 1
-            if seen_non_space and i < length:
-                chars.append(' ')
-                mapping.append(ws_start)
-            continue
-        chars.append(ch)
-        mapping.append(i)
-        seen_non_space = True
-        i += 1
-
-    if chars and chars[-1] == ' ':
-        chars.pop()
-        mapping.pop()
-
-    chars, mapping = _collapse_double_dots(chars, mapping)
-    chars, mapping = _collapse_comma_space_comma(chars, mapping)
-    chars, mapping = _collapse_double_commas(chars, mapping)
-
-    return ''.join(chars), mapping
-
-
-# Construtor do indice de paragrafo com referencias cruzadas entre texto normalizado e runs originais.
-def _build_paragraph_index(paragraph: Paragraph) -> ParagraphIndex:
+        return '', array('l')
+    mapping = array('l', range(len(text)))
+    text, mapping = _sub_with_map(_ZERO_WIDTH_OR_SPACE_RE, text.translate(_NBSP_TRANSLATION), mapping, _replace_space_run)
+    # Espaco simples nas pontas (as sequencias nas pontas ja foram removidas acima).
+    if text.startswith(' '):
+        text, mapping = text[1:], mapping[1:]
+    if text.endswith(' '):
+        text, mapping = text[:-1], mapping[:-1]
+    if '..' in text or ',,' in text or ', ,' in text:
+        text, mapping = _sub_with_map(_PUNCTUATION_RE, text, mapping, _replace_punctuation)
+    return text, mapping
+
+
+# Coleta os runs com texto original do paragrafo e o mapa offset bruto -> (run, offset no run).
+def _collect_paragraph_runs(paragraph: Paragraph) -> Tuple[List[Run], List[str], List[Tuple[int, int]]]:
     runs: List[Run] = []
     run_raw_texts: List[str] = []
     raw_to_run: List[Tuple[int, int]] = []
-    raw_chars: List[str] = []
 
     for run in paragraph.runs:
         raw_text = _run_original_text(run)
@@ -208,13 +177,19 @@ def _build_paragraph_index(paragraph: Paragraph) -> ParagraphIndex:
         run_idx = len(runs)
         runs.append(run)
         run_raw_texts.append(raw_text)
-        for offset, ch in enumerate(raw_text):
-            raw_chars.append(ch)
-            raw_to_run.append((run_idx, offset))
+        raw_to_run.extend(zip(repeat(run_idx, len(raw_text)), range(len(raw_text))))
+
+    return runs, run_raw_texts, raw_to_run
 
-    full_raw_text = ''.join(raw_chars)
-    normalized_text, norm_to_raw = _normalize_with_map(full_raw_text)
 
+# Monta o indice a partir dos runs coletados e de uma normalizacao ja calculada.
+def _index_from_runs(
+    runs: List[Run],
+    run_raw_texts: List[str],
+    raw_to_run: List[Tuple[int, int]],
+    normalized_text: str,
+    norm_to_raw: array,
+) -> ParagraphIndex:
     if not runs:
         return ParagraphIndex('', [], [], raw_to_run, [], [])
 
@@ -246,6 +221,97 @@ def _build_paragraph_index(paragraph: Paragraph) -> ParagraphIndex:
     )
 
 
+# Construtor do indice de paragrafo com referencias cruzadas entre texto normalizado e runs originais.
+def _build_paragraph_index(paragraph: Paragraph) -> ParagraphIndex:
+    runs, run_raw_texts, raw_to_run = _collect_paragraph_runs(paragraph)
+    normalized_text, norm_to_raw = _normalize_with_map(''.join(run_raw_texts))
+    return _index_from_runs(runs, run_raw_texts, raw_to_run, normalized_text, norm_to_raw)
+
+
+# Cache de indices por paragrafo durante a insercao de comentarios (evita reconstruir a cada erro).
+class ParagraphIndexCache:
+    def __init__(self):
+        self._indexes: Dict[object, ParagraphIndex] = {}
+
+    def get(self, paragraph: Paragraph) -> ParagraphIndex:
+        key = paragraph._p
+        index = self._indexes.get(key)
+        if index is None:
+            index = _build_paragraph_index(paragraph)
+            self._indexes[key] = index
+        return index
+
+    # Atualiza o indice depois que _slice_run fragmentou runs do paragrafo. O texto bruto
+    # nao muda com a fragmentacao, entao a normalizacao (parte cara) e reaproveitada;
+    # apenas os runs e os spans sao recalculados.
+    def refresh(self, paragraph: Paragraph) -> ParagraphIndex:
+        key = paragraph._p
+        previous = self._indexes.get(key)
+        if previous is None:
+            return self.get(paragraph)
+
+        runs, run_raw_texts, raw_to_run = _collect_paragraph_runs(paragraph)
+        if ''.join(run_raw_texts) == ''.join(previous.run_raw_texts):
+            index = _index_from_runs(runs, run_raw_texts, raw_to_run, previous.text, previous.norm_to_raw)
+            index.qgrams = previous.qgrams
+        else:
+            normalized_text, norm_to_raw = _normalize_with_map(''.join(run_raw_texts))
+            index = _index_from_runs(runs, run_raw_texts, raw_to_run, normalized_text, norm_to_raw)
+        self._indexes[key] = index
+        return index
+
+
+# Indice de texto normalizado do documento inteiro (corpo e celulas de tabela).
+# Os paragrafos nao vazios sao concatenados com um espaco, de modo que um trecho que
+# atravessa paragrafos (como o LLM costuma devolver) e encontrado com uma unica busca.
+# O mapeamento offset -> run e delegado aos ParagraphIndex do cache, que continuam
+# validos apos a fragmentacao de runs (o texto normalizado nao muda).
+class DocumentTextIndex:
+    SEPARATOR = ' '
+
+    def __init__(self, paragraphs: List[Paragraph], index_cache: ParagraphIndexCache):
+        self.index_cache = index_cache
+        self.paragraphs: List[Paragraph] = []
+        self.starts = array('l')
+        parts: List[str] = []
+        cursor = 0
+        for paragraph in paragraphs:
+            text = index_cache.get(paragraph).text
+            if not text:
+                continue
+            self.paragraphs.append(paragraph)
+            self.starts.append(cursor)
+            parts.append(text)
+            cursor += len(text) + len(self.SEPARATOR)
+        self.text = self.SEPARATOR.join(parts)
+
+    # Localiza o paragrafo que contem o offset global.
+    def paragraph_at(self, offset: int) -> int:
+        return bisect_right(self.starts, offset) - 1
+
+    # Retorna uma MatchLocation por paragrafo coberto pelo trecho (vazia se nao encontrado).
+    def find(self, trecho: str) -> List[MatchLocation]:
+        if not trecho or not self.text:
+            return []
+        start = self.text.find(trecho)
+        if start == -1:
+            return []
+        end = start + len(trecho)
+
+        locations: List[MatchLocation] = []
+        for pos in range(max(0, self.paragraph_at(start)), len(self.paragraphs)):
+            para_start = self.starts[pos]
+            if para_start >= end:
+                break
+            paragraph = self.paragraphs[pos]
+            index = self.index_cache.get(paragraph)
+            local_start = max(start, para_start) - para_start
+            local_end = min(end, para_start + len(index.text)) - para_start
+            if local_end > local_start:
+                locations.append(MatchLocation(paragraph=paragraph, index=index, match_start=local_start, match_end=local_end))
+        return locations
+
+
 # Resume o texto normalizado do paragrafo e os limites de cada run.
 def _collect_run_spans(paragraph: Paragraph) -> Tuple[str, List[Tuple]]:
     index = _build_paragraph_index(paragraph)
@@ -266,7 +332,13 @@ def _create_run_after(reference_run: Run) -> Run:
 
 
 # Fragmenta o run original em prefixo, trecho alvo e sufixo retornando o trecho selecionado.
-def _slice_run(run: Run, start_offset: int, end_offset: int) -> Run:
+# `on_split(run, fragmentos)` e chamado quando novos runs sao criados.
+def _slice_run(
+    run: Run,
+    start_offset: int,
+    end_offset: int,
+    on_split: Optional[Callable[[Run, List[Run]], None]] = None,
+) -> Run:
     text = run.text or ''
     if not text:
         return run
@@ -282,10 +354,12 @@ def _slice_run(run: Run, start_offset: int, end_offset: int) -> Run:
     target = text[start:end]
     suffix = text[end:]
 
+    pieces = [run]
     if prefix:
         run.text = prefix
         match_run = _create_run_after(run)
         match_run.text = target
+        pieces.append(match_run)
     else:
         run.text = target
         match_run = run
@@ -293,12 +367,18 @@ def _slice_run(run: Run, start_offset: int, end_offset: int) -> Run:
     if suffix:
         tail_run = _create_run_after(match_run)
         tail_run.text = suffix
+        pieces.append(tail_run)
 
+    if on_split is not None and len(pieces) > 1:
+        on_split(run, pieces)
     return match_run
 
 
 # Transforma o intervalo normalizado encontrado em uma lista de runs prontos para receber o comentario.
-def _materialize_match_runs(match: MatchLocation) -> List[Run]:
+def _materialize_match_runs(
+    match: MatchLocation,
+    on_split: Optional[Callable[[Run, List[Run]], None]] = None,
+) -> List[Run]:
     runs: List[Run] = []
     index = match.index
     if match.match_start >= match.match_end:
@@ -335,41 +415,115 @@ def _materialize_match_runs(match: MatchLocation) -> List[Run]:
         if run_idx_end != span.run_idx:
             offset_end = span.raw_end - 1
 
-        match_run = _slice_run(span.run, offset_start, offset_end + 1)
+        match_run = _slice_run(span.run, offset_start, offset_end + 1, on_split)
         if match_run.text:
             runs.append(match_run)
 
     return runs
 
 
+# Indice invertido de palavras dos paragrafos, construido uma vez por documento, para o
+# fallback de paragrafo mais similar (Jaccard sobre conjuntos de palavras). Apenas os
+# paragrafos que compartilham palavras com o trecho sao pontuados.
+class ParagraphWordIndex:
+    def __init__(self, paragraphs: List[Paragraph]):
+        self.paragraphs: List[Paragraph] = []
+        self.sizes: List[int] = []
+        self.postings: Dict[str, List[int]] = defaultdict(list)
+        for paragraph in paragraphs:
+            text = paragraph.text.strip()
+            if not text:
+                continue
+            words = set(text.lower().split())
+            if not words:
+                continue
+            pos = len(self.paragraphs)
+            self.paragraphs.append(paragraph)
+            self.sizes.append(len(words))
+            for word in words:
+                self.postings[word].append(pos)
+        self._idf_sums: Optional[List[float]] = None
+
+    # Frequencia de documento suavizada (mesma forma do TF-IDF usual).
+    def idf(self, word: str) -> float:
+        df = len(self.postings.get(word, ()))
+        return math.log((1 + len(self.paragraphs)) / (1 + df)) + 1.0
+
+    def _paragraph_idf_sums(self) -> List[float]:
+        if self._idf_sums is None:
+            sums = [0.0] * len(self.paragraphs)
+            for word, positions in self.postings.items():
+                weight = self.idf(word)
+                for pos in positions:
+                    sums[pos] += weight
+            self._idf_sums = sums
+        return self._idf_sums
+
+    def best(self, search_text: str, use_idf: bool = False) -> Optional[Paragraph]:
+        target_words = set((search_text or '').lower().split())
+        if not target_words:
+            return None
+
+        overlap: Dict[int, float] = defaultdict(float)
+        for word in target_words:
+            positions = self.postings.get(word)
+            if not positions:
+                continue
+            weight = self.idf(word) if use_idf else 1.0
+            for pos in positions:
+                overlap[pos] += weight
+
+        if use_idf:
+            target_weight = sum(self.idf(word) for word in target_words)
+            paragraph_weights = self._paragraph_idf_sums()
+        else:
+            target_weight = float(len(target_words))
+            paragraph_weights = self.sizes
+
+        best_ratio = 0.0
+        best_pos: Optional[int] = None
+        # Ordem do documento: em empate vence o primeiro paragrafo, como na busca linear.
+        for pos in sorted(overlap):
+            inter = overlap[pos]
+            ratio = inter / (target_weight + paragraph_weights[pos] - inter)
+            if ratio > best_ratio:
+                best_ratio = ratio
+                best_pos = pos
+
+        return self.paragraphs[best_pos] if best_pos is not None else None
+
+
 # Localiza o paragrafo mais similar quando a busca direta falhar.
-def _find_best_paragraph(doc: Document, search_text: str) -> Optional[Paragraph]:
-    target_words = set((search_text or '').lower().split())
-    best_ratio = 0.0
-    best_paragraph: Optional[Paragraph] = None
-
-    for paragraph in doc.paragraphs:
-        text = paragraph.text.strip()
-        if not text:
-            continue
-        words = set(text.lower().split())
-        if not words:
-            continue
-        ratio = len(target_words & words) / len(target_words | words)
-        if ratio > best_ratio:
-            best_ratio = ratio
-            best_paragraph = paragraph
+def _find_best_paragraph(
+    doc: Document,
+    search_text: str,
+    word_index: Optional[ParagraphWordIndex] = None,
+) -> Optional[Paragraph]:
+    if word_index is None:
+        word_index = ParagraphWordIndex(list(doc.paragraphs))
+    return word_index.best(search_text)
+
 
-    return best_paragraph
+# Menor bloco aceito na busca aproximada: pelo menos 3 caracteres (ou 1/5 do trecho)
+# e cobertura minima de 60% do trecho.
+def _min_fuzzy_size(length: int) -> int:
+    required = max(3, length // 5, (3 * length) // 5)
+    while required / length < 0.6:
+        required += 1
+    return required
 
 
 # Busca o trecho normalizado dentro do paragrafo e retorna metadados da correspondencia.
-def find_run_with_text(paragraph: Paragraph, search_text: str) -> Optional[MatchLocation]:
+def find_run_with_text(
+    paragraph: Paragraph,
+    search_text: str,
+    index_cache: Optional[ParagraphIndexCache] = None,
+) -> Optional[MatchLocation]:
     trecho = normalize_visible_text(search_text or '')
     if not trecho:
         return None
 
-    index = _build_paragraph_index(paragraph)
+    index = index_cache.get(paragraph) if index_cache is not None else _build_paragraph_index(paragraph)
     if not index.text:
         return None
 
@@ -377,17 +531,13 @@ def find_run_with_text(paragraph: Paragraph, search_text: str) -> Optional[Match
     match_length = len(trecho)
 
     if idx == -1:
-        matcher = SequenceMatcher(None, index.text, trecho, autojunk=False)
-        match = matcher.find_longest_match(0, len(index.text), 0, len(trecho))
-        min_size = max(3, len(trecho) // 5)
-        if match.size >= min_size:
-            coverage = match.size / len(trecho) if trecho else 0
-            if coverage < 0.6:
-                return None
-            idx = match.a
-            match_length = match.size
-        else:
+        if index.qgrams is None:
+            index.qgrams = QGramIndex(index.text)
+        block = find_longest_block(index.text, trecho, _min_fuzzy_size(len(trecho)), index=index.qgrams)
+        if block is None:
             return None
+        idx = block.a
+        match_length = block.size
 
     if idx < 0:
         return None
@@ -405,9 +555,22 @@ def find_run_with_text(paragraph: Paragraph, search_text: str) -> Optional[Match
 
 
 # Funcao principal: aplica comentarios nos trechos fornecidos respeitando segmentacao por clausula.
-def add_error_comments_to_docx(docx_content: bytes, errors_by_clause: Dict[str, List[Dict]]) -> bytes:
+def add_error_comments_to_docx(
+    docx_content: bytes,
+    errors_by_clause: Dict[str, List[Dict]],
+    segmentation_strategy: Optional[str] = None,
+) -> bytes:
     doc = Document(io.BytesIO(docx_content))
-    seg_map = {title: paras for title, paras in segment_document(doc)}
+    seg_map: Dict[str, Segment] = {
+        segment.title: segment
+        for segment in get_cached_segments(docx_content, doc, strategy=segmentation_strategy)
+    }
+    ordered_paragraphs = list(iter_document_paragraphs(doc))
+    index_cache = ParagraphIndexCache()
+    document_index: Optional[DocumentTextIndex] = None
+    word_index: Optional[ParagraphWordIndex] = None
+    # Comentarios sao acumulados e gravados de uma vez ao final (ver comment_writer).
+    writer = BulkCommentWriter(doc, author="Revisor IA")
 
     for clause_title, errors in errors_by_clause.items():
         for error in errors:
@@ -415,33 +578,68 @@ def add_error_comments_to_docx(docx_content: bytes, errors_by_clause: Dict[str,
             if not trecho_exato:
                 continue
 
-            candidate_paragraphs: Optional[List[Paragraph]] = seg_map.get(clause_title)
-            if not candidate_paragraphs and clause_title:
-                for title, paras in seg_map.items():
-                    if clause_title in title:
-                        candidate_paragraphs = paras
+            candidate_segment: Optional[Segment] = seg_map.get(clause_title)
+            if (candidate_segment is None or not len(candidate_segment)) and clause_title:
+                for title, segment in seg_map.items():
+                    if clause_title in title and len(segment):
+                        candidate_segment = segment
                         break
-            if not candidate_paragraphs:
-                candidate_paragraphs = list(doc.paragraphs)
-
-            match_location: Optional[MatchLocation] = None
+            candidate_paragraphs: Optional[List[Paragraph]] = (
+                candidate_segment.resolve(ordered_paragraphs) if candidate_segment is not None else None
+            )
+            # Ocorrencia exata no texto unido da clausula (offsets do Segment): esse paragrafo e
+            # tentado primeiro, antes de uma correspondencia aproximada em paragrafo anterior.
+            if candidate_paragraphs:
+                exact_index = candidate_segment.find_paragraph_index(trecho_exato)
+                if exact_index is not None and exact_index < len(ordered_paragraphs):
+                    exact_paragraph = ordered_paragraphs[exact_index]
+                    candidate_paragraphs = [exact_paragraph] + [
+                        paragraph for paragraph in candidate_paragraphs if paragraph is not exact_paragraph
+                    ]
+
+            match_locations: List[MatchLocation] = []
+            marcado_parts: List[str] = []
             comment_runs: List[Run] = []
             target_paragraph: Optional[Paragraph] = None
 
-            for paragraph in candidate_paragraphs:
-                location = find_run_with_text(paragraph, trecho_exato)
+            for paragraph in candidate_paragraphs or []:
+                location = find_run_with_text(paragraph, trecho_exato, index_cache=index_cache)
                 if location:
-                    match_location = location
-                    target_paragraph = location.paragraph
+                    match_locations = [location]
                     break
 
-            if match_location:
-                comment_runs = _materialize_match_runs(match_location)
+            # Fora da clausula: uma unica busca exata no texto do documento inteiro,
+            # que tambem encontra trechos que atravessam paragrafos.
+            if not match_locations:
+                if document_index is None:
+                    document_index = DocumentTextIndex(ordered_paragraphs, index_cache)
+                match_locations = document_index.find(trecho_exato)
+
+            # Clausula desconhecida: mantem a busca aproximada paragrafo a paragrafo.
+            if not match_locations and not candidate_paragraphs:
+                for paragraph in ordered_paragraphs:
+                    location = find_run_with_text(paragraph, trecho_exato, index_cache=index_cache)
+                    if location:
+                        match_locations = [location]
+                        break
+
+            if match_locations:
+                target_paragraph = match_locations[0].paragraph
+            for location in match_locations:
+                location_runs = _materialize_match_runs(location, on_split=writer.track_split)
+                index_cache.refresh(location.paragraph)
+                comment_runs.extend(location_runs)
+                marcado_parts.append(''.join((run.text or '') for run in location_runs))
 
             if not comment_runs:
-                target_paragraph = target_paragraph or _find_best_paragraph(doc, trecho_exato)
-                if target_paragraph and target_paragraph.runs:
-                    comment_runs = [target_paragraph.runs[-1]]
+                if target_paragraph is None:
+                    if word_index is None:
+                        word_index = ParagraphWordIndex(list(doc.paragraphs))
+                    target_paragraph = _find_best_paragraph(doc, trecho_exato, word_index)
+                if target_paragraph is not None:
+                    last_run = writer.last_run(target_paragraph)
+                    if last_run is not None:
+                        comment_runs = [last_run]
 
             if not comment_runs:
                 continue
@@ -452,6 +650,9 @@ def add_error_comments_to_docx(docx_content: bytes, errors_by_clause: Dict[str,
             marcado = ''
             if len(comment_runs) == 1 and comment_runs[0].text:
                 marcado = comment_runs[0].text
+            elif len(match_locations) > 1:
+                # Trecho atravessando paragrafos: separa as partes como no texto da clausula.
+                marcado = '\n'.join(part for part in marcado_parts if part)
             else:
                 marcado = ''.join((run.text or '') for run in comment_runs)
             if not marcado and target_paragraph is not None:
@@ -460,16 +661,19 @@ def add_error_comments_to_docx(docx_content: bytes, errors_by_clause: Dict[str,
 
             comment_text = f"[{error.get('id_regra', 'N/A')}] {error.get('comentario', '')}"
 
-            try:
-                doc.add_comment(comment_runs, text=comment_text, author="Revisor IA")
-                for run in comment_runs:
-                    run.font.underline = True
-                    run.font.color.rgb = RGBColor(255, 0, 0)
-            except Exception as exc:
-                raise RuntimeError(
-                    f"Falha ao adicionar comentario para '{trecho_exato[:50]}...'"
-                ) from exc
-
-    output_buffer = io.BytesIO()
-    doc.save(output_buffer)
-    return output_buffer.getvalue()
\ No newline at end of file
+            writer.add(comment_runs, comment_text)
+
+    try:
+        writer.flush()
+    except Exception as exc:
+        raise RuntimeError(f"Falha ao gravar {len(writer)} comentarios no DOCX") from exc
+
+    try:
+        return save_docx_reusing_source(doc, docx_content, compresslevel=settings.DOCX_OUTPUT_COMPRESSLEVEL)
+    except Exception as exc:
+        # ZIP de origem irregular ou mudança nos internos do zipfile usados na cópia crua:
+        # grava tudo pelo python-docx em vez de perder os comentários.
+        print(f"[DOCX] Cópia crua do ZIP falhou ({type(exc).__name__}: {exc}); gravando com doc.save", flush=True)
+        output_buffer = io.BytesIO()
+        doc.save(output_buffer)
+        return output_buffer.getvalue()
\ No newline at end of file
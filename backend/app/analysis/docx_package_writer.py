@@ -0,0 +1,94 @@
+import io
+import struct
+import zipfile
+from typing import Iterable, Optional
+
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.opc.packuri import CONTENT_TYPES_URI, PACKAGE_URI
+from docx.opc.part import Part
+from docx.opc.pkgwriter import _ContentTypesItem
+
+# Gravacao do DOCX comentado reaproveitando o ZIP de origem. O doc.save do python-docx
+# re-serializa e recomprime todas as partes (inclusive imagens e fontes embutidas); aqui
+# apenas document.xml, comments.xml, [Content_Types].xml e os .rels sao gerados de novo.
+# As demais partes tem os bytes comprimidos copiados do arquivo original, sem descompressao.
+# A ordem dos membros e o conjunto de partes seguem o PackageWriter do python-docx.
+
+LOCAL_FILE_HEADER_SIGNATURE = b'PK\x03\x04'
+LOCAL_FILE_HEADER_SIZE = 30
+DATA_DESCRIPTOR_FLAG = 0x08
+
+
+def _copy_member_raw(target: zipfile.ZipFile, source: memoryview, info: zipfile.ZipInfo) -> None:
+    """Copia um membro ja comprimido para `target`, sem descompactar nem recomprimir."""
+    offset = info.header_offset
+    header = source[offset:offset + LOCAL_FILE_HEADER_SIZE]
+    if bytes(header[:4]) != LOCAL_FILE_HEADER_SIGNATURE:
+        raise zipfile.BadZipFile(f"Cabecalho local invalido para {info.filename}")
+    name_len, extra_len = struct.unpack('<HH', header[26:30])
+    data_start = offset + LOCAL_FILE_HEADER_SIZE + name_len + extra_len
+    data = source[data_start:data_start + info.compress_size]
+
+    copied = zipfile.ZipInfo(info.filename, info.date_time)
+    copied.compress_type = info.compress_type
+    # Tamanhos e CRC ja conhecidos: o cabecalho local dispensa o data descriptor.
+    copied.flag_bits = info.flag_bits & ~DATA_DESCRIPTOR_FLAG
+    copied.CRC = info.CRC
+    copied.compress_size = info.compress_size
+    copied.file_size = info.file_size
+    copied.create_system = info.create_system
+    copied.external_attr = info.external_attr
+
+    # Mesmo protocolo de ZipFile.writestr: cabecalho local + dados; o diretorio central
+    # e escrito por ZipFile.close() a partir de filelist.
+    copied.header_offset = target.fp.tell()
+    target.fp.write(copied.FileHeader())
+    target.fp.write(data)
+    target.filelist.append(copied)
+    target.NameToInfo[copied.filename] = copied
+    target.start_dir = target.fp.tell()
+    target._didModify = True
+
+
+def _regenerated_parts(doc) -> set:
+    parts = {doc.part}
+    for rel in doc.part.rels.values():
+        if not rel.is_external and rel.reltype == RT.COMMENTS:
+            parts.add(rel.target_part)
+    return parts
+
+
+def save_docx_reusing_source(
+    doc,
+    source: bytes,
+    compresslevel: Optional[int] = None,
+    changed_parts: Iterable[Part] = (),
+) -> bytes:
+    """Salva `doc` (aberto a partir de `source`) copiando cru os membros nao alterados.
+
+    Sao regeneradas a parte principal, a de comentarios, as partes em `changed_parts` e
+    as que nao existem no arquivo de origem; [Content_Types].xml e .rels sempre.
+    """
+    package = doc.part.package
+    parts = list(package.iter_parts())
+    for part in parts:
+        part.before_marshal()
+    regenerate = _regenerated_parts(doc) | set(changed_parts)
+
+    source_view = memoryview(source)
+    output = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(source)) as source_zip, zipfile.ZipFile(
+        output, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=compresslevel
+    ) as target:
+        source_members = {info.filename: info for info in source_zip.infolist()}
+        target.writestr(CONTENT_TYPES_URI.membername, _ContentTypesItem.from_parts(parts).blob)
+        target.writestr(PACKAGE_URI.rels_uri.membername, package.rels.xml)
+        for part in parts:
+            info = source_members.get(part.partname.membername)
+            if part in regenerate or info is None:
+                target.writestr(part.partname.membername, part.blob)
+            else:
+                _copy_member_raw(target, source_view, info)
+            if len(part.rels):
+                target.writestr(part.partname.rels_uri.membername, part.rels.xml)
+    return output.getvalue()
@@ -1,8 +1,10 @@
+import io
 import os
 import csv
+import copy
 import zipfile
 from lxml import etree
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Iterator, Union, BinaryIO
 
 # Definição Completa de Namespaces
 NAMESPACES = {
@@ -13,73 +15,285 @@ NAMESPACES = {
     'mc': 'http://schemas.openxmlformats.org/markup-compatibility/2006'
 }
 
+# Origem do DOCX: caminho em disco, bytes já em memória (upload) ou arquivo binário aberto.
+DocxSource = Union[str, os.PathLike, bytes, bytearray, BinaryIO]
+
 def qn(tag):
     return f"{{{NAMESPACES['w']}}}{tag}"
 
+W_P = qn('p')
+
+def get_safe_attrib(elem, attr_name):
+    val = elem.get(qn(attr_name))
+    if val: return val
+    val = elem.get(attr_name)
+    if val: return val
+    for key, value in elem.attrib.items():
+        if key.endswith(f"}}{attr_name}") or key == attr_name:
+            return value
+    return ''
+
+def find_tc_context(elem):
+    for ancestor in elem.iterancestors():
+        tag_name = etree.QName(ancestor).localname
+        tc_type = None
+        if tag_name in ['ins', 'moveTo']:
+            tc_type = 'insert'
+        elif tag_name in ['del', 'moveFrom']:
+            tc_type = 'delete'
+
+        if tc_type:
+            return tc_type, track_change_meta(ancestor)
+        if tag_name in ['p', 'tbl', 'sectPr', 'body']:
+            break
+    return 'texto', {}
+
+def track_change_meta(elem):
+    return {
+        'author': get_safe_attrib(elem, 'author'),
+        'date': get_safe_attrib(elem, 'date')
+    }
+
+# Contexto de revisão fora de qualquer ins/del (ou barrado por um limite de bloco).
+TEXT_CONTEXT = ('texto', {})
+
 # ==========================================
-# MÉTODO 1: PADRÃO (Fragmentado/Linear)
+# MOTOR DE EVENTOS (compartilhado pelos 5 métodos)
 # ==========================================
-class DocxParserStandard:
-    def __init__(self, docx_path: str, nome_arquivo: str):
-        self.docx_path = docx_path
+# Cada parte XML (cabeçalhos, corpo, rodapés) é lida uma única vez com iterparse, filtrando
+# no lxml apenas as tags de interesse (nome local em qualquer namespace, como antes).
+# Os métodos recebem eventos tipados na ordem do documento:
+#   on_paragraph_start / on_paragraph_end  -> qualquer elemento 'p' (w:p é W_P)
+#   on_text                                -> w:t / w:delText com o contexto de revisão
+#   on_comment_start / on_comment_end      -> commentRangeStart / commentRangeEnd
+#   on_break                               -> br / cr / tab
+#   on_track_change_start / _end           -> ins / moveTo (insert) e del / moveFrom (delete)
+# O contexto de revisão de cada texto vem de uma pilha mantida pelos próprios eventos: ins/del/
+# moveTo/moveFrom empilham (tipo, autor/data lidos uma vez por elemento) e p/tbl/sectPr/body
+# empilham um limite, que isola o texto de revisões externas ao bloco (mesma regra da subida
+# pelos ancestrais em find_tc_context). O topo da pilha é o contexto do texto.
+# Ao fechar o parágrafo mais externo, seu conteúdo e os irmãos anteriores são descartados:
+# a memória fica limitada ao maior bloco do documento, não ao documento inteiro.
+
+EVENT_TAGS = [
+    '{*}p', '{*}t', '{*}delText', '{*}commentRangeStart', '{*}commentRangeEnd',
+    '{*}br', '{*}cr', '{*}tab', '{*}ins', '{*}moveTo', '{*}del', '{*}moveFrom',
+    '{*}tbl', '{*}sectPr', '{*}body',
+]
+
+(EV_PARAGRAPH, EV_TEXT, EV_COMMENT_START, EV_COMMENT_END, EV_BREAK, EV_INSERT, EV_DELETE,
+ EV_BOUNDARY) = range(8)
+
+_LOCAL_EVENT_KIND = {
+    'p': EV_PARAGRAPH,
+    't': EV_TEXT,
+    'delText': EV_TEXT,
+    'commentRangeStart': EV_COMMENT_START,
+    'commentRangeEnd': EV_COMMENT_END,
+    'br': EV_BREAK,
+    'cr': EV_BREAK,
+    'tab': EV_BREAK,
+    'ins': EV_INSERT,
+    'moveTo': EV_INSERT,
+    'del': EV_DELETE,
+    'moveFrom': EV_DELETE,
+    'tbl': EV_BOUNDARY,
+    'sectPr': EV_BOUNDARY,
+    'body': EV_BOUNDARY,
+}
+
+class DocxEventParser:
+    # Atributos que não fazem parte do estado de leitura de uma parte.
+    _STATIC_FIELDS = ('docx_source', 'filename', 'comments_map', 'rows')
+
+    def __init__(self, docx_source: DocxSource, nome_arquivo: str):
+        self.docx_source = docx_source
         self.filename = nome_arquivo
         self.comments_map = {}
         self.rows = []
-        
-        # Estado Global
-        self.buffer_text = []
-        self.current_context_type = 'texto' 
-        self.current_tc_meta = {} 
-        
-        self.active_comments_stack = [] 
-        self.captured_content_in_range = {}
         self.p_index = 0
         self.current_section_type = 'Body'
 
+    _get_safe_attrib = staticmethod(get_safe_attrib)
+    _find_tc_context = staticmethod(find_tc_context)
+
     def load_comments(self, zf: zipfile.ZipFile):
         if 'word/comments.xml' not in zf.namelist(): return
         try:
-            xml_content = zf.read('word/comments.xml')
-            tree = etree.fromstring(xml_content)
-        except Exception: return
-        
-        for comment in tree.iter():
-            if etree.QName(comment).localname == 'comment':
-                c_id = self._get_safe_attrib(comment, 'id')
-                c_text = "".join([t for t in comment.itertext()])
-                self.comments_map[c_id] = {
-                    'autor': self._get_safe_attrib(comment, 'author'),
-                    'data': self._get_safe_attrib(comment, 'date'),
-                    'texto': c_text
-                }
-
-    def _get_safe_attrib(self, elem, attr_name):
-        val = elem.get(qn(attr_name))
-        if val: return val
-        val = elem.get(attr_name)
-        if val: return val
-        for key, value in elem.attrib.items():
-            if key.endswith(f"}}{attr_name}") or key == attr_name:
-                return value
-        return ''
-
-    def _find_tc_context(self, elem):
-        for ancestor in elem.iterancestors():
-            tag_name = etree.QName(ancestor).localname
-            tc_type = None
-            if tag_name in ['ins', 'moveTo']:
-                tc_type = 'insert'
-            elif tag_name in ['del', 'moveFrom']:
-                tc_type = 'delete'
-            
-            if tc_type:
-                return tc_type, {
-                    'author': self._get_safe_attrib(ancestor, 'author'),
-                    'date': self._get_safe_attrib(ancestor, 'date')
-                }
-            if tag_name in ['p', 'tbl', 'sectPr', 'body']:
-                break
-        return 'texto', {}
+            with zf.open('word/comments.xml') as stream:
+                for _, comment in etree.iterparse(stream, events=('end',), tag='{*}comment'):
+                    c_id = get_safe_attrib(comment, 'id')
+                    c_text = "".join([t for t in comment.itertext()])
+                    self.comments_map[c_id] = {
+                        'autor': get_safe_attrib(comment, 'author'),
+                        'data': get_safe_attrib(comment, 'date'),
+                        'texto': c_text
+                    }
+                    parent = comment.getparent()
+                    if parent is not None and parent.getparent() is None:
+                        comment.clear(keep_tail=True)
+                        while comment.getprevious() is not None:
+                            del parent[0]
+        except etree.LxmlError:
+            self.comments_map = {}
+
+    # --- Consumidores de eventos (cada método sobrescreve o que usa) ---
+    def on_paragraph_start(self, elem): pass
+    def on_paragraph_end(self, elem): pass
+    def on_text(self, elem, text, tc_type, tc_meta): pass
+    def on_comment_start(self, c_id): pass
+    def on_comment_end(self, c_id): pass
+    def on_break(self): pass
+    def on_track_change_start(self, elem, tc_type): pass
+    def on_track_change_end(self, elem, tc_type): pass
+    def on_part_end(self): pass
+
+    def _iter_events(self, source):
+        open_paragraphs = 0
+        context_stack = [TEXT_CONTEXT]
+        kinds = {}
+        for event, elem in etree.iterparse(source, events=('start', 'end'), tag=EVENT_TAGS):
+            tag = elem.tag
+            if tag in kinds:
+                kind = kinds[tag]
+            else:
+                # Prefixo não declarado (XML inválido) produz nomes como 'w:p': sem evento.
+                kind = kinds[tag] = _LOCAL_EVENT_KIND.get(tag.rsplit('}', 1)[-1])
+            if kind is None:
+                continue
+
+            if event == 'start':
+                if kind == EV_PARAGRAPH:
+                    open_paragraphs += 1
+                    context_stack.append(TEXT_CONTEXT)
+                    self.on_paragraph_start(elem)
+                elif kind == EV_COMMENT_START:
+                    self.on_comment_start(get_safe_attrib(elem, 'id'))
+                elif kind == EV_COMMENT_END:
+                    self.on_comment_end(get_safe_attrib(elem, 'id'))
+                elif kind == EV_BREAK:
+                    self.on_break()
+                elif kind == EV_INSERT:
+                    context_stack.append(('insert', track_change_meta(elem)))
+                    self.on_track_change_start(elem, 'insert')
+                elif kind == EV_DELETE:
+                    context_stack.append(('delete', track_change_meta(elem)))
+                    self.on_track_change_start(elem, 'delete')
+                elif kind == EV_BOUNDARY:
+                    context_stack.append(TEXT_CONTEXT)
+                continue
+
+            # Texto só é garantido no evento de fim; w:t não tem filhos, então a ordem
+            # relativa aos demais eventos é a mesma da leitura em pré-ordem.
+            if kind == EV_TEXT:
+                tc_type, tc_meta = context_stack[-1]
+                self.on_text(elem, elem.text or "", tc_type, tc_meta)
+            elif kind == EV_PARAGRAPH:
+                context_stack.pop()
+                self.on_paragraph_end(elem)
+                open_paragraphs -= 1
+                if not open_paragraphs:
+                    parent = elem.getparent()
+                    elem.clear(keep_tail=True)
+                    if parent is not None:
+                        while elem.getprevious() is not None:
+                            del parent[0]
+            elif kind == EV_INSERT:
+                context_stack.pop()
+                self.on_track_change_end(elem, 'insert')
+            elif kind == EV_DELETE:
+                context_stack.pop()
+                self.on_track_change_end(elem, 'delete')
+            elif kind == EV_BOUNDARY:
+                context_stack.pop()
+
+    def parse_xml_content(self, xml_source):
+        """Lê uma parte XML (bytes ou arquivo aberto). Se o XML for inválido, a parte é ignorada
+        por inteiro: linhas e estado voltam ao ponto anterior, como no parse em árvore."""
+        if isinstance(xml_source, (bytes, bytearray)):
+            xml_source = io.BytesIO(xml_source)
+        rows_before = len(self.rows)
+        state = copy.deepcopy({k: v for k, v in vars(self).items() if k not in self._STATIC_FIELDS})
+        try:
+            self._iter_events(xml_source)
+        except etree.LxmlError:
+            del self.rows[rows_before:]
+            vars(self).update(state)
+            return
+        self.on_part_end()
+
+    def _iter_parts(self):
+        """Lê as partes em ordem (cabeçalhos, corpo, rodapés), pausando ao fim de cada uma."""
+        source = self.docx_source
+        if isinstance(source, (bytes, bytearray)):
+            source = io.BytesIO(source)
+        with zipfile.ZipFile(source) as zf:
+            self.load_comments(zf)
+            file_list = zf.namelist()
+            self.current_section_type = 'Header'
+            headers = sorted([f for f in file_list if f.startswith('word/header') and f.endswith('.xml')])
+            for h in headers:
+                with zf.open(h) as stream: self.parse_xml_content(stream)
+                yield
+
+            self.current_section_type = 'Body'
+            if 'word/document.xml' in file_list:
+                with zf.open('word/document.xml') as stream: self.parse_xml_content(stream)
+                yield
+
+            self.current_section_type = 'Footer'
+            footers = sorted([f for f in file_list if f.startswith('word/footer') and f.endswith('.xml')])
+            for f in footers:
+                with zf.open(f) as stream: self.parse_xml_content(stream)
+                yield
+
+    def process(self):
+        for _ in self._iter_parts():
+            pass
+
+    def iter_rows(self):
+        """Gera as linhas conforme cada parte termina, sem acumular o documento inteiro.
+
+        A granularidade é a parte: uma parte com XML inválido continua sendo descartada por
+        inteiro, então suas linhas só saem depois que ela é lida até o fim.
+        """
+        for _ in self._iter_parts():
+            rows, self.rows = self.rows, []
+            yield from rows
+
+    def get_rows(self):
+        return self.rows
+
+
+# ==========================================
+# MÉTODO 1: PADRÃO (Fragmentado/Linear)
+# ==========================================
+class DocxParserStandard(DocxEventParser):
+    def __init__(self, docx_source: DocxSource, nome_arquivo: str):
+        super().__init__(docx_source, nome_arquivo)
+
+        # Estado Global
+        self.buffer_text = []
+        self.current_context_type = 'texto'
+        self.current_tc_meta = {}
+
+        self.active_comments_stack = []
+        self.captured_content_in_range = {}
+
+        # Index_p conta parágrafos com texto, mas só se sabe se o parágrafo tem texto ao
+        # fechá-lo. Linhas geradas dentro de um parágrafo aguardam o fechamento do
+        # parágrafo mais externo para receber o índice (parágrafos aninhados contam na
+        # ordem em que abrem, como na leitura em pré-ordem).
+        self._paragraph_has_text = []
+        self._open_paragraphs = []
+        self._pending_index_rows = []
+
+    def _append_row(self, row):
+        if self._paragraph_has_text:
+            self._pending_index_rows.append((row, len(self._paragraph_has_text) - 1))
+        else:
+            row['Index_p'] = self.p_index
+        self.rows.append(row)
 
     def flush_buffer(self):
         text = "".join(self.buffer_text)
@@ -89,7 +303,7 @@ class DocxParserStandard:
         txt_modificado = ""
         trecho_comentado = ""
         tipo_change, autor, data = "", "", ""
-        
+
         if self.current_context_type == 'insert':
             txt_modificado = text
             tipo_change = "Inserção"
@@ -110,7 +324,7 @@ class DocxParserStandard:
             if c_id in self.comments_map:
                 meta = self.comments_map[c_id]
                 comentarios_finais.append(meta['texto'])
-                if not autor: 
+                if not autor:
                     autor = meta['autor']
                     data = meta['data']
             self.captured_content_in_range[c_id] = True
@@ -133,9 +347,9 @@ class DocxParserStandard:
         elif has_comments:
             coluna_tipo = "Comentário"
 
-        self.rows.append({
+        self._append_row({
             'Nome_arquivo': self.filename,
-            'Index_p': self.p_index,
+            'Index_p': None,
             'tipo_secao': self.current_section_type,
             'trecho_texto_orig': txt_orig,
             'trecho_texto_modificado': txt_modificado,
@@ -150,12 +364,12 @@ class DocxParserStandard:
     def _handle_empty_comment(self, c_id):
         if c_id not in self.comments_map: return
         meta = self.comments_map[c_id]
-        self.rows.append({
+        self._append_row({
             'Nome_arquivo': self.filename,
-            'Index_p': self.p_index,
+            'Index_p': None,
             'tipo_secao': self.current_section_type,
-            'trecho_texto_orig': "", 
-            'trecho_texto_modificado': "", 
+            'trecho_texto_orig': "",
+            'trecho_texto_modificado': "",
             'trecho_comentado': "",
             'comentario': meta['texto'],
             'tipo': 'Comentário',
@@ -163,142 +377,80 @@ class DocxParserStandard:
             'data_hora': meta['data']
         })
 
-    def parse_xml_content(self, xml_bytes):
-        try: tree = etree.fromstring(xml_bytes)
-        except Exception: return
-
-        for elem in tree.iter():
-            tag_name = etree.QName(elem).localname
-            
-            if tag_name in ['t', 'delText']:
-                texto_no = elem.text or ""
-                novo_tipo, nova_meta = self._find_tc_context(elem)
-                
-                contexto_mudou = (novo_tipo != self.current_context_type)
-                meta_mudou = False
-                if novo_tipo != 'texto':
-                    meta_mudou = (nova_meta != self.current_tc_meta)
-
-                if contexto_mudou or meta_mudou:
-                    self.flush_buffer()
-                    self.current_context_type = novo_tipo
-                    self.current_tc_meta = nova_meta
-                
-                self.buffer_text.append(texto_no)
-
-            elif tag_name == 'commentRangeStart':
-                self.flush_buffer()
-                c_id = self._get_safe_attrib(elem, 'id')
-                if c_id not in self.active_comments_stack:
-                    self.active_comments_stack.append(c_id)
-                    self.captured_content_in_range[c_id] = False
-
-            elif tag_name == 'commentRangeEnd':
-                self.flush_buffer()
-                c_id = self._get_safe_attrib(elem, 'id')
-                if c_id in self.captured_content_in_range:
-                    if not self.captured_content_in_range[c_id]:
-                        self._handle_empty_comment(c_id)
-                    del self.captured_content_in_range[c_id]
-                if c_id in self.active_comments_stack:
-                    self.active_comments_stack.remove(c_id)
-            
-            elif tag_name == 'p':
-                self.flush_buffer()
-                self.current_context_type = 'texto'
-                self.current_tc_meta = {}
-                full_text = "".join(elem.itertext()).strip()
-                if full_text:
-                    self.p_index += 1
-
-            elif tag_name in ['br', 'cr', 'tab']:
-                self.flush_buffer()
-                self.current_context_type = 'texto'
-                self.current_tc_meta = {}
+    def on_text(self, elem, text, tc_type, tc_meta):
+        contexto_mudou = (tc_type != self.current_context_type)
+        meta_mudou = False
+        if tc_type != 'texto':
+            meta_mudou = (tc_meta != self.current_tc_meta)
+
+        if contexto_mudou or meta_mudou:
+            self.flush_buffer()
+            self.current_context_type = tc_type
+            self.current_tc_meta = tc_meta
 
+        self.buffer_text.append(text)
+
+    def on_comment_start(self, c_id):
         self.flush_buffer()
+        if c_id not in self.active_comments_stack:
+            self.active_comments_stack.append(c_id)
+            self.captured_content_in_range[c_id] = False
 
-    def process(self):
-        with zipfile.ZipFile(self.docx_path) as zf:
-            self.load_comments(zf)
-            file_list = zf.namelist()
-            self.current_section_type = 'Header'
-            headers = sorted([f for f in file_list if f.startswith('word/header') and f.endswith('.xml')])
-            for h in headers: self.parse_xml_content(zf.read(h))
-            
-            self.current_section_type = 'Body'
-            if 'word/document.xml' in file_list:
-                self.parse_xml_content(zf.read('word/document.xml'))
-            
-            self.current_section_type = 'Footer'
-            footers = sorted([f for f in file_list if f.startswith('word/footer') and f.endswith('.xml')])
-            for f in footers: self.parse_xml_content(zf.read(f))
+    def on_comment_end(self, c_id):
+        self.flush_buffer()
+        if c_id in self.captured_content_in_range:
+            if not self.captured_content_in_range[c_id]:
+                self._handle_empty_comment(c_id)
+            del self.captured_content_in_range[c_id]
+        if c_id in self.active_comments_stack:
+            self.active_comments_stack.remove(c_id)
+
+    def on_paragraph_start(self, elem):
+        self.flush_buffer()
+        self.current_context_type = 'texto'
+        self.current_tc_meta = {}
+        self._paragraph_has_text.append(False)
+        self._open_paragraphs.append(len(self._paragraph_has_text) - 1)
+
+    def on_paragraph_end(self, elem):
+        ordinal = self._open_paragraphs.pop()
+        self._paragraph_has_text[ordinal] = bool("".join(elem.itertext()).strip())
+        if self._open_paragraphs:
+            return
+        indexes = []
+        for has_text in self._paragraph_has_text:
+            if has_text:
+                self.p_index += 1
+            indexes.append(self.p_index)
+        for row, row_ordinal in self._pending_index_rows:
+            row['Index_p'] = indexes[row_ordinal]
+        self._paragraph_has_text = []
+        self._pending_index_rows = []
 
-    def get_rows(self):
-        return self.rows
+    def on_break(self):
+        self.flush_buffer()
+        self.current_context_type = 'texto'
+        self.current_tc_meta = {}
+
+    def on_part_end(self):
+        self.flush_buffer()
 
 
 # ==========================================
 # MÉTODO 2: ALTERNATIVO (Parágrafo/Consolidado)
 # ==========================================
-class DocxParserParagraph:
-    def __init__(self, docx_path: str, nome_arquivo: str):
-        self.docx_path = docx_path
-        self.filename = nome_arquivo
-        self.comments_map = {}
-        self.rows = []
-        self.current_p_data = {
-            'full_text_orig': [], 
-            'full_text_final': [], 
-            'interventions': [] 
-        }
-        self.p_index = 0
-        self.current_section_type = 'Body'
-
-    def load_comments(self, zf: zipfile.ZipFile):
-        if 'word/comments.xml' not in zf.namelist(): return
-        try:
-            xml_content = zf.read('word/comments.xml')
-            tree = etree.fromstring(xml_content)
-        except Exception: return
-        
-        for comment in tree.iter():
-            if etree.QName(comment).localname == 'comment':
-                c_id = self._get_safe_attrib(comment, 'id')
-                c_text = "".join([t for t in comment.itertext()])
-                self.comments_map[c_id] = {
-                    'autor': self._get_safe_attrib(comment, 'author'),
-                    'data': self._get_safe_attrib(comment, 'date'),
-                    'texto': c_text
-                }
-
-    def _get_safe_attrib(self, elem, attr_name):
-        val = elem.get(qn(attr_name))
-        if val: return val
-        val = elem.get(attr_name)
-        if val: return val
-        for key, value in elem.attrib.items():
-            if key.endswith(f"}}{attr_name}") or key == attr_name:
-                return value
-        return ''
-
-    def _find_tc_context(self, elem):
-        for ancestor in elem.iterancestors():
-            tag_name = etree.QName(ancestor).localname
-            tc_type = None
-            if tag_name in ['ins', 'moveTo']:
-                tc_type = 'insert'
-            elif tag_name in ['del', 'moveFrom']:
-                tc_type = 'delete'
-            
-            if tc_type:
-                return tc_type, {
-                    'author': self._get_safe_attrib(ancestor, 'author'),
-                    'date': self._get_safe_attrib(ancestor, 'date')
-                }
-            if tag_name in ['p', 'tbl', 'sectPr', 'body']:
-                break
-        return 'texto', {}
+class DocxParserParagraph(DocxEventParser):
+    def __init__(self, docx_source: DocxSource, nome_arquivo: str):
+        super().__init__(docx_source, nome_arquivo)
+        self.current_p_data = self._new_paragraph_data()
+        # w:p abertos (um parágrafo dentro de caixa de texto também conta para o externo)
+        # e parágrafos aguardando gravação na ordem em que abriram.
+        self._open_p_data = []
+        self._finished_p_data = []
+
+    @staticmethod
+    def _new_paragraph_data():
+        return {'full_text_orig': [], 'full_text_final': [], 'interventions': []}
 
     def _add_intervention(self, tipo, autor, data, texto_afetado):
         if not texto_afetado.strip(): return
@@ -306,21 +458,22 @@ class DocxParserParagraph:
         timestamp = f" [{data}]" if data else ""
         user_stamp = f"[{autor}{timestamp}]" if autor else "[Desconhecido]"
         log_entry = f"{user_stamp} {tipo}: '{texto_limpo}'"
-        self.current_p_data['interventions'].append(log_entry)
+        for p_data in self._open_p_data:
+            p_data['interventions'].append(log_entry)
 
     def _commit_paragraph(self):
         txt_orig = "".join(self.current_p_data['full_text_orig']).strip()
         txt_final = "".join(self.current_p_data['full_text_final']).strip()
         has_content = bool(txt_orig or txt_final)
         has_changes = bool(self.current_p_data['interventions'])
-        
+
         if not has_content and not has_changes:
-            self.current_p_data = {'full_text_orig': [], 'full_text_final': [], 'interventions': []}
+            self.current_p_data = self._new_paragraph_data()
             return
-        
+
         self.p_index += 1
         log_consolidado = "\n".join(self.current_p_data['interventions'])
-        
+
         self.rows.append({
             'Nome_arquivo': self.filename,
             'Index_p': self.p_index,
@@ -329,121 +482,63 @@ class DocxParserParagraph:
             'Texto_Final': txt_final,
             'Log_Intervencoes': log_consolidado
         })
-        self.current_p_data = {'full_text_orig': [], 'full_text_final': [], 'interventions': []}
-
-    def parse_xml_content(self, xml_bytes):
-        try: tree = etree.fromstring(xml_bytes)
-        except Exception: return
-        namespaces = {'w': 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'}
-        
-        for p_elem in tree.xpath('//w:p', namespaces=namespaces):
-            for child in p_elem.iter():
-                tag_name = etree.QName(child).localname
-                if tag_name in ['t', 'delText']:
-                    text = child.text or ""
-                    if not text: continue
-                    tc_type, meta = self._find_tc_context(child)
-                    if tc_type == 'delete':
-                        self.current_p_data['full_text_orig'].append(text)
-                        self._add_intervention("DELETOU", meta.get('author'), meta.get('date'), text)
-                    elif tc_type == 'insert':
-                        self.current_p_data['full_text_final'].append(text)
-                        self._add_intervention("INSERIU", meta.get('author'), meta.get('date'), text)
-                    else:
-                        self.current_p_data['full_text_orig'].append(text)
-                        self.current_p_data['full_text_final'].append(text)
-                elif tag_name == 'commentRangeStart':
-                    c_id = self._get_safe_attrib(child, 'id')
-                    if c_id in self.comments_map:
-                        meta = self.comments_map[c_id]
-                        self._add_intervention("COMENTOU", meta['autor'], meta['data'], meta['texto'])
+        self.current_p_data = self._new_paragraph_data()
+
+    def on_paragraph_start(self, elem):
+        if elem.tag != W_P: return
+        p_data = self._new_paragraph_data()
+        self._open_p_data.append(p_data)
+        self._finished_p_data.append(p_data)
+
+    def on_paragraph_end(self, elem):
+        if elem.tag != W_P: return
+        self._open_p_data.pop()
+        if self._open_p_data: return
+        for p_data in self._finished_p_data:
+            self.current_p_data = p_data
             self._commit_paragraph()
-
-    def process(self):
-        with zipfile.ZipFile(self.docx_path) as zf:
-            self.load_comments(zf)
-            file_list = zf.namelist()
-            self.current_section_type = 'Header'
-            headers = sorted([f for f in file_list if f.startswith('word/header') and f.endswith('.xml')])
-            for h in headers: self.parse_xml_content(zf.read(h))
-            
-            self.current_section_type = 'Body'
-            if 'word/document.xml' in file_list:
-                self.parse_xml_content(zf.read('word/document.xml'))
-            
-            self.current_section_type = 'Footer'
-            footers = sorted([f for f in file_list if f.startswith('word/footer') and f.endswith('.xml')])
-            for f in footers: self.parse_xml_content(zf.read(f))
-
-    def get_rows(self):
-        return self.rows
+        self._finished_p_data = []
+
+    def on_text(self, elem, text, tc_type, tc_meta):
+        if not text or not self._open_p_data: return
+        for p_data in self._open_p_data:
+            if tc_type == 'delete':
+                p_data['full_text_orig'].append(text)
+            elif tc_type == 'insert':
+                p_data['full_text_final'].append(text)
+            else:
+                p_data['full_text_orig'].append(text)
+                p_data['full_text_final'].append(text)
+        if tc_type == 'delete':
+            self._add_intervention("DELETOU", tc_meta.get('author'), tc_meta.get('date'), text)
+        elif tc_type == 'insert':
+            self._add_intervention("INSERIU", tc_meta.get('author'), tc_meta.get('date'), text)
+
+    def on_comment_start(self, c_id):
+        if self._open_p_data and c_id in self.comments_map:
+            meta = self.comments_map[c_id]
+            self._add_intervention("COMENTOU", meta['autor'], meta['data'], meta['texto'])
 
 # ==========================================
 # MÉTODO 3: HIERÁRQUICO (Lógica "Texto Original Base")
 # ==========================================
-class DocxParserHierarchical:
-    def __init__(self, docx_path: str, nome_arquivo: str):
-        self.docx_path = docx_path
-        self.filename = nome_arquivo
-        self.comments_map = {}
-        self.rows = []
-        
-        self.p_index = 0
-        self.current_section_type = 'Body'
-        
+class DocxParserHierarchical(DocxEventParser):
+    def __init__(self, docx_source: DocxSource, nome_arquivo: str):
+        super().__init__(docx_source, nome_arquivo)
+
         self.paragraph_full_text = [] # Reconstrói o texto ORIGINAL (sem inserções)
-        self.paragraph_changes = []   
+        self.paragraph_changes = []
         self.char_cursor = 0          # Cursor relativo ao texto ORIGINAL
 
-    def load_comments(self, zf: zipfile.ZipFile):
-        if 'word/comments.xml' not in zf.namelist(): return
-        try:
-            xml_content = zf.read('word/comments.xml')
-            tree = etree.fromstring(xml_content)
-        except Exception: return
-        
-        for comment in tree.iter():
-            if etree.QName(comment).localname == 'comment':
-                c_id = self._get_safe_attrib(comment, 'id')
-                c_text = "".join([t for t in comment.itertext()])
-                self.comments_map[c_id] = {
-                    'autor': self._get_safe_attrib(comment, 'author'),
-                    'data': self._get_safe_attrib(comment, 'date'),
-                    'texto': c_text
-                }
-
-    def _get_safe_attrib(self, elem, attr_name):
-        val = elem.get(qn(attr_name))
-        if val: return val
-        val = elem.get(attr_name)
-        if val: return val
-        for key, value in elem.attrib.items():
-            if key.endswith(f"}}{attr_name}") or key == attr_name:
-                return value
-        return ''
-
-    def _find_tc_context(self, elem):
-        for ancestor in elem.iterancestors():
-            tag_name = etree.QName(ancestor).localname
-            tc_type = None
-            if tag_name in ['ins', 'moveTo']:
-                tc_type = 'insert'
-            elif tag_name in ['del', 'moveFrom']:
-                tc_type = 'delete'
-            
-            if tc_type:
-                return tc_type, {
-                    'author': self._get_safe_attrib(ancestor, 'author'),
-                    'date': self._get_safe_attrib(ancestor, 'date')
-                }
-            if tag_name in ['p', 'tbl', 'sectPr', 'body']:
-                break
-        return 'texto', {}
+        # Estado de cada w:p aberto (texto, alterações, cursor) e fila de gravação na
+        # ordem de abertura; ver DocxParserParagraph.
+        self._open_p_state = []
+        self._finished_p_state = []
 
     def _commit_paragraph_hierarchical(self):
         # Texto Original reconstruído (contém o que foi deletado, ignora o que foi inserido)
         full_text_str = "".join(self.paragraph_full_text).strip()
-        
+
         if not full_text_str and not self.paragraph_changes:
             self.paragraph_full_text = []
             self.paragraph_changes = []
@@ -483,103 +578,78 @@ class DocxParserHierarchical:
         self.paragraph_changes = []
         self.char_cursor = 0
 
-    def parse_xml_content(self, xml_bytes):
-        try: tree = etree.fromstring(xml_bytes)
-        except Exception: return
-        namespaces = {'w': 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'}
-        
-        for p_elem in tree.xpath('//w:p', namespaces=namespaces):
-            # Reseta cursor para cada parágrafo novo
-            # Nota: O cursor aqui é relativo ao início do texto deste parágrafo
-            
-            for child in p_elem.iter():
-                tag_name = etree.QName(child).localname
-                
-                # Texto (Normal, Inserido ou Deletado)
-                if tag_name in ['t', 'delText']:
-                    text = child.text or ""
-                    if not text: continue
-                    
-                    tc_type, meta = self._find_tc_context(child)
-                    
-                    if tc_type == 'insert':
-                        # INSERÇÃO: Não soma no texto original.
-                        # A posição é o ponto exato onde o cursor está agora.
-                        # Ex: Texto Original "Casa [azul] bonita" -> Azul inserido na pos 5
-                        self.paragraph_changes.append({
-                            'tipo': 'Inserção',
-                            'texto': text,
-                            'posicao': f"{self.char_cursor}-{self.char_cursor}", # Ponto de inserção
-                            'autor': meta.get('author', ''),
-                            'data': meta.get('date', ''),
-                            'comentario': ''
-                        })
-                        # NÃO avança o char_cursor nem adiciona ao paragraph_full_text
-                        
-                    elif tc_type == 'delete':
-                        # EXCLUSÃO: Faz parte do texto original (foi deletado depois).
-                        # Soma no buffer e avança cursor.
-                        start_pos = self.char_cursor
-                        end_pos = start_pos + len(text)
-                        
-                        self.paragraph_full_text.append(text)
-                        self.char_cursor = end_pos
-                        
-                        self.paragraph_changes.append({
-                            'tipo': 'Exclusão',
-                            'texto': text,
-                            'posicao': f"{start_pos}-{end_pos}",
-                            'autor': meta.get('author', ''),
-                            'data': meta.get('date', ''),
-                            'comentario': ''
-                        })
-                    
-                    else:
-                        # TEXTO NORMAL: Faz parte do original.
-                        start_pos = self.char_cursor
-                        end_pos = start_pos + len(text)
-                        
-                        self.paragraph_full_text.append(text)
-                        self.char_cursor = end_pos
-                        
-                # Comentários
-                elif tag_name == 'commentRangeStart':
-                    c_id = self._get_safe_attrib(child, 'id')
-                    if c_id in self.comments_map:
-                        meta = self.comments_map[c_id]
-                        # Comentário ancorado na posição atual do cursor original
-                        pos_str = f"{self.char_cursor}-{self.char_cursor}" 
-                        self.paragraph_changes.append({
-                            'tipo': 'Comentário',
-                            'texto': '', 
-                            'posicao': pos_str,
-                            'autor': meta['autor'],
-                            'data': meta['data'],
-                            'comentario': meta['texto']
-                        })
-
+    def on_paragraph_start(self, elem):
+        if elem.tag != W_P: return
+        # [texto original, alterações, cursor]; o cursor é relativo ao início deste parágrafo
+        p_state = [[], [], 0]
+        self._open_p_state.append(p_state)
+        self._finished_p_state.append(p_state)
+
+    def on_paragraph_end(self, elem):
+        if elem.tag != W_P: return
+        self._open_p_state.pop()
+        if self._open_p_state: return
+        for full_text, changes, cursor in self._finished_p_state:
+            self.paragraph_full_text = full_text
+            self.paragraph_changes = changes
+            self.char_cursor = cursor
             self._commit_paragraph_hierarchical()
+        self._finished_p_state = []
 
-    def process(self):
-        with zipfile.ZipFile(self.docx_path) as zf:
-            self.load_comments(zf)
-            file_list = zf.namelist()
-            self.current_section_type = 'Header'
-            headers = sorted([f for f in file_list if f.startswith('word/header') and f.endswith('.xml')])
-            for h in headers: self.parse_xml_content(zf.read(h))
-            
-            self.current_section_type = 'Body'
-            if 'word/document.xml' in file_list:
-                self.parse_xml_content(zf.read('word/document.xml'))
-            
-            self.current_section_type = 'Footer'
-            footers = sorted([f for f in file_list if f.startswith('word/footer') and f.endswith('.xml')])
-            for f in footers: self.parse_xml_content(zf.read(f))
-
-    def get_rows(self):
-        return self.rows
-
-# ... (Classe DocxParserHierarchical anterior mantida igual) ...
+    def on_text(self, elem, text, tc_type, tc_meta):
+        # Texto (Normal, Inserido ou Deletado)
+        if not text: return
+        for p_state in self._open_p_state:
+            full_text, changes, cursor = p_state
+            if tc_type == 'insert':
+                # INSERÇÃO: Não soma no texto original.
+                # A posição é o ponto exato onde o cursor está agora.
+                # Ex: Texto Original "Casa [azul] bonita" -> Azul inserido na pos 5
+                changes.append({
+                    'tipo': 'Inserção',
+                    'texto': text,
+                    'posicao': f"{cursor}-{cursor}", # Ponto de inserção
+                    'autor': tc_meta.get('author', ''),
+                    'data': tc_meta.get('date', ''),
+                    'comentario': ''
+                })
+                # NÃO avança o cursor nem adiciona ao texto original
+
+            elif tc_type == 'delete':
+                # EXCLUSÃO: Faz parte do texto original (foi deletado depois).
+                # Soma no buffer e avança cursor.
+                end_pos = cursor + len(text)
+                full_text.append(text)
+                p_state[2] = end_pos
+                changes.append({
+                    'tipo': 'Exclusão',
+                    'texto': text,
+                    'posicao': f"{cursor}-{end_pos}",
+                    'autor': tc_meta.get('author', ''),
+                    'data': tc_meta.get('date', ''),
+                    'comentario': ''
+                })
+
+            else:
+                # TEXTO NORMAL: Faz parte do original.
+                full_text.append(text)
+                p_state[2] = cursor + len(text)
+
+    def on_comment_start(self, c_id):
+        # Comentários
+        if c_id not in self.comments_map: return
+        meta = self.comments_map[c_id]
+        for p_state in self._open_p_state:
+            # Comentário ancorado na posição atual do cursor original
+            cursor = p_state[2]
+            p_state[1].append({
+                'tipo': 'Comentário',
+                'texto': '',
+                'posicao': f"{cursor}-{cursor}",
+                'autor': meta['autor'],
+                'data': meta['data'],
+                'comentario': meta['texto']
+            })
 
 # ==============================================================================
 # MÉTODO 4: HIERÁRQUICO FILTRADO (Herança para evitar código duplicado)
@@ -598,9 +668,9 @@ class DocxParserHierarchicalFiltered(DocxParserHierarchical):
             # Se não tiver alterações, apenas avança o índice (para manter consistência)
             # e limpa os buffers, sem gerar linhas no CSV.
             full_text = "".join(self.paragraph_full_text).strip()
-            if full_text: 
+            if full_text:
                 self.p_index += 1
-            
+
             self.paragraph_full_text = []
             self.paragraph_changes = []
             self.char_cursor = 0
@@ -611,22 +681,22 @@ class DocxParserHierarchicalFiltered(DocxParserHierarchical):
 class DocxParserHierarchicalCommentsOnly(DocxParserHierarchical):
     """
     Herda do Hierárquico base.
-    Filtro: Só exporta o parágrafo se houver pelo menos um item 
+    Filtro: Só exporta o parágrafo se houver pelo menos um item
     na lista de alterações cujo 'tipo' seja 'Comentário'.
     """
     def _commit_paragraph_hierarchical(self):
         # Verifica se existe alguma alteração do tipo 'Comentário'
         has_comments = any(ch['tipo'] == 'Comentário' for ch in self.paragraph_changes)
-        
+
         if has_comments:
             # Se tiver comentário, processa normalmente (salva parágrafo + filhos)
             super()._commit_paragraph_hierarchical()
         else:
             # Se não tiver, apenas avança o índice e limpa buffers
             full_text = "".join(self.paragraph_full_text).strip()
-            if full_text: 
+            if full_text:
                 self.p_index += 1
-            
+
             self.paragraph_full_text = []
             self.paragraph_changes = []
             self.char_cursor = 0
@@ -634,34 +704,59 @@ class DocxParserHierarchicalCommentsOnly(DocxParserHierarchical):
 # ==========================================
 # FUNÇÃO UNIFICADA (Factory Otimizada)
 # ==========================================
-def extract_comments_and_track_changes(docx_path: str, csv_path: str, nome_arquivo: Optional[str] = None, method: str = 'padrao'):
-    if not os.path.exists(docx_path): return
-    if nome_arquivo is None: nome_arquivo = os.path.basename(docx_path)
+# Métodos com parser próprio; qualquer outro nome cai no padrão. resolve_method concentra esse
+# roteamento para parser, colunas e cache, de modo que as linhas sempre casam com as colunas.
+EXTRACTION_METHODS = ('padrao', 'alternativo', 'hierarquico', 'hierarquico_filtrado', 'hierarquico_comentarios')
+
+def resolve_method(method: str) -> str:
+    return method if method in EXTRACTION_METHODS else 'padrao'
 
-    parser = None
-    colunas = []
+def is_known_method(method: str) -> bool:
+    return method in EXTRACTION_METHODS
 
-    # Roteamento Inteligente
+def _create_parser(docx_source: DocxSource, nome_arquivo: str, method: str) -> DocxEventParser:
+    method = resolve_method(method)
     if method == 'alternativo':
-        parser = DocxParserParagraph(docx_path, nome_arquivo)
-        colunas = ['Nome_arquivo', 'Index_p', 'tipo_secao', 'Texto_Original', 'Texto_Final', 'Log_Intervencoes']
-    
-    # Agrupa M3, M4 e M5 (mesma estrutura de colunas)
-    elif method.startswith('hierarquico'):
-        colunas = ['Nome_arquivo', 'Index_p', 'tipo_secao', 'texto', 'tipo', 'posicao', 'comentario', 'nome_usuario', 'data_hora']
-        
-        if method == 'hierarquico_filtrado':
-            parser = DocxParserHierarchicalFiltered(docx_path, nome_arquivo)
-        elif method == 'hierarquico_comentarios':
-            parser = DocxParserHierarchicalCommentsOnly(docx_path, nome_arquivo)
-        else:
-            parser = DocxParserHierarchical(docx_path, nome_arquivo)
-    
-    else: # Padrão
-        parser = DocxParserStandard(docx_path, nome_arquivo)
-        colunas = ['Nome_arquivo', 'Index_p', 'tipo_secao', 'trecho_texto_orig', 'trecho_texto_modificado', 
-                   'trecho_comentado', 'comentario', 'tipo', 'nome_usuario', 'data_hora']
+        return DocxParserParagraph(docx_source, nome_arquivo)
+    elif method == 'hierarquico_filtrado':
+        return DocxParserHierarchicalFiltered(docx_source, nome_arquivo)
+    elif method == 'hierarquico_comentarios':
+        return DocxParserHierarchicalCommentsOnly(docx_source, nome_arquivo)
+    elif method == 'hierarquico':
+        return DocxParserHierarchical(docx_source, nome_arquivo)
+    else:
+        return DocxParserStandard(docx_source, nome_arquivo)
+
+# Colunas do CSV de cada método (mesma ordem das chaves das linhas)
+CSV_COLUMNS = {
+    'padrao': ['Nome_arquivo', 'Index_p', 'tipo_secao', 'trecho_texto_orig', 'trecho_texto_modificado',
+               'trecho_comentado', 'comentario', 'tipo', 'nome_usuario', 'data_hora'],
+    'alternativo': ['Nome_arquivo', 'Index_p', 'tipo_secao', 'Texto_Original', 'Texto_Final', 'Log_Intervencoes'],
+    # M3, M4 e M5 têm a mesma estrutura de colunas
+    'hierarquico': ['Nome_arquivo', 'Index_p', 'tipo_secao', 'texto', 'tipo', 'posicao', 'comentario', 'nome_usuario', 'data_hora'],
+}
 
+def get_csv_columns(method: str) -> List[str]:
+    method = resolve_method(method)
+    if method == 'alternativo':
+        return CSV_COLUMNS['alternativo']
+    if method.startswith('hierarquico'):
+        return CSV_COLUMNS['hierarquico']
+    return CSV_COLUMNS['padrao']
+
+def extract_comments_and_track_changes(docx_source: DocxSource, csv_path: str, nome_arquivo: Optional[str] = None, method: str = 'padrao'):
+    is_path = isinstance(docx_source, (str, os.PathLike))
+    if is_path and not os.path.exists(docx_source): return
+    if nome_arquivo is None:
+        nome_arquivo = os.path.basename(docx_source if is_path else getattr(docx_source, 'name', 'documento.docx'))
+
+    # Roteamento Inteligente: variantes desconhecidas de 'hierarquico' usam o M3
+    parser_method = method
+    if method.startswith('hierarquico') and method not in ('hierarquico_filtrado', 'hierarquico_comentarios'):
+        parser_method = 'hierarquico'
+
+    colunas = get_csv_columns(parser_method)
+    parser = _create_parser(docx_source, nome_arquivo, parser_method)
     parser.process()
     rows = parser.get_rows()
 
@@ -674,18 +769,12 @@ def extract_comments_and_track_changes(docx_path: str, csv_path: str, nome_arqui
     except Exception as e:
         print(f"Erro ao salvar CSV: {e}")
 
-# Helper de memória atualizado
-def get_parser_rows(docx_path: str, nome_arquivo: str, method: str = 'padrao') -> List[Dict]:
-    if method == 'alternativo': 
-        parser = DocxParserParagraph(docx_path, nome_arquivo)
-    elif method == 'hierarquico_filtrado': 
-        parser = DocxParserHierarchicalFiltered(docx_path, nome_arquivo)
-    elif method == 'hierarquico_comentarios':
-        parser = DocxParserHierarchicalCommentsOnly(docx_path, nome_arquivo)
-    elif method == 'hierarquico': 
-        parser = DocxParserHierarchical(docx_path, nome_arquivo)
-    else: 
-        parser = DocxParserStandard(docx_path, nome_arquivo)
-    
+# Helper de memória atualizado: aceita caminho, bytes ou arquivo aberto (sem passar pelo disco)
+def get_parser_rows(docx_source: DocxSource, nome_arquivo: str, method: str = 'padrao') -> List[Dict]:
+    parser = _create_parser(docx_source, nome_arquivo, method)
     parser.process()
-    return parser.get_rows()
\ No newline at end of file
+    return parser.get_rows()
+
+def iter_parser_rows(docx_source: DocxSource, nome_arquivo: str, method: str = 'padrao') -> Iterator[Dict]:
+    """Versão em streaming de get_parser_rows: mesmas linhas, liberadas parte a parte."""
+    return _create_parser(docx_source, nome_arquivo, method).iter_rows()
@@ -0,0 +1,163 @@
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import List, Dict, Optional
+
+from app.core.config import settings
+from app.analysis import extract_changes_csv
+from app.analysis.extract_changes_csv import DocxSource, get_parser_rows, resolve_method
+
+# Cache persistente das linhas extraídas (get_parser_rows), para uploads repetidos do mesmo DOCX.
+# Chave: SHA-256 do arquivo + método + versão do parser. A versão é o hash do código-fonte de
+# extract_changes_csv.py: qualquer alteração no parser invalida o cache sozinha. As linhas são
+# gravadas sem depender do nome do upload; Nome_arquivo é reescrito na leitura.
+#
+# A raiz pode ser compartilhada por workers/deploys com versões diferentes do parser ao mesmo
+# tempo, então a limpeza só apaga pastas de outras versões paradas há mais de
+# EXTRACTION_CACHE_PRUNE_DAYS (0 desliga). Cada processo marca a pasta da própria versão como
+# em uso (mtime) ao ler ou gravar, no máximo uma vez por TOUCH_INTERVAL_SECONDS.
+
+DEFAULT_CACHE_DIR = Path(__file__).parent.parent.parent / "data" / "cache" / "extraction"
+TOUCH_INTERVAL_SECONDS = 3600
+
+
+def _parser_version() -> str:
+    with open(extract_changes_csv.__file__, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+
+PARSER_VERSION = _parser_version()
+
+
+class ExtractionCache:
+    """Uma entrada por arquivo gzip/JSON em <raiz>/<versão>/<método>/<sha256>.json.gz."""
+
+    def __init__(self, root: Path, version: str = PARSER_VERSION, prune_days: int = 7):
+        self.root = Path(root)
+        self.version = version
+        self.base = self.root / version
+        self.prune_days = prune_days
+        self._pruned = False
+        self._last_touch = 0.0
+        self._lock = threading.Lock()
+
+    def _path(self, file_hash: str, method: str) -> Path:
+        return self.base / method / f"{file_hash}.json.gz"
+
+    def _touch(self) -> None:
+        now = time.time()
+        if now - self._last_touch < TOUCH_INTERVAL_SECONDS:
+            return
+        self._last_touch = now
+        try:
+            os.utime(self.base)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _last_used(version_dir: Path) -> float:
+        # Pasta da versão e subpastas de método: gravar uma entrada atualiza o mtime da subpasta
+        mtimes = [version_dir.stat().st_mtime]
+        for entry in version_dir.iterdir():
+            if entry.is_dir():
+                mtimes.append(entry.stat().st_mtime)
+        return max(mtimes)
+
+    def _prune_old_versions(self) -> None:
+        with self._lock:
+            if self._pruned:
+                return
+            self._pruned = True
+        if self.prune_days <= 0 or not self.root.is_dir():
+            return
+        cutoff = time.time() - self.prune_days * 86400
+        for entry in self.root.iterdir():
+            if not entry.is_dir() or entry.name == self.version:
+                continue
+            try:
+                if self._last_used(entry) >= cutoff:
+                    continue
+            except OSError:
+                continue
+            print(f"[CACHE EXTRAÇÃO] Removendo versão sem uso há mais de {self.prune_days} dias: {entry.name}", flush=True)
+            shutil.rmtree(entry, ignore_errors=True)
+
+    def get(self, file_hash: str, method: str) -> Optional[List[Dict]]:
+        path = self._path(file_hash, method)
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                rows = json.load(f)
+            self._touch()
+            return rows
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            # Entrada corrompida (ex.: gravação interrompida): descarta e extrai de novo.
+            path.unlink(missing_ok=True)
+            return None
+
+    def put(self, file_hash: str, method: str, rows: List[Dict]) -> None:
+        self._prune_old_versions()
+        path = self._path(file_hash, method)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Grava em arquivo temporário e renomeia: leitores (outros processos do pool) nunca
+        # veem uma entrada pela metade.
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as raw, gzip.open(raw, 'wt', encoding='utf-8', compresslevel=1) as f:
+                json.dump(rows, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+        self._touch()
+
+    def clear(self) -> None:
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+extraction_cache = ExtractionCache(
+    Path(settings.EXTRACTION_CACHE_DIR or DEFAULT_CACHE_DIR),
+    prune_days=settings.EXTRACTION_CACHE_PRUNE_DAYS,
+)
+
+
+def _read_bytes(docx_source: DocxSource) -> bytes:
+    if isinstance(docx_source, (bytes, bytearray)):
+        return bytes(docx_source)
+    if isinstance(docx_source, (str, os.PathLike)):
+        with open(docx_source, 'rb') as f:
+            return f.read()
+    docx_source.seek(0)
+    content = docx_source.read()
+    docx_source.seek(0)
+    return content
+
+
+def get_cached_parser_rows(docx_source: DocxSource, nome_arquivo: str, method: str = 'padrao') -> List[Dict]:
+    """get_parser_rows com cache persistente (desligado por EXTRACTION_CACHE_ENABLED=false)."""
+    if not settings.EXTRACTION_CACHE_ENABLED:
+        return get_parser_rows(docx_source, nome_arquivo, method=method)
+
+    content = _read_bytes(docx_source)
+    file_hash = hashlib.sha256(content).hexdigest()
+    # Mesmo roteamento de get_parser_rows: variantes de um método compartilham a entrada
+    cache_method = resolve_method(method)
+    rows = extraction_cache.get(file_hash, cache_method)
+    if rows is None:
+        rows = get_parser_rows(content, nome_arquivo, method=method)
+        try:
+            extraction_cache.put(file_hash, cache_method, rows)
+        except OSError as e:
+            print(f"[CACHE EXTRAÇÃO] Falha ao gravar entrada: {e}", flush=True)
+        return rows
+
+    for row in rows:
+        row['Nome_arquivo'] = nome_arquivo
+    return rows
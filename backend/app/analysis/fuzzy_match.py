@@ -0,0 +1,99 @@
+from collections import defaultdict
+from difflib import SequenceMatcher
+from typing import Dict, List, NamedTuple, Optional
+
+# Localizador aproximado de trechos baseado em indice de n-gramas de caracteres.
+# Substitui o SequenceMatcher.find_longest_match (quadratico no tamanho do paragrafo)
+# mantendo a mesma resposta: o maior bloco comum entre paragrafo e trecho, desde que
+# tenha pelo menos `min_size` caracteres.
+#
+# Ideia: todo bloco comum com tamanho >= min_size contem um n-grama do trecho que
+# comeca em uma posicao multipla de `step = min_size - QGRAM_SIZE + 1`. Basta consultar
+# esses poucos n-gramas no indice do paragrafo e estender cada diagonal candidata.
+
+QGRAM_SIZE = 4
+MAX_CANDIDATE_DIAGONALS = 256
+
+
+class Block(NamedTuple):
+    a: int
+    b: int
+    size: int
+
+
+class QGramIndex:
+    """Posicoes de cada n-grama de um texto; construido uma vez por paragrafo."""
+    __slots__ = ('text', 'q', 'positions')
+
+    def __init__(self, text: str, q: int = QGRAM_SIZE):
+        self.text = text
+        self.q = q
+        positions: Dict[str, List[int]] = defaultdict(list)
+        for i in range(len(text) - q + 1):
+            positions[text[i:i + q]].append(i)
+        self.positions = positions
+
+
+def _sequence_matcher_block(text: str, pattern: str) -> Block:
+    match = SequenceMatcher(None, text, pattern, autojunk=False).find_longest_match(0, len(text), 0, len(pattern))
+    return Block(match.a, match.b, match.size)
+
+
+def find_longest_block(
+    text: str,
+    pattern: str,
+    min_size: int,
+    index: Optional[QGramIndex] = None,
+    max_candidates: int = MAX_CANDIDATE_DIAGONALS,
+) -> Optional[Block]:
+    """Maior bloco comum entre `text` e `pattern` com tamanho >= min_size (ou None).
+
+    Empates seguem o SequenceMatcher: menor posicao em `text`, depois em `pattern`.
+    O numero de diagonais verificadas e limitado por `max_candidates`.
+    """
+    if not text or not pattern or min_size > len(pattern) or min_size > len(text):
+        return None
+
+    q = index.q if index is not None else QGRAM_SIZE
+    if min_size < q:
+        # Trechos muito curtos: o SequenceMatcher e barato e evita n-gramas degenerados.
+        block = _sequence_matcher_block(text, pattern)
+        return block if block.size >= min_size else None
+
+    if index is None or index.text != text:
+        index = QGramIndex(text, q)
+
+    step = min_size - q + 1
+    hits: Dict[int, int] = defaultdict(int)
+    for j in range(0, len(pattern) - q + 1, step):
+        for i in index.positions.get(pattern[j:j + q], ()):
+            diagonal = i - j
+            hits[diagonal] += 1
+
+    if not hits:
+        return None
+
+    # Verificacao limitada: diagonais com mais sementes primeiro.
+    candidates = sorted(hits, key=lambda d: (-hits[d], d))[:max_candidates]
+
+    best: Optional[Block] = None
+    len_text, len_pattern = len(text), len(pattern)
+    for diagonal in candidates:
+        j_start = max(0, -diagonal)
+        j_end = min(len_pattern, len_text - diagonal)
+        # Percorre a diagonal inteira dentro dos limites (custo linear no trecho).
+        run_start = None
+        for j in range(j_start, j_end + 1):
+            if j < j_end and text[j + diagonal] == pattern[j]:
+                if run_start is None:
+                    run_start = j
+                continue
+            if run_start is not None:
+                size = j - run_start
+                if size >= min_size:
+                    block = Block(run_start + diagonal, run_start, size)
+                    if best is None or (block.size, -block.a, -block.b) > (best.size, -best.a, -best.b):
+                        best = block
+                run_start = None
+
+    return best
@@ -2,8 +2,8 @@ import io
 import datetime
 import re
 from docx import Document
-from app.analysis.doc_parser import segment_document
-from app.analysis.doc_parser import get_paragraph_raw_text, normalize_visible_text
+from app.analysis.segment_cache import get_cached_segments
+from app.analysis.doc_parser import normalize_visible_text, whole_document_segment
 from app.analysis.llm_provider import get_chat_llm
 from app.analysis.prompts import get_clause_analysis_prompt, format_rules_prompt, get_rule_name_by_id
 from app.analysis.docx_comments import add_error_comments_to_docx
@@ -12,7 +12,6 @@ from app.services.storage import AbstractStorage
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 from typing import List, Dict, Optional, Set
-from docx.text.paragraph import Paragraph
 
 PLACEHOLDER_QUOTE_RE = re.compile(r"'([^']+)'")
 PLACEHOLDER_FALLBACK_RE = re.compile(
@@ -64,6 +63,7 @@ async def run_analysis_pipeline(
     skip_segmentation: bool = False,
     llm_deployment_override: Optional[str] = None,
     llm_temperature_override: Optional[float] = None,
+    segmentation_strategy: Optional[str] = None,
 ) -> tuple[bytes, RelatorioAnaliseJSON]:
     
     # Carrega documento e regras
@@ -97,14 +97,15 @@ async def run_analysis_pipeline(
     
     # Permite pular a segmentação e analisar o documento inteiro como um único bloco
     if skip_segmentation:
-        segmented_clauses = [("Documento inteiro", list(doc.paragraphs))]
+        segmented_clauses = [whole_document_segment(doc)]
     else:
-        segmented_clauses = segment_document(doc)
+        segmented_clauses = get_cached_segments(file_content, doc, strategy=segmentation_strategy)
 
     if parser_only:
-        for i, (title, paragraphs) in enumerate(segmented_clauses):
+        for i, segment in enumerate(segmented_clauses):
             clausula_id = f"item_{i}"
-            full_text = "\n".join([get_paragraph_raw_text(p) for p in paragraphs])
+            title = segment.title
+            full_text = segment.text
             analise_obj = AnaliseClausula(
                 id_clausula=clausula_id,
                 titulo=title,
@@ -141,9 +142,10 @@ async def run_analysis_pipeline(
     # Coletar erros e conformidades por regra
     conformidades = {}
     erros_encontrados_ids = set()
-    for i, (title, paragraphs) in enumerate(segmented_clauses):
+    for i, segment in enumerate(segmented_clauses):
         clausula_id = f"item_{i}"
-        full_text = "\n".join([get_paragraph_raw_text(p) for p in paragraphs])
+        title = segment.title
+        full_text = segment.text
         analise_obj = AnaliseClausula(id_clausula=clausula_id, titulo=title, texto_original=full_text, erros_encontrados=[])
 
         regras_ja_analisadas = set()
@@ -262,7 +264,7 @@ async def run_analysis_pipeline(
                 
 
     # 5. Aplica comentários
-    docx_content = add_error_comments_to_docx(file_content, errors_by_clause)
+    docx_content = add_error_comments_to_docx(file_content, errors_by_clause, segmentation_strategy=segmentation_strategy)
 
     # 5.1 Propaga trecho_marcado (preenchido em errors_by_clause) para os objetos ErroContratual
     for clausula in report.clausulas:
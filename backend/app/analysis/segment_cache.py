@@ -0,0 +1,86 @@
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from docx import Document
+
+from app.analysis.doc_parser import Segment, build_segments, get_segmentation_strategy
+from app.core.config import settings
+
+# Cache de segmentação por documento: evita re-segmentar o mesmo DOCX a cada execução do playground.
+# A chave é o SHA-256 dos bytes do arquivo somado às configurações de segmentação (estratégia).
+
+
+def document_hash(file_content: bytes) -> str:
+    return hashlib.sha256(file_content).hexdigest()
+
+
+def _cache_key(file_hash: str, mode: str) -> tuple[str, str]:
+    return file_hash, mode
+
+
+class SegmentCache:
+    """LRU em memória com a forma compacta (título, índices, textos) de cada segmentação."""
+
+    def __init__(self, max_entries: int = 32):
+        self.max_entries = max(1, max_entries)
+        self._entries: OrderedDict[tuple[str, str], tuple[Segment, ...]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, file_hash: str, mode: str) -> Optional[tuple[Segment, ...]]:
+        key = _cache_key(file_hash, mode)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, file_hash: str, segments: tuple[Segment, ...], mode: str) -> None:
+        key = _cache_key(file_hash, mode)
+        with self._lock:
+            self._entries[key] = segments
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+segment_cache = SegmentCache(settings.SEGMENT_CACHE_MAX_ENTRIES)
+
+
+def get_cached_segments(
+    file_content: bytes,
+    doc: Optional[Document] = None,
+    strategy: Optional[str] = None,
+) -> tuple[Segment, ...]:
+    """Retorna os Segments do arquivo, segmentando apenas no primeiro acesso."""
+    strategy_obj = get_segmentation_strategy(strategy or settings.SEGMENTATION_STRATEGY)
+    file_hash = document_hash(file_content)
+    cached = segment_cache.get(file_hash, strategy_obj.name)
+    if cached is not None:
+        return cached
+    if doc is None:
+        doc = Document(io.BytesIO(file_content))
+    segments = tuple(build_segments(doc, strategy_obj))
+    segment_cache.put(file_hash, segments, strategy_obj.name)
+    return segments
+
+
+def get_segment_preview(file_content: bytes, preview_len: int = 160, strategy: Optional[str] = None) -> list[dict]:
+    preview = []
+    for i, segment in enumerate(get_cached_segments(file_content, strategy=strategy)):
+        preview.append({
+            "indice": i,
+            "id_clausula": f"item_{i}",
+            "titulo": segment.title,
+            "num_paragrafos": len(segment),
+            "num_caracteres": len(segment.text),
+            "tokens_estimados": segment.token_estimate,
+            "trecho_inicial": segment.text[:preview_len],
+        })
+    return preview
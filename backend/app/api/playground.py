@@ -3,8 +3,10 @@ from fastapi import APIRouter, Request, File, UploadFile, Form, HTTPException
 from fastapi.responses import HTMLResponse, JSONResponse, FileResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from app.core.config import settings
-from app.services.storage import LocalFileStorage
+from app.services.storage import LocalFileStorage, LOCAL_PROCESSED_PATH
 from app.analysis.orchestrator import run_analysis_pipeline
+from app.analysis.segment_cache import get_segment_preview
+from app.analysis.doc_parser import get_segmentation_strategy
 from app.analysis.prompts import (
     get_default_system_intro,
     SYSTEM_SUFFIX_TEMPLATE,
@@ -12,17 +14,21 @@ from app.analysis.prompts import (
 )
 from app.models.pydantic_models import ListaDeErros
 from langchain_core.output_parsers import JsonOutputParser
+import asyncio
 import io
 import json
 import uuid
 import os
 import csv
 import tempfile
+import time
 import traceback
-from typing import Any
+from typing import Any, Callable, Optional
 
 # Importa a função helper e o wrapper
 from app.analysis.extract_changes_csv import get_parser_rows, extract_comments_and_track_changes
+from app.services.extraction_pool import FileExtraction, extract_files, merge_rows, log_extractions
+from app.services.change_export import EXPORT_FORMATS, iter_export
 
 from app.analysis.reverse_prompting import reverse_prompting_loop, META_PROMPT_DEFAULT, RED_TEAM_SYSTEM_PROMPT
 
@@ -116,6 +122,19 @@ async def process_reverse_prompting(
 
 # --- ROTAS CONVERSOR CSV (ATUALIZADA) ---
 
+async def _extrair_uploads(files: list[UploadFile], method: str, tag: str) -> list[FileExtraction]:
+    """Extrai as linhas de todos os uploads em paralelo (ordem de envio), direto dos bytes."""
+    jobs = []
+    for file in files:
+        file_content = await file.read()
+        safe_filename = file.filename or f"arquivo_{uuid.uuid4()}.docx"
+        jobs.append((file_content, safe_filename))
+
+    start = time.perf_counter()
+    extracoes = await extract_files(jobs, method=method)
+    log_extractions(tag, extracoes, (time.perf_counter() - start) * 1000)
+    return extracoes
+
 @router.post("/processar_csv_preview")
 async def processar_csv_preview(
     files: list[UploadFile] = File(...),
@@ -126,33 +145,100 @@ async def processar_csv_preview(
     Aceita 'padrao' ou 'alternativo'.
     """
     try:
-        all_rows = []
-        with tempfile.TemporaryDirectory() as temp_dir:
-            for file in files:
-                file_content = await file.read()
-                safe_filename = file.filename or f"arquivo_{uuid.uuid4()}.docx"
-                temp_docx = os.path.join(temp_dir, safe_filename)
-                with open(temp_docx, "wb") as f:
-                    f.write(file_content)
-                
-                # Usa a factory para pegar os dados
-                rows = get_parser_rows(temp_docx, safe_filename, method=extraction_method)
-                all_rows.extend(rows)
-
-        return JSONResponse(content={"rows": all_rows})
+        extracoes = await _extrair_uploads(files, extraction_method, "CSV")
+
+        # Falha de um arquivo não descarta os demais; o resumo por arquivo vai junto das linhas.
+        arquivos = [e.resumo() for e in extracoes]
+        if extracoes and all(e.erro for e in extracoes):
+            erros = "; ".join(f"{e.arquivo}: {e.erro}" for e in extracoes)
+            return JSONResponse(content={"erro": erros, "arquivos": arquivos}, status_code=500)
+
+        return JSONResponse(content={"rows": merge_rows(extracoes), "arquivos": arquivos})
 
     except Exception as e:
         traceback.print_exc()
         return JSONResponse(content={"erro": str(e)}, status_code=500)
 
 # --- ROTAS LEGADO / ANALISADOR (MANTIDAS) ---
+def _streaming_export(sources: list, extraction_method: str, formato: str, nome_base: str) -> StreamingResponse:
+    formato = (formato or "csv").strip().lower()
+    if formato not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Formato inválido '{formato}'. Use: {', '.join(EXPORT_FORMATS)}")
+    media_type, extensao = EXPORT_FORMATS[formato]
+    try:
+        # Valida o método antes de a resposta começar (depois do 200, só restaria cortar o download).
+        body = iter_export(sources, extraction_method, formato)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Gerador síncrono: o Starlette o consome em threadpool, sem travar o event loop.
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={nome_base}{extensao}"},
+    )
+
 @router.post("/exportar_csv")
-async def exportar_csv(file: UploadFile = File(None), nome_docx_validado: str = Form("")):
-    pass 
+async def exportar_csv(
+    file: UploadFile = File(None),
+    nome_docx_validado: str = Form(""),
+    validado: bool = Form(False),
+    extraction_method: str = Form("padrao"),
+    formato: str = Form("csv"),
+):
+    """
+    Exporta em streaming (CSV ou NDJSON) as alterações/comentários de um DOCX.
+    Com `nome_docx_validado` ou `validado`, usa o DOCX comentado gravado por /analisar.
+    """
+    source = None
+    safe_filename = file.filename if file is not None and file.filename else "documento.docx"
+    if nome_docx_validado.strip():
+        safe_filename = os.path.basename(nome_docx_validado.strip())
+    elif validado and file is not None:
+        name, ext = os.path.splitext(safe_filename)
+        safe_filename = f"{name}_validado{ext}"
+
+    validado_path = LOCAL_PROCESSED_PATH / safe_filename
+    if (nome_docx_validado.strip() or validado) and validado_path.exists():
+        source = str(validado_path)
+    elif file is not None:
+        # O UploadFile é fechado antes do corpo do StreamingResponse ser enviado: lê os bytes aqui.
+        source = await file.read()
+    if source is None:
+        raise HTTPException(status_code=400, detail="Envie um arquivo .docx ou o nome de um DOCX validado.")
+
+    nome_base = f"{os.path.splitext(safe_filename)[0]}_alteracoes"
+    return _streaming_export([(source, safe_filename)], extraction_method, formato, nome_base)
 
 @router.post("/exportar_csv_unificado")
-async def exportar_csv_unificado(files: list[UploadFile] = File(...)):
-    pass
+async def exportar_csv_unificado(
+    files: list[UploadFile] = File(...),
+    extraction_method: str = Form("padrao"),
+    formato: str = Form("csv"),
+):
+    """Exporta em um único CSV/NDJSON (streaming) as linhas de todos os arquivos, na ordem de envio."""
+    sources = []
+    for file in files:
+        sources.append((await file.read(), file.filename or f"arquivo_{uuid.uuid4()}.docx"))
+    return _streaming_export(sources, extraction_method, formato, "relatorio_alteracoes_unificado")
+
+@router.post("/segmentos", response_class=JSONResponse)
+async def playground_segmentos(
+    file: UploadFile = File(...),
+    estrategia_segmentacao: str = Form(""),
+):
+    """
+    Retorna a lista de segmentos (cláusulas) do documento sem executar o pipeline.
+    Os índices retornados são os mesmos aceitos em `clausulas_alvo` de /analisar.
+    """
+    try:
+        file_content = await file.read()
+        segmentos = get_segment_preview(file_content, strategy=(estrategia_segmentacao.strip() or None))
+        return JSONResponse(content={"segmentos": segmentos, "total": len(segmentos)})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/analisar")
 async def playground_analisar(
@@ -166,7 +252,15 @@ async def playground_analisar(
     pular_segmentador: bool = Form(False),
     llm_deployment_override: str = Form(""),
     llm_temperature_override: str = Form(""),
+    estrategia_segmentacao: str = Form(""),
 ):
+    # Estratégia desconhecida é erro do cliente: valida antes do pipeline, como em /segmentos.
+    estrategia_segmentacao = estrategia_segmentacao.strip() or None
+    try:
+        get_segmentation_strategy(estrategia_segmentacao or settings.SEGMENTATION_STRATEGY)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     # (Mantendo a implementação original completa aqui...)
     try:
         file_content = await file.read()
@@ -199,6 +293,7 @@ async def playground_analisar(
             skip_segmentation=pular_segmentador,
             llm_deployment_override=(llm_deployment_override.strip() or None),
             llm_temperature_override=(float(llm_temperature_override) if llm_temperature_override.strip() != "" else None),
+            segmentation_strategy=estrategia_segmentacao,
         )
         
         safe_filename = file.filename or "arquivo.docx"
@@ -235,9 +330,17 @@ import shutil
 import tempfile
 import traceback
 import uuid
-from langchain_community.vectorstores import Chroma
-from langchain_openai import AzureOpenAIEmbeddings
-from pydantic import SecretStr
+import chromadb
+from app.services.embeddings import EMBEDDING_DEPLOYMENT, get_embeddings
+from app.services.embedding_pipeline import (
+    CHROMA_COLLECTION_NAME,
+    EmbeddingPipelineError,
+    embed_into_collection,
+    vectorization_job_dir,
+)
+from app.services.rag_index_registry import rag_index_registry
+from app.services.similarity import VectorScorer, cosine_scores
+from app.services.lexical_index import BM25Index, search
 
 # ... (outras rotas) ...
 
@@ -254,21 +357,11 @@ async def processar_vetorizar_json(
         extraction_method = "hierarquico_filtrado"
 
     print(f"\n🚀 [VETORIZAÇÃO] Iniciando (Método: {extraction_method})...", flush=True)
-    temp_vector_dir = None
 
     try:
         # 1. Extração linha-a-linha com o parser existente
-        all_rows = []
-        with tempfile.TemporaryDirectory() as temp_input_dir:
-            for file in files:
-                file_content = await file.read()
-                safe_filename = file.filename or f"arquivo_{uuid.uuid4()}.docx"
-                temp_docx = os.path.join(temp_input_dir, safe_filename)
-                with open(temp_docx, "wb") as f:
-                    f.write(file_content)
-
-                rows = get_parser_rows(temp_docx, safe_filename, method=extraction_method)
-                all_rows.extend(rows)
+        extracoes = await _extrair_uploads(files, extraction_method, "VETORIZAÇÃO")
+        all_rows = merge_rows(extracoes)
 
         if not all_rows:
             return JSONResponse(content={"erro": "Nenhum dado encontrado para vetorizar."}, status_code=400)
@@ -343,24 +436,32 @@ async def processar_vetorizar_json(
         # 4. Vetorização com Chroma, igual ao ingest_examples.py
         print(f"⚛️ [VETORIZAÇÃO] Gerando embeddings para {len(texts)} chunks...", flush=True)
 
-        temp_vector_dir = tempfile.mkdtemp()
-        vector_db_path = os.path.join(temp_vector_dir, "chroma_db_output")
+        # A coleção fica em uma pasta por (modelo, textos) que só é apagada depois do download:
+        # se um lote falhar, reenviar os mesmos arquivos retoma dos textos já gravados nela.
+        vector_db_path = str(vectorization_job_dir(EMBEDDING_DEPLOYMENT, texts))
+        ids = [f"p{i}" for i in range(len(texts))]
 
-        embeddings = AzureOpenAIEmbeddings(
-            azure_endpoint=settings.OPENAI_API_BASE,
-            api_key=SecretStr(settings.OPENAI_API_KEY or ""),
-            api_version=settings.OPENAI_API_VERSION,
-            azure_deployment="text-embedding-ada-002",
-        )
+        embeddings = get_embeddings()
 
-        vectorstore = Chroma.from_texts(
-            texts=texts,
-            embedding=embeddings,
-            metadatas=metadatas,
-            persist_directory=vector_db_path,
-        )
-
-        vectorstore = None
+        # Lotes concorrentes com nova tentativa, gravados na coleção à medida que ficam prontos
+        # (EMBEDDING_BATCH_SIZE / EMBEDDING_MAX_CONCURRENCY / EMBEDDING_MAX_RETRIES).
+        client = chromadb.PersistentClient(path=vector_db_path)
+        try:
+            collection = client.get_or_create_collection(CHROMA_COLLECTION_NAME, embedding_function=None)
+            progresso = await embed_into_collection(collection, texts, metadatas, embeddings, ids=ids)
+        except EmbeddingPipelineError as e:
+            print(f"❌ [VETORIZAÇÃO] {e}", flush=True)
+            return JSONResponse(
+                content={
+                    "erro": f"Falha ao gerar embeddings: {e}. Reenvie os mesmos arquivos para retomar: "
+                            f"os {e.progress.textos_gravados} textos já gravados não são embutidos de novo.",
+                    "progresso": e.progress.resumo(),
+                },
+                status_code=502,
+            )
+        finally:
+            client.close()
+        print(f"⚛️ [VETORIZAÇÃO] {progresso.resumo()}", flush=True)
 
         sqlite_file = os.path.join(vector_db_path, "chroma.sqlite3")
 
@@ -372,6 +473,8 @@ async def processar_vetorizar_json(
         final_sqlite_path = os.path.join(safe_output_dir, "chroma.sqlite3")
         shutil.copy2(sqlite_file, final_sqlite_path)
 
+        shutil.rmtree(vector_db_path, ignore_errors=True)
+
         size_kb = os.path.getsize(final_sqlite_path) / 1024
         print(f"✅ [SUCESSO] SQLite Gerado: {size_kb:.2f} KB", flush=True)
 
@@ -385,20 +488,132 @@ async def processar_vetorizar_json(
         traceback.print_exc()
         return JSONResponse(content={"erro": f"Erro interno: {str(e)}"}, status_code=500)
 
-    finally:
-        if temp_vector_dir and os.path.exists(temp_vector_dir):
+
+# Modos de busca do /rag-context: denso (embeddings), lexico (BM25 local, sem provedor) e
+# hibrido (BM25 + cosseno; cai para o lexical se os embeddings não estiverem disponíveis).
+MODOS_BUSCA = {
+    "denso": "denso",
+    "lexico": "lexico",
+    "léxico": "lexico",
+    "hibrido": "hibrido",
+    "híbrido": "hibrido",
+}
+
+
+def _normalizar_modo_busca(modo_busca: str) -> str:
+    modo = MODOS_BUSCA.get((modo_busca or "").strip().lower())
+    if modo is None:
+        print(f"[RAG] Modo de busca inválido '{modo_busca}', usando 'denso'", flush=True)
+        return "denso"
+    return modo
+
+
+def _buscar_no_indice(
+    index_id: str, query_text: str, k: int, modo_busca: str = "denso"
+) -> tuple[list[dict], list[dict]]:
+    """Busca em um índice registrado; retorna (contexto_rag, logs)."""
+    if modo_busca != "denso":
+        # BM25 (e, no híbrido, a matriz de vetores) sobre todos os parágrafos do índice,
+        # montados uma vez por abertura do índice.
+        corpus = rag_index_registry.corpus(index_id)
+        denso_fn = None
+        if modo_busca == "hibrido":
+            def denso_fn():
+                query_vec = get_embeddings().embed_query(query_text)
+                return rag_index_registry.corpus(index_id, with_vectors=True).dense.scores(query_vec)
+        ranked = search(corpus.lexical, query_text, k, denso_fn, settings.RAG_HYBRID_ALPHA)
+        resultados = [(corpus.documents[i], corpus.metadatas[i], score) for i, score in ranked]
+    else:
+        # A query é embutida uma única vez; os vetores dos documentos vêm do próprio índice
+        # (include=["embeddings"]), sem nova chamada ao provedor.
+        query_vec = get_embeddings().embed_query(query_text)
+        with rag_index_registry.open(index_id) as vectorstore:
+            # No caminho .sqlite3, o índice já reflete o método de extração
+            # escolhido no conversor (3, 4 ou 5). Aqui não aplicamos nenhum
+            # filtro adicional de "só cláusulas comentadas"; apenas fazemos a
+            # busca semântica direta nos vetores persistidos.
+            results = vectorstore._collection.query(
+                query_embeddings=[query_vec],
+                n_results=k,
+                include=["embeddings", "documents", "metadatas"],
+            )
+
+        # Uma única query: cada campo é uma lista com um elemento
+        documents = results["documents"][0]
+        if not documents:
+            return [], []
+
+        # Para manter a MESMA escala de similaridade do caminho DOCX,
+        # ignoramos o score bruto retornado pelo Chroma (distância L2)
+        # e calculamos o cosseno entre a query e os vetores armazenados.
+        sims = cosine_scores(query_vec, results["embeddings"][0])
+        resultados = list(zip(documents, results["metadatas"][0], sims))
+
+    contexto_lista: list[dict] = []
+    logs: list[dict] = []
+
+    for idx, (page_content, meta, score) in enumerate(resultados, start=1):
+        meta = meta or {}
+        raw_paragrafo = meta.get("raw_paragrafo")
+
+        par_dict: dict[str, Any] = {}
+        if isinstance(raw_paragrafo, str):
             try:
-                shutil.rmtree(temp_vector_dir)
+                par_dict = json.loads(raw_paragrafo)
             except Exception:
-                pass
+                par_dict = {}
+        elif isinstance(raw_paragrafo, dict):
+            par_dict = raw_paragrafo
+
+        row = {
+            "nome_arquivo": meta.get("nome_arquivo", ""),
+            "index_p": par_dict.get("index_p"),
+            "tipo_secao": par_dict.get("tipo_secao"),
+            "texto": par_dict.get("texto_original") or page_content,
+            "alteracoes": par_dict.get("alteracoes") or [],
+        }
+
+        # Denso: mesma fórmula do caminho DOCX (cosine_similarity(query, doc) * 100.0).
+        # Léxico/híbrido: score relativo ao melhor resultado (0..1) * 100.0.
+        row["similaridade_percentual"] = score * 100.0
+
+        contexto_lista.append(row)
+        logs.append({"numero": idx, "json": row})
+
+    return contexto_lista, logs
+
+
+# --- ÍNDICES RAG PERSISTENTES (.sqlite3 enviado uma vez, consultado por index_id) ---
+@router.post("/rag-index", response_class=JSONResponse)
+async def registrar_indice_rag(file: UploadFile = File(...)):
+    try:
+        index_id, criado = rag_index_registry.register(await file.read())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    print(f"[RAG ÍNDICE] {index_id[:12]} {'registrado' if criado else 'já existente'} ({file.filename})", flush=True)
+    return JSONResponse(content={"index_id": index_id, "novo": criado})
+
+
+@router.get("/rag-index", response_class=JSONResponse)
+async def listar_indices_rag():
+    return JSONResponse(content={"indices": rag_index_registry.list()})
+
+
+@router.delete("/rag-index/{index_id}", response_class=JSONResponse)
+async def remover_indice_rag(index_id: str):
+    if not rag_index_registry.remove(index_id.strip().lower()):
+        raise HTTPException(status_code=404, detail=f"Índice '{index_id}' não encontrado")
+    return JSONResponse(content={"index_id": index_id, "removido": True})
 
 
 @router.post("/rag-context", response_class=JSONResponse)
 async def gerar_contexto_rag(
-    files: list[UploadFile] = File(...),
+    files: list[UploadFile] = File(None),
     top_k: int = Form(3),
     clausula_teste: str = Form(""),
     extraction_method: str = Form("hierarquico_filtrado"),
+    index_id: str = Form(""),
+    modo_busca: str = Form("denso"),
 ):
     try:
         # Sanitiza top_k no backend também (espelhando o front)
@@ -411,6 +626,12 @@ async def gerar_contexto_rag(
         if k > 5:
             k = 5
 
+        files = files or []
+        index_id = (index_id or "").strip().lower()
+        modo_busca = _normalizar_modo_busca(modo_busca)
+        if not files and not index_id:
+            return JSONResponse(content={"erro": "Envie arquivos ou um index_id."}, status_code=400)
+
         # Verifica extensões dos arquivos enviados (.docx ou .sqlite3)
         file_names = [
             (up.filename or "").lower() for up in (files or [])
@@ -418,129 +639,30 @@ async def gerar_contexto_rag(
         has_sqlite = any(name.endswith(".sqlite3") for name in file_names)
         has_docx = any(name.endswith(".docx") for name in file_names)
 
-        # Caminho 1: uso de índice Chroma pré-computado (.sqlite3)
-        if has_sqlite and not has_docx:
-            if not files:
-                return JSONResponse(content={"contexto_rag": [], "logs": []})
-
-            # Para simplicidade, usa apenas o primeiro .sqlite3
-            first_sqlite = None
-            for up in files:
-                if (up.filename or "").lower().endswith(".sqlite3"):
-                    first_sqlite = up
-                    break
-
-            if first_sqlite is None:
-                return JSONResponse(content={"contexto_rag": [], "logs": []})
-
-            # No Windows, o uso de TemporaryDirectory com Chroma pode gerar
-            # PermissionError ao tentar apagar arquivos ainda em uso (ex.: data_level0.bin).
-            # Por isso, gerenciamos o diretório temporário manualmente e
-            # toleramos falhas de remoção.
-            temp_dir = tempfile.mkdtemp(prefix="rag_sqlite_")
-            try:
-                sqlite_path = os.path.join(temp_dir, "chroma.sqlite3")
-                content = await first_sqlite.read()
-                with open(sqlite_path, "wb") as f:
-                    f.write(content)
-
-                embeddings = AzureOpenAIEmbeddings(
-                    azure_endpoint=settings.OPENAI_API_BASE,
-                    api_key=SecretStr(settings.OPENAI_API_KEY or ""),
-                    api_version=settings.OPENAI_API_VERSION,
-                    azure_deployment="text-embedding-ada-002",
-                )
-
-                # Restaura o vectorstore a partir do diretório que contém o .sqlite3
-                vectorstore = Chroma(
-                    embedding_function=embeddings,
-                    persist_directory=temp_dir,
+        # Caminho 1: índice Chroma pré-computado (.sqlite3), já registrado (index_id) ou enviado agora.
+        # O arquivo enviado é registrado (mesmo conteúdo = mesmo id) e a resposta devolve o
+        # index_id, para que as próximas consultas não precisem reenviar nem reabrir o índice.
+        if index_id or (has_sqlite and not has_docx):
+            if not index_id:
+                # Para simplicidade, usa apenas o primeiro .sqlite3
+                first_sqlite = next(
+                    up for up in files if (up.filename or "").lower().endswith(".sqlite3")
                 )
-
-                query_text = (clausula_teste or "").strip()
-                if not query_text:
-                    # Sem cláusula de teste não faz sentido ranquear; retorna vazio
-                    return JSONResponse(content={"contexto_rag": [], "logs": []})
-
-                # No caminho .sqlite3, o índice já reflete o método de extração
-                # escolhido no conversor (3, 4 ou 5). Aqui não aplicamos nenhum
-                # filtro adicional de "só cláusulas comentadas"; apenas fazemos a
-                # busca semântica direta nos vetores persistidos.
-                results = vectorstore.similarity_search_with_score(query_text, k=k)
-
-                if not results:
-                    return JSONResponse(content={"contexto_rag": [], "logs": []})
-
-                # Para manter a MESMA escala de similaridade do caminho DOCX,
-                # ignoramos o score bruto retornado pelo Chroma (distância)
-                # e recalculamos o cosseno manualmente usando os mesmos
-                # embeddings AzureOpenAIEmbeddings.
-                doc_texts = [doc.page_content for (doc, _score) in results]
-
-                query_vec = None
-                doc_vecs: list[list[float]] = []
                 try:
-                    import math
+                    index_id, _ = rag_index_registry.register(await first_sqlite.read())
+                except ValueError as e:
+                    return JSONResponse(content={"erro": str(e)}, status_code=400)
 
-                    query_vec = embeddings.embed_query(query_text)
-                    doc_vecs = embeddings.embed_documents(doc_texts)
+            if not rag_index_registry.exists(index_id):
+                return JSONResponse(content={"erro": f"Índice '{index_id}' não encontrado"}, status_code=404)
 
-                    # Pré-calcula norma do vetor de query para reutilizar
-                    q_norm = math.sqrt(sum(v * v for v in query_vec)) or 1e-9
-                except Exception:
-                    query_vec = None
-                    doc_vecs = []
-
-                contexto_lista: list[dict] = []
-                logs: list[dict] = []
-
-                for idx, (doc, _score) in enumerate(results, start=1):
-                    meta = doc.metadata or {}
-                    raw_paragrafo = meta.get("raw_paragrafo")
-
-                    par_dict: dict[str, Any] = {}
-                    if isinstance(raw_paragrafo, str):
-                        try:
-                            par_dict = json.loads(raw_paragrafo)
-                        except Exception:
-                            par_dict = {}
-                    elif isinstance(raw_paragrafo, dict):
-                        par_dict = raw_paragrafo
-
-                    row = {
-                        "nome_arquivo": meta.get("nome_arquivo", ""),
-                        "index_p": par_dict.get("index_p"),
-                        "tipo_secao": par_dict.get("tipo_secao"),
-                        "texto": par_dict.get("texto_original") or doc.page_content,
-                        "alteracoes": par_dict.get("alteracoes") or [],
-                    }
+            query_text = (clausula_teste or "").strip()
+            if not query_text:
+                # Sem cláusula de teste não faz sentido ranquear; retorna vazio
+                return JSONResponse(content={"contexto_rag": [], "logs": [], "index_id": index_id})
 
-                    # Usa a MESMA fórmula de similaridade do caminho DOCX:
-                    # similaridade_percentual = cosine_similarity(query, doc) * 100.0
-                    sim_percent = 0.0
-                    if query_vec is not None and doc_vecs and idx - 1 < len(doc_vecs):
-                        try:
-                            vec = doc_vecs[idx - 1]
-                            import math
-                            v_norm = math.sqrt(sum(x * x for x in vec)) or 1e-9
-                            dot = sum(a * b for a, b in zip(query_vec, vec))
-                            cos_sim = dot / (q_norm * v_norm)
-                            sim_percent = cos_sim * 100.0
-                        except Exception:
-                            sim_percent = 0.0
-
-                    row["similaridade_percentual"] = sim_percent
-
-                    contexto_lista.append(row)
-                    logs.append({"numero": idx, "json": row})
-
-                return JSONResponse(content={"contexto_rag": contexto_lista, "logs": logs})
-            finally:
-                try:
-                    shutil.rmtree(temp_dir, ignore_errors=True)
-                except PermissionError:
-                    # Em último caso, ignora erro de limpeza para não quebrar a requisição
-                    pass
+            contexto_lista, logs = await asyncio.to_thread(_buscar_no_indice, index_id, query_text, k, modo_busca)
+            return JSONResponse(content={"contexto_rag": contexto_lista, "logs": logs, "index_id": index_id})
 
         # Caminho 2 (padrão): DOCX -> parser hierárquico -> embeddings em memória
 
@@ -566,21 +688,8 @@ async def gerar_contexto_rag(
             effective_method = valid_methods[extraction_method_normalized]
 
         # 1) Usa o parser hierárquico escolhido (3, 4 ou 5) para obter "rows" brutas
-        all_rows: list[dict] = []
-        with tempfile.TemporaryDirectory() as temp_dir:
-            for up in files:
-                content = await up.read()
-                safe_filename = up.filename or f"arquivo_{uuid.uuid4()}.docx"
-                temp_docx = os.path.join(temp_dir, safe_filename)
-                with open(temp_docx, "wb") as f:
-                    f.write(content)
-
-                rows = get_parser_rows(
-                    temp_docx,
-                    safe_filename,
-                    method=effective_method,
-                )
-                all_rows.extend(rows)
+        extracoes = await _extrair_uploads(files, effective_method, "RAG")
+        all_rows: list[dict] = merge_rows(extracoes)
 
         if not all_rows:
             return JSONResponse(content={"contexto_rag": [], "logs": []})
@@ -649,42 +758,37 @@ async def gerar_contexto_rag(
         if not paragrafos:
             return JSONResponse(content={"contexto_rag": [], "logs": []})
 
-        embeddings = AzureOpenAIEmbeddings(
-            azure_endpoint=settings.OPENAI_API_BASE,
-            api_key=SecretStr(settings.OPENAI_API_KEY or ""),
-            api_version=settings.OPENAI_API_VERSION,
-            azure_deployment="text-embedding-ada-002",
-        )
+        if modo_busca != "denso":
+            # BM25 local sobre os parágrafos selecionados; no híbrido, fundido com o cosseno.
+            query_text = (clausula_teste or "").strip()
+            denso_fn = None
+            if modo_busca == "hibrido":
+                def denso_fn():
+                    embeddings = get_embeddings()
+                    return VectorScorer(embeddings.embed_documents(texts)).scores(embeddings.embed_query(query_text))
+            ranked = await asyncio.to_thread(
+                search, BM25Index(texts), query_text, k, denso_fn, settings.RAG_HYBRID_ALPHA
+            )
+            top_items = [(score, paragrafos[i]) for i, score in ranked]
+        else:
+            embeddings = get_embeddings()
 
-        # Embeddings dos parágrafos
-        vectors = embeddings.embed_documents(texts)
+            # Embeddings dos parágrafos
+            vectors = embeddings.embed_documents(texts)
 
-        # Se houver cláusula de teste, usamos como query de similaridade.
-        # Caso contrário, caímos de volta para ordenação por norma do vetor.
-        query_vec = None
-        if clausula_teste and clausula_teste.strip():
-            try:
-                query_vec = embeddings.embed_query(clausula_teste)
-            except Exception:
-                query_vec = None
-
-        scored = []
-        if query_vec is not None:
-            import math
-            q_norm = math.sqrt(sum(v * v for v in query_vec)) or 1e-9
-            for row, vec in zip(paragrafos, vectors):
-                v_norm = math.sqrt(sum(x * x for x in vec)) or 1e-9
-                dot = sum(a * b for a, b in zip(query_vec, vec))
-                cos_sim = dot / (q_norm * v_norm)
-                scored.append((cos_sim, row))
-        else:
-            import math
-            for row, vec in zip(paragrafos, vectors):
-                norm = math.sqrt(sum((v * v) for v in vec)) or 1e-9
-                scored.append((norm, row))
+            # Se houver cláusula de teste, usamos como query de similaridade.
+            # Caso contrário, caímos de volta para ordenação por norma do vetor.
+            query_vec = None
+            if clausula_teste and clausula_teste.strip():
+                try:
+                    query_vec = embeddings.embed_query(clausula_teste)
+                except Exception:
+                    query_vec = None
 
-        scored.sort(key=lambda t: t[0], reverse=True)
-        top_items = scored[:k]
+            # Cosseno vetorizado (ou norma, sem query) e seleção parcial dos k melhores
+            top_items = [
+                (score, paragrafos[i]) for i, score in VectorScorer(vectors).top_k(query_vec, k)
+            ]
 
         if not top_items:
             return JSONResponse(content={"contexto_rag": [], "logs": []})
@@ -16,6 +16,28 @@ class Settings(BaseSettings):
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
 
+    SEGMENTATION_STRATEGY: str = "padrao"
+    SEGMENT_CACHE_MAX_ENTRIES: int = 32
+
+    DOCX_OUTPUT_COMPRESSLEVEL: int = 6
+
+    EXTRACTION_MAX_WORKERS: int = 0
+    EXTRACTION_CACHE_ENABLED: bool = True
+    EXTRACTION_CACHE_DIR: str = ""
+    EXTRACTION_CACHE_PRUNE_DAYS: int = 7
+
+    RAG_INDEX_DIR: str = ""
+    RAG_INDEX_MAX_OPEN: int = 4
+    RAG_INDEX_IDLE_SECONDS: int = 1800
+    RAG_HYBRID_ALPHA: float = 0.5
+
+    EMBEDDING_CACHE_ENABLED: bool = True
+    EMBEDDING_CACHE_PATH: str = ""
+    EMBEDDING_BATCH_SIZE: int = 256
+    EMBEDDING_MAX_CONCURRENCY: int = 4
+    EMBEDDING_MAX_RETRIES: int = 3
+    EMBEDDING_JOB_DIR: str = ""
+
     class Config:
         env_file = ".env"
 
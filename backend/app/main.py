@@ -5,6 +5,8 @@ from arq import ArqRedis
 from arq.connections import RedisSettings
 from app.core.config import settings
 from app.api import endpoints, playground
+from app.services.extraction_pool import shutdown_extraction_pool
+from app.services.rag_index_registry import rag_index_registry
 import os
 import redis.asyncio as redis
 
@@ -35,6 +37,8 @@ def create_app() -> FastAPI:
         redis_pool = getattr(app.state, "redis_pool", None)
         if redis_pool:
             await redis_pool.close()
+        shutdown_extraction_pool()
+        rag_index_registry.close_all()
 
     # Inclui as rotas da API
     app.include_router(endpoints.router, prefix="/api", tags=["API"])
@@ -0,0 +1,107 @@
+import csv
+import io
+import json
+import traceback
+from typing import Iterable, Iterator
+
+from app.analysis.extract_changes_csv import (
+    EXTRACTION_METHODS, DocxSource, get_csv_columns, is_known_method, iter_parser_rows,
+)
+
+# Exportação em streaming das linhas de track changes/comentários (CSV ou NDJSON).
+# As linhas saem do parser parte a parte e são serializadas em blocos de CHUNK_ROWS: a memória
+# do servidor não cresce com o número de arquivos ou de linhas, e o navegador recebe um download
+# em vez de um único JSON com o corpus inteiro. Método e formato são validados antes do primeiro
+# byte; depois disso, um arquivo que falha (no parser ou na escrita) vira uma linha de erro.
+
+CHUNK_ROWS = 500
+EXPORT_FORMATS = {
+    'csv': ('text/csv; charset=utf-8', '.csv'),
+    'ndjson': ('application/x-ndjson', '.ndjson'),
+}
+
+
+def _error_message(nome_arquivo: str, e: Exception) -> str:
+    # O download já começou: o arquivo com erro vira uma linha de marcação (e vai para o log)
+    # sem cortar os demais.
+    print(f"[EXPORTAÇÃO] Falha ao exportar {nome_arquivo}; arquivo marcado com erro", flush=True)
+    traceback.print_exc()
+    return f"ERRO NA EXTRAÇÃO: {type(e).__name__}: {e}"
+
+
+def _csv_error_row(columns: list[str], nome_arquivo: str, mensagem: str) -> dict:
+    row = dict.fromkeys(columns, '')
+    row['Nome_arquivo'] = nome_arquivo
+    # A mensagem vai na coluna de comentário (ou na última, no método alternativo)
+    row['comentario' if 'comentario' in row else columns[-1]] = mensagem
+    return row
+
+
+def _check_method(method: str) -> None:
+    # Validado antes do primeiro byte: um método inválido não pode virar um 200 cortado.
+    if not is_known_method(method):
+        raise ValueError(f"Método de extração inválido '{method}'. Use: {', '.join(EXTRACTION_METHODS)}")
+
+
+def iter_csv(files: Iterable[tuple[DocxSource, str]], method: str = 'padrao') -> Iterator[bytes]:
+    """CSV no mesmo formato de extract_comments_and_track_changes (QUOTE_ALL, utf-8-sig)."""
+    _check_method(method)
+    return _iter_csv(files, method)
+
+
+def _iter_csv(files: Iterable[tuple[DocxSource, str]], method: str) -> Iterator[bytes]:
+    columns = get_csv_columns(method)
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, quoting=csv.QUOTE_ALL)
+    writer.writeheader()
+    pending = 0
+    # BOM apenas no início do arquivo, como o encoding utf-8-sig faria
+    prefix = '\ufeff'
+    for source, nome_arquivo in files:
+        try:
+            for row in iter_parser_rows(source, nome_arquivo, method=method):
+                # writerow valida as chaves antes de escrever: um erro não deixa linha pela metade
+                writer.writerow(row)
+                pending += 1
+                if pending >= CHUNK_ROWS:
+                    yield (prefix + buffer.getvalue()).encode('utf-8')
+                    prefix = ''
+                    buffer.seek(0)
+                    buffer.truncate()
+                    pending = 0
+        except Exception as e:
+            writer.writerow(_csv_error_row(columns, nome_arquivo, _error_message(nome_arquivo, e)))
+            pending += 1
+    yield (prefix + buffer.getvalue()).encode('utf-8')
+
+
+def iter_ndjson(files: Iterable[tuple[DocxSource, str]], method: str = 'padrao') -> Iterator[bytes]:
+    """Uma linha JSON por linha extraída (mesmas chaves de get_parser_rows)."""
+    _check_method(method)
+    return _iter_ndjson(files, method)
+
+
+def _iter_ndjson(files: Iterable[tuple[DocxSource, str]], method: str) -> Iterator[bytes]:
+    chunk = []
+    for source, nome_arquivo in files:
+        try:
+            for row in iter_parser_rows(source, nome_arquivo, method=method):
+                chunk.append(json.dumps(row, ensure_ascii=False))
+                if len(chunk) >= CHUNK_ROWS:
+                    yield ('\n'.join(chunk) + '\n').encode('utf-8')
+                    chunk = []
+        except Exception as e:
+            chunk.append(json.dumps(
+                {'Nome_arquivo': nome_arquivo, 'erro': _error_message(nome_arquivo, e)}, ensure_ascii=False
+            ))
+    if chunk:
+        yield ('\n'.join(chunk) + '\n').encode('utf-8')
+
+
+def iter_export(files: Iterable[tuple[DocxSource, str]], method: str, formato: str) -> Iterator[bytes]:
+    """Valida método e formato na chamada (antes da resposta começar) e devolve o gerador."""
+    if formato not in EXPORT_FORMATS:
+        raise ValueError(f"Formato inválido '{formato}'. Use: {', '.join(EXPORT_FORMATS)}")
+    if formato == 'ndjson':
+        return iter_ndjson(files, method)
+    return iter_csv(files, method)
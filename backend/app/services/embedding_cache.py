@@ -0,0 +1,124 @@
+import hashlib
+import sqlite3
+import threading
+from array import array
+from pathlib import Path
+from typing import Iterable, Optional
+
+from langchain_core.embeddings import Embeddings
+
+# Cache persistente de embeddings (SQLite), compartilhado por vetorização e RAG.
+# Chave: (deployment/modelo, SHA-256 do texto). O vetor é gravado como float32 (metade do espaço
+# do float64, precisão de sobra para similaridade de cosseno). CachedEmbeddings envolve o cliente
+# do provedor: cada chamada consulta o cache e só envia os textos ausentes, em lotes, de modo que
+# vetorizar de novo o mesmo corpus não faz nenhuma chamada ao provedor.
+
+DEFAULT_CACHE_PATH = Path(__file__).parent.parent.parent / "data" / "cache" / "embeddings.sqlite3"
+_SELECT_CHUNK = 500  # limite seguro de parâmetros por consulta no SQLite
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _to_float32(vector: Iterable[float]) -> list[float]:
+    # Mesma codificação da coluna vetor: o vetor devolvido não muda entre a 1ª chamada e as seguintes.
+    return array("f", vector).tolist()
+
+
+def _chunks(items: list, size: int) -> Iterable[list]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class EmbeddingCache:
+    """Tabela embeddings(modelo, texto_hash) -> vetor float32; uma conexão protegida por lock."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " modelo TEXT NOT NULL, texto_hash TEXT NOT NULL, vetor BLOB NOT NULL,"
+                " PRIMARY KEY (modelo, texto_hash)) WITHOUT ROWID"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get_many(self, model: str, hashes: list[str]) -> dict[str, list[float]]:
+        found = {}
+        with self._lock:
+            conn = self._connect()
+            for chunk in _chunks(hashes, _SELECT_CHUNK):
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT texto_hash, vetor FROM embeddings WHERE modelo = ? AND texto_hash IN ({placeholders})",
+                    [model, *chunk],
+                )
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+        return found
+
+    def put_many(self, model: str, items: list[tuple[str, list[float]]]) -> None:
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (modelo, texto_hash, vetor) VALUES (?, ?, ?)",
+                [(model, key, array("f", vector).tobytes()) for key, vector in items],
+            )
+            conn.commit()
+
+    def count(self, model: Optional[str] = None) -> int:
+        with self._lock:
+            conn = self._connect()
+            if model is None:
+                return conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            return conn.execute("SELECT COUNT(*) FROM embeddings WHERE modelo = ?", (model,)).fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings do provedor com cache: só os textos ausentes vão ao provedor, em lotes de batch_size."""
+
+    def __init__(self, inner: Embeddings, model: str, cache: EmbeddingCache, batch_size: int = 256):
+        self.inner = inner
+        self.model = model
+        self.cache = cache
+        self.batch_size = max(1, batch_size)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+        hashes = [text_hash(text) for text in texts]
+        vectors = self.cache.get_many(self.model, list(dict.fromkeys(hashes)))
+
+        # Textos repetidos na mesma chamada são enviados uma única vez.
+        missing = {}
+        for key, text in zip(hashes, texts):
+            if key not in vectors:
+                missing.setdefault(key, text)
+        if missing:
+            for batch in _chunks(list(missing.items()), self.batch_size):
+                batch_vectors = self.inner.embed_documents([text for _, text in batch])
+                items = [(key, _to_float32(vector)) for (key, _), vector in zip(batch, batch_vectors)]
+                # Grava lote a lote: uma falha no meio preserva o que já foi pago ao provedor.
+                self.cache.put_many(self.model, items)
+                vectors.update(items)
+        return [vectors[key] for key in hashes]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
@@ -0,0 +1,167 @@
+import asyncio
+import hashlib
+import random
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterator, Optional, Sequence
+
+from langchain_core.embeddings import Embeddings
+
+from app.core.config import settings
+
+# Pipeline de embeddings da vetorização: textos em lotes de batch_size, até max_concurrency lotes
+# em voo no provedor e nova tentativa (backoff exponencial) por lote. Cada lote concluído é gravado
+# na coleção Chroma na hora (Collection.add do chromadb, com os vetores já calculados), e o
+# progresso sai no log. Os lotes são gerados sob demanda por max_concurrency tarefas. Com ids
+# estáveis, os textos cujo id já está na coleção são pulados: rodar de novo sobre a coleção de uma
+# execução que falhou retoma de onde ela parou, com ou sem o cache de embeddings.
+
+RETRY_BASE_SECONDS = 1.0
+DEFAULT_JOB_DIR = Path(__file__).parent.parent.parent / "data" / "vector_jobs"
+# Coleção padrão do Chroma do langchain: o .sqlite3 gerado abre com Chroma(persist_directory=...)
+CHROMA_COLLECTION_NAME = "langchain"
+_GET_CHUNK = 5000  # ids por consulta ao verificar o que já está na coleção
+
+
+class EmbeddingPipelineError(RuntimeError):
+    def __init__(self, message: str, progress: "EmbeddingProgress"):
+        super().__init__(message)
+        self.progress = progress
+
+
+@dataclass
+class EmbeddingProgress:
+    total_textos: int
+    total_lotes: int
+    textos_gravados: int = 0
+    textos_retomados: int = 0
+    lotes_concluidos: int = 0
+    tentativas_extras: int = 0
+    inicio: float = field(default_factory=time.perf_counter)
+
+    def resumo(self) -> dict:
+        return {
+            "textos": self.total_textos,
+            "textos_gravados": self.textos_gravados,
+            "textos_retomados": self.textos_retomados,
+            "lotes": self.total_lotes,
+            "lotes_concluidos": self.lotes_concluidos,
+            "tentativas_extras": self.tentativas_extras,
+            "tempo_ms": round((time.perf_counter() - self.inicio) * 1000, 1),
+        }
+
+
+async def _embed_with_retry(
+    embeddings: Embeddings, texts: list[str], max_retries: int, progress: EmbeddingProgress, tag: str, lote: int
+) -> list[list[float]]:
+    attempt = 0
+    while True:
+        try:
+            return await asyncio.to_thread(embeddings.embed_documents, texts)
+        except Exception as e:
+            if attempt >= max_retries:
+                raise
+            delay = RETRY_BASE_SECONDS * (2 ** attempt) * (1 + random.random())
+            attempt += 1
+            progress.tentativas_extras += 1
+            print(f"[{tag}] Lote {lote} falhou ({type(e).__name__}: {e}); "
+                  f"tentativa {attempt}/{max_retries} em {delay:.1f} s", flush=True)
+            await asyncio.sleep(delay)
+
+
+def vectorization_job_dir(model: str, texts: Sequence[str]) -> Path:
+    """Pasta da coleção de uma vetorização: a mesma entrada (modelo + textos) volta à mesma pasta."""
+    digest = hashlib.sha256(model.encode("utf-8"))
+    for text in texts:
+        digest.update(b"\0")
+        digest.update(text.encode("utf-8"))
+    return Path(settings.EMBEDDING_JOB_DIR or DEFAULT_JOB_DIR) / digest.hexdigest()
+
+
+def _existing_ids(collection, ids: Sequence[str]) -> set[str]:
+    existing = set()
+    for start in range(0, len(ids), _GET_CHUNK):
+        existing.update(collection.get(ids=list(ids[start:start + _GET_CHUNK]), include=[])["ids"])
+    return existing
+
+
+def _iter_batches(indices: Sequence[int], batch_size: int) -> Iterator[tuple[int, Sequence[int]]]:
+    for lote, start in enumerate(range(0, len(indices), batch_size), start=1):
+        yield lote, indices[start:start + batch_size]
+
+
+async def embed_into_collection(
+    collection,
+    texts: Sequence[str],
+    metadatas: Sequence[dict[str, Any]],
+    embeddings: Embeddings,
+    ids: Optional[Sequence[str]] = None,
+    batch_size: Optional[int] = None,
+    max_concurrency: Optional[int] = None,
+    max_retries: Optional[int] = None,
+    tag: str = "VETORIZAÇÃO",
+) -> EmbeddingProgress:
+    """Embute os textos em lotes e grava cada lote na coleção (chromadb Collection) assim que fica pronto.
+
+    Com `ids`, os textos já presentes na coleção não são embutidos de novo. Lança
+    EmbeddingPipelineError (com o progresso) se um lote esgotar as tentativas; os lotes já
+    concluídos continuam gravados na coleção.
+    """
+    batch_size = max(1, batch_size or settings.EMBEDDING_BATCH_SIZE)
+    max_concurrency = max(1, max_concurrency or settings.EMBEDDING_MAX_CONCURRENCY)
+    max_retries = settings.EMBEDDING_MAX_RETRIES if max_retries is None else max(0, max_retries)
+
+    pending = range(len(texts))
+    resumed = 0
+    if ids is not None:
+        existing = await asyncio.to_thread(_existing_ids, collection, ids)
+        if existing:
+            pending = [i for i in pending if ids[i] not in existing]
+            resumed = len(texts) - len(pending)
+            print(f"[{tag}] Retomando: {resumed} texto(s) já gravados na coleção", flush=True)
+
+    progress = EmbeddingProgress(
+        total_textos=len(texts),
+        total_lotes=(len(pending) + batch_size - 1) // batch_size,
+        textos_gravados=resumed,
+        textos_retomados=resumed,
+    )
+    batches = _iter_batches(pending, batch_size)
+    # O Chroma grava em SQLite: as inserções são serializadas, só as chamadas ao provedor são concorrentes.
+    write_lock = asyncio.Lock()
+
+    async def worker() -> None:
+        # O gerador é compartilhado: cada tarefa pega o próximo lote ao terminar o anterior.
+        for lote, indices in batches:
+            batch_texts = [texts[i] for i in indices]
+            vectors = await _embed_with_retry(embeddings, batch_texts, max_retries, progress, tag, lote)
+            async with write_lock:
+                await asyncio.to_thread(
+                    collection.add,
+                    ids=[ids[i] for i in indices] if ids is not None else [str(uuid.uuid4()) for _ in indices],
+                    embeddings=vectors,
+                    documents=batch_texts,
+                    metadatas=[metadatas[i] for i in indices],
+                )
+                progress.textos_gravados += len(batch_texts)
+                progress.lotes_concluidos += 1
+                elapsed = time.perf_counter() - progress.inicio
+                print(f"[{tag}] Lote {progress.lotes_concluidos}/{progress.total_lotes}: "
+                      f"{progress.textos_gravados}/{progress.total_textos} textos "
+                      f"({(progress.textos_gravados - resumed) / elapsed:.0f} textos/s)", flush=True)
+
+    tasks = [asyncio.create_task(worker()) for _ in range(min(max_concurrency, progress.total_lotes))]
+    try:
+        await asyncio.gather(*tasks)
+    except Exception as e:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise EmbeddingPipelineError(
+            f"{progress.lotes_concluidos} de {progress.total_lotes} lotes concluídos; "
+            f"falha definitiva: {type(e).__name__}: {e}",
+            progress,
+        ) from e
+    return progress
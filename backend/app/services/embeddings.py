@@ -0,0 +1,39 @@
+import threading
+from pathlib import Path
+from typing import Optional
+
+from langchain_core.embeddings import Embeddings
+from langchain_openai import AzureOpenAIEmbeddings
+from pydantic import SecretStr
+
+from app.core.config import settings
+from app.services.embedding_cache import DEFAULT_CACHE_PATH, CachedEmbeddings, EmbeddingCache
+
+# Cliente de embeddings (Azure OpenAI) compartilhado pelas rotas de vetorização e RAG.
+# Criado uma única vez: o cliente HTTP e a configuração são reaproveitados entre requisições.
+# Com EMBEDDING_CACHE_ENABLED, todas as chamadas passam pelo cache persistente (embedding_cache.py).
+
+EMBEDDING_DEPLOYMENT = "text-embedding-ada-002"
+
+_embeddings: Optional[Embeddings] = None
+_embeddings_lock = threading.Lock()
+embedding_cache = EmbeddingCache(Path(settings.EMBEDDING_CACHE_PATH or DEFAULT_CACHE_PATH))
+
+
+def get_embeddings() -> Embeddings:
+    global _embeddings
+    with _embeddings_lock:
+        if _embeddings is None:
+            provider = AzureOpenAIEmbeddings(
+                azure_endpoint=settings.OPENAI_API_BASE,
+                api_key=SecretStr(settings.OPENAI_API_KEY or ""),
+                api_version=settings.OPENAI_API_VERSION,
+                azure_deployment=EMBEDDING_DEPLOYMENT,
+            )
+            if settings.EMBEDDING_CACHE_ENABLED:
+                _embeddings = CachedEmbeddings(
+                    provider, EMBEDDING_DEPLOYMENT, embedding_cache, batch_size=settings.EMBEDDING_BATCH_SIZE
+                )
+            else:
+                _embeddings = provider
+        return _embeddings
@@ -0,0 +1,125 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Optional, Sequence
+
+from app.core.config import settings
+from app.analysis.extract_changes_csv import DocxSource
+from app.analysis.extraction_cache import get_cached_parser_rows
+
+# Extração paralela de track changes/comentários para as rotas do playground.
+# Cada arquivo é processado por get_parser_rows (via cache persistente) em um processo do pool (o parse é CPU-bound e
+# segura o GIL); a rota apenas aguarda os futures, então o event loop continua livre.
+# O resultado mantém a ordem de envio dos arquivos, e a falha de um arquivo não derruba os demais.
+# Os workers são iniciados com "spawn": o pool nasce sob demanda dentro do servidor, que já tem
+# threads (uvicorn, Chroma, httpx); um fork copiaria locks presos nessas threads e travaria o worker.
+# O pool é encerrado no shutdown da aplicação (main.py).
+
+POOL_START_METHOD = "spawn"
+
+
+@dataclass
+class FileExtraction:
+    arquivo: str
+    rows: list[dict] = field(default_factory=list)
+    tempo_ms: float = 0.0
+    erro: Optional[str] = None
+
+    def resumo(self) -> dict:
+        return {
+            "arquivo": self.arquivo,
+            "linhas": len(self.rows),
+            "tempo_ms": round(self.tempo_ms, 1),
+            "erro": self.erro,
+        }
+
+
+def _extract_file(docx_source: DocxSource, nome_arquivo: str, method: str) -> FileExtraction:
+    """Executada no processo do pool: nunca propaga exceção, registra o erro no resultado."""
+    start = time.perf_counter()
+    try:
+        rows = get_cached_parser_rows(docx_source, nome_arquivo, method=method)
+        return FileExtraction(nome_arquivo, rows, (time.perf_counter() - start) * 1000)
+    except Exception as e:
+        traceback.print_exc()
+        return FileExtraction(nome_arquivo, [], (time.perf_counter() - start) * 1000, f"{type(e).__name__}: {e}")
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _max_workers() -> int:
+    return settings.EXTRACTION_MAX_WORKERS or os.cpu_count() or 1
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=_max_workers(), mp_context=multiprocessing.get_context(POOL_START_METHOD)
+            )
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    # Um worker morto (ex.: falta de memória) quebra o pool inteiro: o próximo uso cria outro.
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_extraction_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+async def extract_files(files: Sequence[tuple[DocxSource, str]], method: str = 'padrao') -> list[FileExtraction]:
+    """Extrai as linhas de cada (bytes ou caminho do docx, nome_arquivo) em paralelo, na ordem recebida.
+
+    Um único arquivo roda em thread (evita o custo de serializar as linhas entre processos).
+    """
+    if not files:
+        return []
+    loop = asyncio.get_running_loop()
+    if len(files) == 1 or _max_workers() == 1:
+        return [await asyncio.to_thread(_extract_file, source, name, method) for source, name in files]
+
+    pool = _get_pool()
+    futures = [loop.run_in_executor(pool, _extract_file, source, name, method) for source, name in files]
+    results = await asyncio.gather(*futures, return_exceptions=True)
+
+    extractions = []
+    for (_, name), result in zip(files, results):
+        if isinstance(result, BaseException):
+            if isinstance(result, BrokenProcessPool):
+                _discard_pool(pool)
+            result = FileExtraction(name, erro=f"{type(result).__name__}: {result}")
+        extractions.append(result)
+    return extractions
+
+
+def merge_rows(extractions: Sequence[FileExtraction]) -> list[dict]:
+    all_rows = []
+    for extraction in extractions:
+        all_rows.extend(extraction.rows)
+    return all_rows
+
+
+def log_extractions(tag: str, extractions: Sequence[FileExtraction], elapsed_ms: float) -> None:
+    for extraction in extractions:
+        status = f"ERRO {extraction.erro}" if extraction.erro else f"{len(extraction.rows)} linhas"
+        print(f"[{tag}] {extraction.arquivo}: {status} ({extraction.tempo_ms:.0f} ms)", flush=True)
+    print(f"[{tag}] {len(extractions)} arquivo(s) extraídos em {elapsed_ms:.0f} ms", flush=True)
@@ -0,0 +1,138 @@
+import math
+import re
+import unicodedata
+from collections import Counter
+from typing import Callable, Optional, Sequence
+
+import numpy as np
+
+from app.services.similarity import top_k_indices
+
+# Busca lexical local (BM25) para o RAG do playground, sem provedor de embeddings.
+# O índice invertido guarda, por termo, os ids dos parágrafos e o peso BM25 já calculado de cada
+# ocorrência: uma consulta só soma os pesos dos termos da query (NumPy), sem percorrer o corpus.
+# hybrid_scores combina o score lexical com o cosseno denso quando há embeddings disponíveis;
+# search faz o top-k e cai para o só lexical quando os scores densos não vêm.
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_TOKEN_RE = re.compile(r"\w+")
+# Palavras muito frequentes em contratos que não ajudam a ranquear (já sem acento)
+STOPWORDS = frozenset(
+    "a ao aos as com como da das de do dos e em entre na nas no nos o os ou para pela pelas pelo "
+    "pelos por que se sem sob sobre sua suas seu seus um uma umas uns nao ser sera serao sao "
+    "este esta estes estas esse essa isso qual quais ja mais".split()
+)
+
+
+def _strip_accents(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def tokenize(text: str) -> list[str]:
+    """Minúsculas, sem acentos, sem stopwords e sem tokens de um caractere."""
+    tokens = _TOKEN_RE.findall(_strip_accents((text or "").lower()))
+    return [token for token in tokens if len(token) > 1 and token not in STOPWORDS]
+
+
+class BM25Index:
+    """Índice invertido BM25 sobre uma lista de textos (ids = posição na lista)."""
+
+    def __init__(self, documents: Sequence[str], k1: float = BM25_K1, b: float = BM25_B):
+        self.size = len(documents)
+        postings: dict[str, tuple[list[int], list[int]]] = {}
+        doc_len = np.zeros(self.size, dtype=np.float32)
+        for doc_id, document in enumerate(documents):
+            counts = Counter(tokenize(document))
+            doc_len[doc_id] = sum(counts.values())
+            for term, tf in counts.items():
+                ids, tfs = postings.setdefault(term, ([], []))
+                ids.append(doc_id)
+                tfs.append(tf)
+
+        avg_len = float(doc_len.mean()) if self.size else 0.0
+        length_norm = k1 * (1 - b + b * doc_len / (avg_len or 1.0))
+        self._postings: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+        for term, (ids, tfs) in postings.items():
+            ids_arr = np.asarray(ids, dtype=np.int32)
+            tf_arr = np.asarray(tfs, dtype=np.float32)
+            df = ids_arr.shape[0]
+            # idf sempre positivo (variante do Lucene): termos em quase todos os parágrafos pesam pouco
+            idf = math.log(1 + (self.size - df + 0.5) / (df + 0.5))
+            weights = idf * tf_arr * (k1 + 1) / (tf_arr + length_norm[ids_arr])
+            self._postings[term] = (ids_arr, weights.astype(np.float32))
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def vocabulary_size(self) -> int:
+        return len(self._postings)
+
+    def scores(self, query: str) -> np.ndarray:
+        """Score BM25 de cada documento para a query (0 = nenhum termo em comum)."""
+        scores = np.zeros(self.size, dtype=np.float32)
+        for term, qtf in Counter(tokenize(query)).items():
+            posting = self._postings.get(term)
+            if posting is not None:
+                ids, weights = posting
+                scores[ids] += qtf * weights
+        return scores
+
+    def top_k(self, query: str, k: int) -> list[tuple[int, float]]:
+        """[(índice, score)] dos k melhores, ignorando documentos sem termo em comum."""
+        return rank(self.scores(query), k, min_score=0.0)
+
+
+def normalize_lexical(scores: np.ndarray) -> np.ndarray:
+    """BM25 relativo ao melhor documento (0..1), para exibir na mesma escala percentual."""
+    best = float(scores.max()) if scores.size else 0.0
+    return scores / best if best > 0 else np.zeros_like(scores)
+
+
+def hybrid_scores(dense: Optional[np.ndarray], lexical: np.ndarray, alpha: float = 0.5) -> np.ndarray:
+    """alpha * cosseno (min-max) + (1 - alpha) * BM25 relativo; ambos em 0..1 sobre o mesmo corpus.
+
+    Sem scores densos (None) o resultado é só o BM25 relativo.
+    """
+    lexical_norm = normalize_lexical(np.asarray(lexical, dtype=np.float32))
+    if dense is None:
+        return lexical_norm
+    dense = np.asarray(dense, dtype=np.float32)
+    if dense.shape != lexical_norm.shape:
+        raise ValueError(f"Scores densos ({dense.shape[0]}) e lexicais ({lexical_norm.shape[0]}) de corpus diferentes")
+    low, high = (float(dense.min()), float(dense.max())) if dense.size else (0.0, 0.0)
+    dense_norm = (dense - low) / (high - low) if high > low else np.zeros_like(dense)
+    return alpha * dense_norm + (1 - alpha) * lexical_norm
+
+
+def rank(scores: np.ndarray, k: int, min_score: Optional[float] = None) -> list[tuple[int, float]]:
+    """[(índice, score)] dos k maiores scores, opcionalmente só acima de min_score."""
+    return [
+        (int(i), float(scores[i]))
+        for i in top_k_indices(scores, k)
+        if min_score is None or scores[i] > min_score
+    ]
+
+
+def search(
+    index: BM25Index,
+    query: str,
+    k: int,
+    dense_fn: Optional[Callable[[], np.ndarray]] = None,
+    alpha: float = 0.5,
+) -> list[tuple[int, float]]:
+    """Top-k por BM25 (score relativo ao melhor) ou, com dense_fn, pela fusão com o cosseno.
+
+    dense_fn devolve os cossenos de todo o corpus; se falhar (ex.: sem acesso ao provedor de
+    embeddings), o ranqueamento fica só no lexical.
+    """
+    lexical = index.scores(query)
+    if dense_fn is not None:
+        try:
+            return rank(hybrid_scores(dense_fn(), lexical, alpha), k)
+        except Exception as e:
+            print(f"[RAG] Embeddings indisponíveis ({type(e).__name__}: {e}); busca só lexical", flush=True)
+    return rank(hybrid_scores(None, lexical), k, min_score=0.0)
@@ -0,0 +1,335 @@
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+from langchain_community.vectorstores import Chroma
+
+from app.core.config import settings
+from app.services.lexical_index import BM25Index
+from app.services.similarity import VectorScorer
+
+# Registro persistente de índices Chroma (.sqlite3 gerado por /processar_vetorizar_json) para o RAG.
+# O índice é enviado uma vez e fica em <raiz>/<index_id>/chroma.sqlite3, onde index_id é o SHA-256
+# do arquivo (reenviar o mesmo arquivo devolve o mesmo id). As consultas passam só o id: o Chroma
+# de cada índice é aberto no primeiro uso e mantido em um LRU em memória; índices ociosos ou além
+# do limite de abertos são fechados, mas continuam em disco para a próxima consulta. Abrir um índice
+# e montar o corpus dele são protegidos por travas do próprio índice: um índice grande sendo
+# carregado não bloqueia os demais. A ociosidade é verificada a cada uso e por uma thread de
+# varredura que só existe enquanto há índices abertos.
+
+DEFAULT_INDEX_DIR = Path(__file__).parent.parent.parent / "data" / "rag_indexes"
+SQLITE_HEADER = b"SQLite format 3\x00"
+INDEX_FILE = "chroma.sqlite3"
+_INDEX_ID_RE = re.compile(r"^[0-9a-f]{64}$")
+SWEEP_MAX_SECONDS = 60
+
+
+@dataclass
+class IndexCorpus:
+    """Todos os parágrafos de um índice, para busca lexical (e híbrida, com os vetores)."""
+    documents: list[str]
+    metadatas: list[dict[str, Any]]
+    lexical: BM25Index
+    dense: Optional[VectorScorer] = None
+
+
+@dataclass
+class _OpenIndex:
+    index_id: str
+    vectorstore: Chroma
+    last_used: float
+    in_use: int = 0
+    evicted: bool = False
+    # remove() com o índice em uso: a pasta só é apagada quando o último usuário libera a entrada
+    pending_delete: bool = False
+    corpus: Optional[IndexCorpus] = None
+    corpus_lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+def _close_vectorstore(vectorstore: Chroma) -> None:
+    # Client.close() só existe nas versões recentes do chromadb; nas antigas o GC libera o sistema.
+    close = getattr(vectorstore._client, "close", None)
+    if close is not None:
+        try:
+            close()
+        except Exception as e:
+            print(f"[RAG ÍNDICE] Falha ao fechar índice: {e}", flush=True)
+
+
+class RagIndexRegistry:
+    """Índices em disco por id; os abertos ficam em um LRU limitado por quantidade e ociosidade."""
+
+    def __init__(self, root: Path, max_open: int = 4, idle_seconds: float = 1800):
+        self.root = Path(root)
+        self.max_open = max(1, max_open)
+        self.idle_seconds = idle_seconds
+        self._open: OrderedDict[str, _OpenIndex] = OrderedDict()
+        self._lock = threading.Lock()
+        self._opening_locks: dict[str, threading.Lock] = {}
+        # Ids removidos cuja pasta ainda não foi apagada (índice em uso): invisíveis para novas consultas
+        self._removing: set[str] = set()
+        self._sweeper: Optional[threading.Thread] = None
+        self._sweeper_stop = threading.Event()
+
+    def _dir(self, index_id: str) -> Path:
+        if not _INDEX_ID_RE.match(index_id or ""):
+            raise KeyError(index_id)
+        return self.root / index_id
+
+    def exists(self, index_id: str) -> bool:
+        try:
+            index_file = self._dir(index_id) / INDEX_FILE
+        except KeyError:
+            return False
+        return index_id not in self._removing and index_file.is_file()
+
+    def register(self, content: bytes) -> tuple[str, bool]:
+        """Grava o .sqlite3 (se ainda não existir) e retorna (index_id, criado)."""
+        if not content.startswith(SQLITE_HEADER):
+            raise ValueError("O arquivo enviado não é um banco SQLite (chroma.sqlite3)")
+        index_id = hashlib.sha256(content).hexdigest()
+        if self.exists(index_id):
+            return index_id, False
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        # Grava em pasta temporária e renomeia: um índice pela metade nunca fica visível.
+        tmp_dir = tempfile.mkdtemp(dir=self.root, prefix=".tmp_")
+        try:
+            with open(os.path.join(tmp_dir, INDEX_FILE), "wb") as f:
+                f.write(content)
+            os.replace(tmp_dir, self._dir(index_id))
+        except OSError:
+            # Outra requisição registrou o mesmo arquivo ao mesmo tempo.
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            if not self.exists(index_id):
+                raise
+            return index_id, False
+        return index_id, True
+
+    def _evict_locked(self, now: float, keep: Optional[str] = None) -> list[Chroma]:
+        to_close = []
+        for index_id in list(self._open):
+            entry = self._open[index_id]
+            over_limit = len(self._open) > self.max_open
+            idle = entry.in_use == 0 and now - entry.last_used > self.idle_seconds
+            if index_id == keep or not (over_limit or idle):
+                continue
+            del self._open[index_id]
+            entry.evicted = True
+            if entry.in_use == 0:
+                to_close.append(entry.vectorstore)
+        return to_close
+
+    def sweep(self) -> int:
+        """Fecha os índices ociosos há mais de idle_seconds; retorna quantos saíram do LRU."""
+        with self._lock:
+            to_close = self._evict_locked(time.monotonic())
+        for vectorstore in to_close:
+            _close_vectorstore(vectorstore)
+        return len(to_close)
+
+    def _sweep_loop(self, stop: threading.Event) -> None:
+        interval = max(1.0, min(self.idle_seconds / 2, SWEEP_MAX_SECONDS))
+        while not stop.wait(interval):
+            closed = self.sweep()
+            if closed:
+                print(f"[RAG ÍNDICE] {closed} índice(s) ocioso(s) fechado(s)", flush=True)
+            with self._lock:
+                if not self._open:
+                    self._sweeper = None
+                    return
+
+    def _start_sweeper_locked(self) -> None:
+        if self._sweeper is None:
+            self._sweeper = threading.Thread(
+                target=self._sweep_loop, args=(self._sweeper_stop,), name="rag-index-sweeper", daemon=True
+            )
+            self._sweeper.start()
+
+    def _acquire(self, index_id: str) -> _OpenIndex:
+        index_dir = self._dir(index_id)
+        with self._lock:
+            if index_id in self._removing:
+                raise KeyError(index_id)
+            entry = self._open.get(index_id)
+            if entry is not None:
+                entry.in_use += 1
+                entry.last_used = time.monotonic()
+                self._open.move_to_end(index_id)
+                to_close = self._evict_locked(entry.last_used, keep=index_id)
+            else:
+                opening_lock = self._opening_locks.setdefault(index_id, threading.Lock())
+        if entry is not None:
+            for vectorstore in to_close:
+                _close_vectorstore(vectorstore)
+            return entry
+
+        if not (index_dir / INDEX_FILE).is_file():
+            raise KeyError(index_id)
+
+        # Abrir o Chroma pode levar segundos (carrega o índice vetorial): fora do lock do LRU e com a
+        # trava só deste índice, para não travar consultas nem aberturas de outros índices.
+        opened = None
+        with opening_lock:
+            with self._lock:
+                if index_id in self._removing:
+                    raise KeyError(index_id)
+                entry = self._open.get(index_id)
+            if entry is None:
+                start = time.perf_counter()
+                # Sem embedding_function: as consultas passam o vetor da query já calculado.
+                vectorstore = Chroma(persist_directory=str(index_dir))
+                print(f"[RAG ÍNDICE] {index_id[:12]} aberto em {(time.perf_counter() - start) * 1000:.0f} ms",
+                      flush=True)
+                entry = opened = _OpenIndex(index_id, vectorstore, time.monotonic())
+
+        with self._lock:
+            removed = index_id in self._removing
+            if not removed:
+                entry = self._open.setdefault(index_id, entry)
+                entry.in_use += 1
+                entry.last_used = time.monotonic()
+                self._open.move_to_end(index_id)
+                to_close = self._evict_locked(entry.last_used, keep=index_id)
+                self._start_sweeper_locked()
+        if removed:
+            # Removido enquanto abria: o Chroma aberto aqui nunca entrou no LRU.
+            if opened is not None:
+                _close_vectorstore(opened.vectorstore)
+            raise KeyError(index_id)
+        for vectorstore in to_close:
+            _close_vectorstore(vectorstore)
+        return entry
+
+    def _release(self, entry: _OpenIndex) -> None:
+        with self._lock:
+            entry.in_use -= 1
+            entry.last_used = time.monotonic()
+            close_now = entry.evicted and entry.in_use == 0
+            to_close = self._evict_locked(entry.last_used)
+        for vectorstore in to_close:
+            _close_vectorstore(vectorstore)
+        if close_now:
+            _close_vectorstore(entry.vectorstore)
+            if entry.pending_delete:
+                self._delete_dir(entry.index_id)
+
+    @contextmanager
+    def open(self, index_id: str) -> Iterator[Chroma]:
+        """Chroma do índice; KeyError se o id não estiver registrado."""
+        entry = self._acquire(index_id)
+        try:
+            yield entry.vectorstore
+        finally:
+            self._release(entry)
+
+    def corpus(self, index_id: str, with_vectors: bool = False) -> IndexCorpus:
+        """Parágrafos do índice com o BM25 (e, se pedido, a matriz de vetores), montados uma vez
+        por abertura do índice e descartados junto com ele no LRU."""
+        entry = self._acquire(index_id)
+        try:
+            corpus = entry.corpus
+            if corpus is None or (with_vectors and corpus.dense is None):
+                # Uma montagem por índice; quem chegar durante ela espera e reaproveita o resultado.
+                with entry.corpus_lock:
+                    corpus = entry.corpus
+                    if corpus is None or (with_vectors and corpus.dense is None):
+                        corpus = self._load_corpus(entry, corpus, with_vectors)
+                        entry.corpus = corpus
+            return corpus
+        finally:
+            self._release(entry)
+
+    @staticmethod
+    def _load_corpus(entry: _OpenIndex, previous: Optional[IndexCorpus], with_vectors: bool) -> IndexCorpus:
+        start = time.perf_counter()
+        include = ["documents", "metadatas"] + (["embeddings"] if with_vectors else [])
+        data = entry.vectorstore._collection.get(include=include)
+        documents = [doc or "" for doc in data["documents"]]
+        corpus = IndexCorpus(
+            documents=documents,
+            metadatas=[meta or {} for meta in data["metadatas"]],
+            lexical=previous.lexical if previous is not None else BM25Index(documents),
+            dense=VectorScorer(data["embeddings"]) if with_vectors else None,
+        )
+        print(f"[RAG ÍNDICE] {entry.index_id[:12]}: corpus de {len(documents)} parágrafos montado em "
+              f"{(time.perf_counter() - start) * 1000:.0f} ms", flush=True)
+        return corpus
+
+    def _drop(self, index_id: str, delete: bool = False) -> bool:
+        """Tira o índice do LRU e fecha o Chroma se ninguém o usa; com delete=True, a pasta é
+        apagada agora ou pelo último _release. Retorna True se o índice estava livre."""
+        with self._lock:
+            entry = self._open.pop(index_id, None)
+            if entry is None:
+                return True
+            entry.evicted = True
+            entry.pending_delete = entry.pending_delete or delete
+            close_now = entry.in_use == 0
+        if close_now:
+            _close_vectorstore(entry.vectorstore)
+        return close_now
+
+    def _delete_dir(self, index_id: str) -> None:
+        with self._lock:
+            opening_lock = self._opening_locks.get(index_id) or threading.Lock()
+        # Espera uma abertura em andamento deste índice, que desiste ao ver a remoção: o Chroma
+        # nunca é aberto (e recriado) sobre a pasta sendo apagada.
+        with opening_lock:
+            shutil.rmtree(self.root / index_id, ignore_errors=True)
+        with self._lock:
+            self._removing.discard(index_id)
+            self._opening_locks.pop(index_id, None)
+
+    def remove(self, index_id: str) -> bool:
+        """Remove o índice; se houver consultas em andamento, a pasta é apagada quando a última terminar."""
+        with self._lock:
+            if not self.exists(index_id):
+                return False
+            self._removing.add(index_id)
+        if self._drop(index_id, delete=True):
+            self._delete_dir(index_id)
+        else:
+            print(f"[RAG ÍNDICE] {index_id[:12]} em uso: remoção concluída ao fim das consultas", flush=True)
+        return True
+
+    def list(self) -> list[dict]:
+        if not self.root.is_dir():
+            return []
+        with self._lock:
+            open_ids = set(self._open)
+        indexes = []
+        for entry in sorted(self.root.iterdir()):
+            index_file = entry / INDEX_FILE
+            if _INDEX_ID_RE.match(entry.name) and index_file.is_file():
+                indexes.append({
+                    "index_id": entry.name,
+                    "tamanho_kb": round(index_file.stat().st_size / 1024, 1),
+                    "aberto": entry.name in open_ids,
+                })
+        return indexes
+
+    def close_all(self) -> None:
+        with self._lock:
+            ids = list(self._open)
+            self._sweeper_stop.set()
+            self._sweeper_stop = threading.Event()
+            self._sweeper = None
+        for index_id in ids:
+            self._drop(index_id)
+
+
+rag_index_registry = RagIndexRegistry(
+    Path(settings.RAG_INDEX_DIR or DEFAULT_INDEX_DIR),
+    max_open=settings.RAG_INDEX_MAX_OPEN,
+    idle_seconds=settings.RAG_INDEX_IDLE_SECONDS,
+)
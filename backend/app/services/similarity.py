@@ -0,0 +1,67 @@
+from typing import Optional, Sequence
+
+import numpy as np
+
+# Similaridade de cosseno vetorizada (NumPy) para o RAG do playground.
+# Os vetores são normalizados uma vez em uma matriz float32 (n x d); uma consulta vira um único
+# produto matriz-vetor, e o top-k sai de argpartition (O(n)) seguido da ordenação só dos k
+# escolhidos, em vez de ordenar a lista inteira.
+
+_MIN_NORM = 1e-9  # mesmo piso do cálculo antigo: vetor nulo tem similaridade 0
+
+
+def _as_matrix(vectors) -> np.ndarray:
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1) if matrix.size else matrix.reshape(0, 0)
+    return matrix
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Índices dos k maiores scores, em ordem decrescente.
+
+    Empates seguem a ordem original (mesmo resultado de um sort estável da lista inteira).
+    """
+    n = scores.shape[0]
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < n:
+        kth = scores[np.argpartition(scores, n - k)[n - k]]
+        above = np.flatnonzero(scores > kth)
+        ties = np.flatnonzero(scores == kth)[:k - above.shape[0]]
+        candidates = np.concatenate([above, ties])
+    else:
+        candidates = np.arange(n)
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order]
+
+
+class VectorScorer:
+    """Matriz normalizada de vetores de documentos, consultada por cosseno."""
+
+    def __init__(self, vectors):
+        matrix = _as_matrix(vectors)
+        self.norms = np.linalg.norm(matrix, axis=1)
+        self.matrix = matrix / np.maximum(self.norms, _MIN_NORM)[:, None]
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    def scores(self, query_vec: Sequence[float]) -> np.ndarray:
+        """Cosseno entre a query e cada vetor (shape (n,))."""
+        if not len(self):
+            return np.empty(0, dtype=np.float32)
+        query = np.asarray(query_vec, dtype=np.float32)
+        query = query / max(float(np.linalg.norm(query)), _MIN_NORM)
+        return self.matrix @ query
+
+    def top_k(self, query_vec: Optional[Sequence[float]], k: int) -> list[tuple[int, float]]:
+        """[(índice, score)] dos k melhores. Sem query, ordena pela norma do vetor (comportamento antigo)."""
+        scores = self.norms if query_vec is None else self.scores(query_vec)
+        return [(int(i), float(scores[i])) for i in top_k_indices(scores, k)]
+
+
+def cosine_scores(query_vec: Sequence[float], vectors) -> list[float]:
+    """Cosseno da query com cada vetor, na ordem recebida."""
+    return VectorScorer(vectors).scores(query_vec).tolist()
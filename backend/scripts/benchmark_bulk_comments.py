@@ -0,0 +1,128 @@
+"""Benchmark da escrita de comentarios: doc.add_comment por achado x BulkCommentWriter.
+
+Gera um DOCX sintetico com muitos paragrafos, escolhe de forma deterministica as ancoras
+(runs) de N comentarios e grava os comentarios pelos dois caminhos. Reporta o tempo de cada
+um e confere se document.xml e comments.xml saem identicos (ignorando w:date).
+
+Uso:
+    python scripts/benchmark_bulk_comments.py [--comments 600] [--paragraphs 400] [--seed 7]
+"""
+import argparse
+import io
+import random
+import re
+import sys
+import time
+import zipfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from docx import Document  # noqa: E402
+from docx.shared import RGBColor  # noqa: E402
+
+from app.analysis.comment_writer import BulkCommentWriter  # noqa: E402
+
+WORDS = (
+    "contrato prazo valor pagamento multa rescisão CONTRATADA CONTRATANTE serviço "
+    "vigência reajuste foro notificação garantia confidencialidade"
+).split()
+
+
+def build_document(paragraphs: int, seed: int) -> bytes:
+    rnd = random.Random(seed)
+    doc = Document()
+    for i in range(paragraphs):
+        if i % 20 == 0:
+            doc.add_paragraph(f"CLÁUSULA {i // 20 + 1} - DISPOSIÇÕES")
+            continue
+        paragraph = doc.add_paragraph()
+        for _ in range(rnd.randint(1, 5)):
+            paragraph.add_run(" ".join(rnd.choice(WORDS) for _ in range(rnd.randint(3, 10))) + " ")
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def pick_anchors(doc, comments: int, seed: int) -> list[tuple[int, int, int]]:
+    rnd = random.Random(seed + 1)
+    paragraphs = [(i, len(p.runs)) for i, p in enumerate(doc.paragraphs) if p.runs]
+    anchors = []
+    for _ in range(comments):
+        index, n_runs = rnd.choice(paragraphs)
+        first = rnd.randrange(n_runs)
+        last = rnd.randrange(first, n_runs)
+        anchors.append((index, first, last))
+    return anchors
+
+
+def _runs(doc, anchor):
+    index, first, last = anchor
+    runs = doc.paragraphs[index].runs
+    return runs[first:last + 1]
+
+
+def write_one_by_one(content: bytes, anchors) -> tuple[bytes, float]:
+    doc = Document(io.BytesIO(content))
+    # Resolve as ancoras antes de inserir: os runs de referencia alteram paragraph.runs.
+    targets = [_runs(doc, anchor) for anchor in anchors]
+    start = time.perf_counter()
+    for i, runs in enumerate(targets):
+        doc.add_comment(runs, text=f"[R{i % 30}] Comentário {i}", author="Revisor IA")
+        for run in runs:
+            run.font.underline = True
+            run.font.color.rgb = RGBColor(255, 0, 0)
+    elapsed = time.perf_counter() - start
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue(), elapsed
+
+
+def write_bulk(content: bytes, anchors) -> tuple[bytes, float]:
+    doc = Document(io.BytesIO(content))
+    targets = [_runs(doc, anchor) for anchor in anchors]
+    start = time.perf_counter()
+    writer = BulkCommentWriter(doc, author="Revisor IA")
+    for i, runs in enumerate(targets):
+        writer.add(runs, f"[R{i % 30}] Comentário {i}")
+    writer.flush()
+    elapsed = time.perf_counter() - start
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue(), elapsed
+
+
+def _part(content: bytes, name: str) -> str:
+    xml = zipfile.ZipFile(io.BytesIO(content)).read(name).decode("utf-8")
+    return re.sub(r'w:date="[^"]*"', "", xml)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da escrita de comentarios em lote")
+    parser.add_argument("--comments", type=int, default=600)
+    parser.add_argument("--paragraphs", type=int, default=400)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    content = build_document(args.paragraphs, args.seed)
+    anchors = pick_anchors(Document(io.BytesIO(content)), args.comments, args.seed)
+
+    old_output, old_time = write_one_by_one(content, anchors)
+    new_output, new_time = write_bulk(content, anchors)
+
+    identical = all(
+        _part(old_output, name) == _part(new_output, name)
+        for name in ("word/document.xml", "word/comments.xml")
+    )
+    print(f"Comentarios: {len(anchors)} em {args.paragraphs} paragrafos")
+    print(f"doc.add_comment por achado: {old_time * 1000:.1f} ms")
+    print(f"BulkCommentWriter:          {new_time * 1000:.1f} ms")
+    if new_time:
+        print(f"Ganho: {old_time / new_time:.1f}x")
+    print("XML identico (sem w:date):", "sim" if identical else "NAO")
+    if not identical:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
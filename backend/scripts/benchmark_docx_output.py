@@ -0,0 +1,136 @@
+"""Benchmark da gravacao do DOCX comentado: doc.save x copia crua dos membros do ZIP.
+
+Gera um contrato sintetico com imagens grandes (PNG de ruido, praticamente incompressivel),
+insere comentarios com o BulkCommentWriter e compara as duas formas de gravar:
+tempo, pico de memoria (tracemalloc) e tamanho. Confere tambem que os dois arquivos tem
+as mesmas partes e o mesmo document.xml/comments.xml.
+
+Uso:
+    python scripts/benchmark_docx_output.py [--images 6] [--image-kb 1500] [--compresslevel 6]
+"""
+import argparse
+import io
+import os
+import random
+import re
+import struct
+import sys
+import time
+import tracemalloc
+import zipfile
+import zlib
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from docx import Document  # noqa: E402
+from docx.shared import Cm  # noqa: E402
+
+from app.analysis.comment_writer import BulkCommentWriter  # noqa: E402
+from app.analysis.docx_package_writer import save_docx_reusing_source  # noqa: E402
+
+
+def _png(width: int, height: int) -> bytes:
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    rows = b''.join(b'\x00' + os.urandom(width * 3) for _ in range(height))
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) + chunk(b'IDAT', zlib.compress(rows, 1)) + chunk(b'IEND', b'')
+
+
+def build_document(images: int, image_kb: int, paragraphs: int, seed: int) -> bytes:
+    rnd = random.Random(seed)
+    side = max(16, int((image_kb * 1024 / 3) ** 0.5))
+    doc = Document()
+    for i in range(paragraphs):
+        if i % 25 == 0:
+            doc.add_paragraph(f"CLÁUSULA {i // 25 + 1} - DO OBJETO")
+        doc.add_paragraph(" ".join(rnd.choice(["contrato", "prazo", "valor", "multa", "pagamento"]) for _ in range(30)))
+        if images and i % max(1, paragraphs // images) == 0 and len(doc.inline_shapes) < images:
+            doc.add_picture(io.BytesIO(_png(side, side)), width=Cm(10))
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def comment_document(content: bytes, comments: int):
+    doc = Document(io.BytesIO(content))
+    paragraphs = [p for p in doc.paragraphs if p.runs]
+    writer = BulkCommentWriter(doc, author="Revisor IA")
+    for i in range(comments):
+        writer.add([paragraphs[i % len(paragraphs)].runs[0]], f"[R{i}] Comentário")
+    writer.flush()
+    return doc
+
+
+def _measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def _parts(content: bytes) -> dict[str, bytes]:
+    with zipfile.ZipFile(io.BytesIO(content)) as zf:
+        assert zf.testzip() is None
+        return {name: zf.read(name) for name in zf.namelist()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da gravacao do DOCX comentado")
+    parser.add_argument("--images", type=int, default=6)
+    parser.add_argument("--image-kb", type=int, default=1500)
+    parser.add_argument("--paragraphs", type=int, default=300)
+    parser.add_argument("--comments", type=int, default=200)
+    parser.add_argument("--compresslevel", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--repeat", type=int, default=3, help="Repeticoes (usa o menor tempo/pico)")
+    args = parser.parse_args()
+
+    content = build_document(args.images, args.image_kb, args.paragraphs, args.seed)
+    print(f"DOCX de origem: {len(content) / 1e6:.1f} MB, {args.images} imagens, {args.comments} comentarios")
+
+    def save_full(doc):
+        buffer = io.BytesIO()
+        doc.save(buffer)
+        return buffer.getvalue()
+
+    def save_reusing(doc):
+        return save_docx_reusing_source(doc, content, compresslevel=args.compresslevel)
+
+    # Mede apenas a gravacao; a abertura e a insercao dos comentarios sao iguais nos dois casos.
+    results = {}
+    for name, save in (("doc.save", save_full), ("copia crua do ZIP", save_reusing)):
+        runs = []
+        for _ in range(max(1, args.repeat)):
+            doc = comment_document(content, args.comments)
+            runs.append(_measure(lambda: save(doc)))
+        output = runs[0][0]
+        results[name] = (output, min(r[1] for r in runs), min(r[2] for r in runs))
+    old, old_time, old_peak = results["doc.save"]
+    new, new_time, new_peak = results["copia crua do ZIP"]
+
+    old_parts, new_parts = _parts(old), _parts(new)
+    same_members = sorted(old_parts) == sorted(new_parts)
+    strip_date = lambda xml: re.sub(rb'w:date="[^"]*"', b'', xml)  # noqa: E731
+    same_xml = all(
+        strip_date(old_parts.get(name, b'')) == strip_date(new_parts.get(name, b''))
+        for name in ("word/document.xml", "word/comments.xml")
+    )
+    Document(io.BytesIO(new))
+
+    print(f"{'':<22}{'tempo ms':>10}{'pico MB':>10}{'tamanho MB':>12}")
+    print(f"{'doc.save':<22}{old_time * 1000:>10.1f}{old_peak / 1e6:>10.1f}{len(old) / 1e6:>12.2f}")
+    print(f"{'copia crua do ZIP':<22}{new_time * 1000:>10.1f}{new_peak / 1e6:>10.1f}{len(new) / 1e6:>12.2f}")
+    print("Mesmas partes:", "sim" if same_members else "NAO")
+    print("document.xml/comments.xml identicos (sem w:date):", "sim" if same_xml else "NAO")
+    if not (same_members and same_xml):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Benchmark da extração de track changes/comentários em um contrato no formato do Word.
+
+Gera um DOCX parecido com o que o Word grava (rPr completo em cada run, rsids, bookmarks,
+proofErr) com uma fração pequena de inserções, exclusões e comentários, e mede para cada
+método de get_parser_rows o tempo e o pico de memória (tracemalloc).
+
+Uso:
+    python scripts/benchmark_extraction.py [--paragraphs 5000] [--change-rate 0.05] [--repeat 3]
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.analysis.extract_changes_csv import get_parser_rows  # noqa: E402
+
+METHODS = ['padrao', 'alternativo', 'hierarquico', 'hierarquico_filtrado', 'hierarquico_comentarios']
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+NSDECLS = f'xmlns:w="{W_NS}" xmlns:w14="http://schemas.microsoft.com/office/word/2010/wordml"'
+WORDS = (
+    "contrato prazo valor pagamento multa rescisão CONTRATADA CONTRATANTE serviço "
+    "vigência reajuste foro notificação garantia confidencialidade"
+).split()
+RUN_PROPERTIES = (
+    '<w:rPr><w:rFonts w:ascii="Arial" w:hAnsi="Arial" w:cs="Arial"/><w:color w:val="000000"/>'
+    '<w:sz w:val="22"/><w:szCs w:val="22"/><w:lang w:val="pt-BR"/></w:rPr>'
+)
+PARAGRAPH_PROPERTIES = (
+    '<w:pPr><w:spacing w:after="120" w:line="276" w:lineRule="auto"/><w:jc w:val="both"/>'
+    '<w:rPr><w:rFonts w:ascii="Arial" w:hAnsi="Arial"/></w:rPr></w:pPr>'
+)
+
+
+def _run(text: str, deleted: bool = False) -> str:
+    tag = 'w:delText' if deleted else 'w:t'
+    return (
+        f'<w:r w:rsidR="00A1B2C3" w:rsidRPr="00D4E5F6">{RUN_PROPERTIES}'
+        f'<{tag} xml:space="preserve">{text}</{tag}></w:r>'
+    )
+
+
+def build_document(path: Path, paragraphs: int, change_rate: float, seed: int) -> None:
+    rnd = random.Random(seed)
+    body, comments = [], []
+    for i in range(paragraphs):
+        content = []
+        for r in range(rnd.randint(2, 8)):
+            text = ' '.join(rnd.choice(WORDS) for _ in range(rnd.randint(2, 9))) + ' '
+            roll = rnd.random()
+            if roll < change_rate:
+                run = f'<w:ins w:id="{i}{r}" w:author="Ana" w:date="2024-01-01T00:00:00Z">{_run(text)}</w:ins>'
+            elif roll < 2 * change_rate:
+                run = f'<w:del w:id="{i}{r}" w:author="Bia" w:date="2024-01-01T00:00:00Z">{_run(text, True)}</w:del>'
+            elif roll < 2.3 * change_rate:
+                cid = len(comments) + 1
+                comments.append(cid)
+                run = (
+                    f'<w:commentRangeStart w:id="{cid}"/>{_run(text)}<w:commentRangeEnd w:id="{cid}"/>'
+                    f'<w:r><w:commentReference w:id="{cid}"/></w:r>'
+                )
+            else:
+                run = _run(text)
+            if rnd.random() < 0.1:
+                content.append('<w:proofErr w:type="spellStart"/>')
+            content.append(run)
+        body.append(
+            f'<w:p w:rsidR="00A1B2C3" w:rsidRDefault="00A1B2C3" w14:paraId="1A2B3C4D">{PARAGRAPH_PROPERTIES}'
+            f'<w:bookmarkStart w:id="{i}" w:name="_b{i}"/><w:bookmarkEnd w:id="{i}"/>{"".join(content)}</w:p>'
+        )
+    document = (
+        f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><w:document {NSDECLS}><w:body>'
+        f'{"".join(body)}<w:sectPr/></w:body></w:document>'
+    )
+    comments_xml = f'<w:comments {NSDECLS}>' + ''.join(
+        f'<w:comment w:id="{cid}" w:author="Revisor" w:date="2024-01-01T00:00:00Z">'
+        f'<w:p><w:r><w:t>Comentário {cid}</w:t></w:r></w:p></w:comment>'
+        for cid in comments
+    ) + '</w:comments>'
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('word/document.xml', document)
+        zf.writestr('word/comments.xml', comments_xml)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da extração de track changes/comentários")
+    parser.add_argument("--paragraphs", type=int, default=5000)
+    parser.add_argument("--change-rate", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3, help="Repeticoes (usa o menor tempo)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'contrato.docx'
+        build_document(path, args.paragraphs, args.change_rate, args.seed)
+        print(f"DOCX: {args.paragraphs} paragrafos, {path.stat().st_size / 1e3:.0f} KB comprimido")
+        print(f"{'metodo':<26}{'linhas':>8}{'tempo s':>10}{'pico MB':>10}")
+        for method in METHODS:
+            # Tempo e memória em execuções separadas: o tracemalloc deixa o Python mais lento.
+            times = []
+            for _ in range(max(1, args.repeat)):
+                start = time.perf_counter()
+                rows = get_parser_rows(str(path), path.name, method)
+                times.append(time.perf_counter() - start)
+            tracemalloc.start()
+            get_parser_rows(str(path), path.name, method)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{method:<26}{len(rows):>8}{min(times):>10.3f}{peak / 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
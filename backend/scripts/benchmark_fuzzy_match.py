@@ -0,0 +1,164 @@
+"""Benchmark do localizador aproximado de trechos (n-gramas x SequenceMatcher).
+
+Gera, de forma deterministica, paragrafos longos de clausulas e trechos no estilo devolvido
+pelo LLM (erros de digitacao, acentos removidos, sinonimos, pontuacao alterada, palavras
+omitidas). Compara a taxa de acerto (mesma regra de aceitacao: bloco >= 3 caracteres e
+cobertura >= 60%), a concordancia com o SequenceMatcher e o tempo total.
+
+Uso:
+    python scripts/benchmark_fuzzy_match.py [--snippets 2000] [--paragraph-chars 3000] [--seed 7]
+"""
+import argparse
+import random
+import sys
+import time
+from difflib import SequenceMatcher
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.analysis.doc_parser import normalize_visible_text  # noqa: E402
+from app.analysis.docx_comments import _min_fuzzy_size  # noqa: E402
+from app.analysis.fuzzy_match import QGramIndex, find_longest_block  # noqa: E402
+
+SENTENCES = [
+    "A CONTRATADA obriga-se a prestar os serviços descritos no Anexo I com zelo e diligência.",
+    "O valor total do contrato é de R$ 100.000,00 (cem mil reais), pago em parcelas mensais.",
+    "Em caso de atraso, incidirá multa compensatória de 2% (dois por cento) sobre o valor devido.",
+    "O presente contrato vigorará pelo prazo de 12 (doze) meses a contar da data de assinatura.",
+    "Qualquer das partes poderá rescindir o contrato mediante aviso prévio de 30 (trinta) dias.",
+    "As partes elegem o foro da Comarca de São Paulo para dirimir quaisquer controvérsias.",
+    "A CONTRATANTE poderá reter pagamentos até a regularização das pendências apontadas.",
+    "Os dados pessoais serão tratados em conformidade com a Lei nº 13.709/2018 (LGPD).",
+    "A CONTRATADA responderá pelos vícios dos serviços pelo prazo de 90 (noventa) dias.",
+    "Fica vedada a cessão ou transferência deste contrato sem anuência prévia e por escrito.",
+    "Os reajustes observarão a variação do IPCA acumulada nos últimos 12 (doze) meses.",
+    "A nota fiscal deverá ser emitida até o 5º (quinto) dia útil do mês subsequente.",
+]
+
+SYNONYMS = {
+    "obriga-se": "compromete-se",
+    "prazo": "período",
+    "poderá": "pode",
+    "valor": "montante",
+    "contrato": "instrumento",
+    "partes": "contratantes",
+    "deverá": "precisa",
+}
+
+ACCENTS = str.maketrans("áàâãéêíóôõúçÁÀÂÃÉÊÍÓÔÕÚÇ", "aaaaeeioooucAAAAEEIOOOUC")
+
+
+def _typo(text: str, rnd: random.Random, count: int) -> str:
+    chars = list(text)
+    for _ in range(count):
+        if not chars:
+            break
+        pos = rnd.randrange(len(chars))
+        op = rnd.choice(("swap", "drop", "replace"))
+        if op == "swap" and pos + 1 < len(chars):
+            chars[pos], chars[pos + 1] = chars[pos + 1], chars[pos]
+        elif op == "drop":
+            del chars[pos]
+        else:
+            chars[pos] = rnd.choice("abcdefghijklmnopqrstuvwxyz")
+    return "".join(chars)
+
+
+def _paraphrase(text: str, rnd: random.Random) -> str:
+    words = text.split()
+    for i, word in enumerate(words):
+        if word in SYNONYMS and rnd.random() < 0.7:
+            words[i] = SYNONYMS[word]
+    if len(words) > 6 and rnd.random() < 0.5:
+        del words[rnd.randrange(1, len(words) - 1)]
+    return " ".join(words)
+
+
+TRANSFORMS = {
+    "exato": lambda s, r: s,
+    "typo_1": lambda s, r: _typo(s, r, 1),
+    "typo_3": lambda s, r: _typo(s, r, 3),
+    "sem_acentos": lambda s, r: s.translate(ACCENTS),
+    "parafrase": _paraphrase,
+    "pontuacao": lambda s, r: s.replace(",", ";").replace(".", ""),
+    "estendido": lambda s, r: s + " conforme previsto neste instrumento",
+}
+
+
+def build_dataset(n_snippets: int, paragraph_chars: int, seed: int):
+    rnd = random.Random(seed)
+    paragraphs = []
+    for _ in range(max(1, n_snippets // 20)):
+        parts = []
+        while sum(len(p) + 1 for p in parts) < paragraph_chars:
+            parts.append(rnd.choice(SENTENCES))
+        paragraphs.append(normalize_visible_text(" ".join(parts)))
+
+    cases = []
+    names = list(TRANSFORMS)
+    for i in range(n_snippets):
+        paragraph = paragraphs[i % len(paragraphs)]
+        length = rnd.randint(15, 160)
+        start = rnd.randrange(0, max(1, len(paragraph) - length))
+        kind = names[i % len(names)]
+        snippet = normalize_visible_text(TRANSFORMS[kind](paragraph[start:start + length], rnd))
+        if snippet:
+            cases.append((kind, paragraph, snippet))
+    return cases
+
+
+def _baseline(text: str, snippet: str):
+    match = SequenceMatcher(None, text, snippet, autojunk=False).find_longest_match(0, len(text), 0, len(snippet))
+    if match.size >= max(3, len(snippet) // 5) and match.size / len(snippet) >= 0.6:
+        return match.a, match.size
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do localizador aproximado")
+    parser.add_argument("--snippets", type=int, default=2000)
+    parser.add_argument("--paragraph-chars", type=int, default=3000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    cases = build_dataset(args.snippets, args.paragraph_chars, args.seed)
+    # Em producao o indice de n-gramas fica no ParagraphIndex (um por paragrafo).
+    indexes = {}
+
+    stats = {}
+    total_old = total_new = 0.0
+    for kind, paragraph, snippet in cases:
+        start = time.perf_counter()
+        old = _baseline(paragraph, snippet)
+        total_old += time.perf_counter() - start
+
+        start = time.perf_counter()
+        index = indexes.get(paragraph)
+        if index is None:
+            index = indexes[paragraph] = QGramIndex(paragraph)
+        block = find_longest_block(paragraph, snippet, _min_fuzzy_size(len(snippet)), index=index)
+        new = (block.a, block.size) if block else None
+        total_new += time.perf_counter() - start
+
+        entry = stats.setdefault(kind, {"casos": 0, "acerto_old": 0, "acerto_new": 0, "iguais": 0})
+        entry["casos"] += 1
+        entry["acerto_old"] += old is not None
+        entry["acerto_new"] += new is not None
+        entry["iguais"] += old == new
+
+    print(f"{'tipo':<14}{'casos':>7}{'acerto seqm':>13}{'acerto ngram':>14}{'concordancia':>14}")
+    for kind, entry in stats.items():
+        n = entry["casos"]
+        print(
+            f"{kind:<14}{n:>7}{entry['acerto_old'] / n:>13.1%}{entry['acerto_new'] / n:>14.1%}"
+            f"{entry['iguais'] / n:>14.1%}"
+        )
+    print(f"\nTempo SequenceMatcher: {total_old * 1000:.1f} ms")
+    print(f"Tempo n-gramas:        {total_new * 1000:.1f} ms (inclui construção de {len(indexes)} índices)")
+    if total_new:
+        print(f"Ganho: {total_old / total_new:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Benchmark offline da busca lexical (BM25) e híbrida do RAG, sem provedor de embeddings.
+
+Gera N parágrafos sintéticos com vocabulário de contrato (frequências tipo Zipf), monta o
+BM25Index e mede a montagem e a consulta (mediana). Cada consulta usa 4 termos de um parágrafo
+sorteado, e o recall@k confere que esse parágrafo volta entre os k primeiros. O modo híbrido
+usa DeterministicFakeEmbedding (vetores determinísticos por texto) no lugar do Azure.
+
+Uso:
+    python scripts/benchmark_retrieval.py [--paragraphs 1000 10000 100000] [--queries 200] [--k 5]
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from langchain_core.embeddings import DeterministicFakeEmbedding  # noqa: E402
+
+from app.services.lexical_index import BM25Index, hybrid_scores, rank, tokenize  # noqa: E402
+from app.services.similarity import VectorScorer  # noqa: E402
+
+BASE_TERMS = (
+    "contratante contratada prazo pagamento multa rescisão garantia cláusula vigência reajuste índice "
+    "notificação foro confidencialidade indenização responsabilidade seguro fornecimento entrega "
+    "aceite medição fatura juros mora penalidade subcontratação cessão sigilo dados pessoais "
+    "auditoria obrigação rescindir aditivo escopo serviço preço tributo retenção caução"
+).split()
+
+
+def build_vocabulary(size: int, rng: random.Random) -> list[str]:
+    vocab = list(BASE_TERMS)
+    while len(vocab) < size:
+        vocab.append("".join(rng.choice("abcdefghijlmnoprstuv") for _ in range(rng.randint(5, 11))))
+    return vocab
+
+
+def build_paragraphs(n: int, vocab: list[str], rng: random.Random) -> list[str]:
+    weights = [1 / (rank_ + 1) for rank_ in range(len(vocab))]
+    return [" ".join(rng.choices(vocab, weights=weights, k=rng.randint(15, 60))) for _ in range(n)]
+
+
+def _median_ms(timings: list[float]) -> float:
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark offline de busca lexical/híbrida")
+    parser.add_argument("--paragraphs", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--vocab", type=int, default=20_000)
+    parser.add_argument("--dim", type=int, default=256, help="Dimensão dos embeddings falsos (modo híbrido)")
+    parser.add_argument("--hybrid-max", type=int, default=10_000, help="Maior corpus embutido no modo híbrido")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    vocab = build_vocabulary(args.vocab, rng)
+    print(f"{'parágrafos':>10} {'termos':>8} {'montagem ms':>12} {'lexical ms':>11} {'recall@k':>9} "
+          f"{'híbrido ms':>11} {'recall@k':>9}")
+    for n in args.paragraphs:
+        paragraphs = build_paragraphs(n, vocab, rng)
+        start = time.perf_counter()
+        index = BM25Index(paragraphs)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        queries = []
+        for _ in range(args.queries):
+            target = rng.randrange(n)
+            terms = tokenize(paragraphs[target])
+            queries.append((target, " ".join(rng.sample(terms, min(4, len(terms))))))
+
+        timings, hits = [], 0
+        for target, query in queries:
+            start = time.perf_counter()
+            top = index.top_k(query, args.k)
+            timings.append(time.perf_counter() - start)
+            hits += any(i == target for i, _ in top)
+        lexical_ms, lexical_recall = _median_ms(timings), hits / len(queries)
+
+        hybrid_col = f"{'-':>11} {'-':>9}"
+        if n <= args.hybrid_max:
+            fake = DeterministicFakeEmbedding(size=args.dim)
+            scorer = VectorScorer(fake.embed_documents(paragraphs))
+            timings, hits = [], 0
+            for target, query in queries:
+                query_vec = fake.embed_query(query)
+                start = time.perf_counter()
+                fused = hybrid_scores(scorer.scores(query_vec), index.scores(query))
+                top = rank(fused, args.k)
+                timings.append(time.perf_counter() - start)
+                hits += any(i == target for i, _ in top)
+            hybrid_col = f"{_median_ms(timings):11.3f} {hits / len(queries):9.2f}"
+
+        print(f"{n:>10} {index.vocabulary_size:>8} {build_ms:12.0f} {lexical_ms:11.3f} {lexical_recall:9.2f} "
+              f"{hybrid_col}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
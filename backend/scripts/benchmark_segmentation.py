@@ -0,0 +1,163 @@
+"""Compara estratégias de segmentação sobre uma pasta de DOCX.
+
+Para cada estratégia registrada em SEGMENTATION_STRATEGIES, reporta segmentos por documento
+(= chamadas ao LLM), distribuição de tokens estimados por segmento, tempo de parse e, quando
+houver gabarito, a concordância das fronteiras de cláusula com a segmentação rotulada.
+
+Gabarito: `<pasta_gold>/<nome_do_docx_sem_extensao>.json` com
+    {"fronteiras": [2, 7, 15, ...]}
+onde cada número é o índice (ordem de iter_document_paragraphs) do primeiro parágrafo de um segmento.
+Use --write-gold <estrategia> para gerar um gabarito inicial a ser corrigido manualmente.
+
+Uso:
+    python scripts/benchmark_segmentation.py <pasta_docx> [--gold <pasta>] [--strategies padrao,estrutural] [--json saida.json]
+"""
+import argparse
+import io
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from docx import Document  # noqa: E402
+
+from app.analysis.doc_parser import SEGMENTATION_STRATEGIES, build_segments  # noqa: E402
+
+
+def _boundaries(segments) -> set[int]:
+    return {seg.paragraph_indices[0] for seg in segments if len(seg) and seg.paragraph_indices[0] >= 0}
+
+
+def _agreement(predicted: set[int], gold: set[int]) -> dict:
+    hits = len(predicted & gold)
+    precision = hits / len(predicted) if predicted else 0.0
+    recall = hits / len(gold) if gold else 0.0
+    f1 = (2 * precision * recall / (precision + recall)) if (precision + recall) else 0.0
+    return {"precisao": precision, "recall": recall, "f1": f1, "fronteiras_perdidas": sorted(gold - predicted)}
+
+
+def _percentile(values: list[int], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    pos = min(len(ordered) - 1, max(0, int(round(pct * (len(ordered) - 1)))))
+    return float(ordered[pos])
+
+
+def _load_gold(gold_dir: Path | None, docx_path: Path) -> set[int] | None:
+    if gold_dir is None:
+        return None
+    gold_file = gold_dir / f"{docx_path.stem}.json"
+    if not gold_file.exists():
+        return None
+    data = json.loads(gold_file.read_text(encoding="utf-8"))
+    return set(int(i) for i in data.get("fronteiras", []))
+
+
+def run_benchmark(files: list[Path], strategies: list[str], gold_dir: Path | None = None, repeat: int = 1) -> list[dict]:
+    results = []
+    for name in strategies:
+        per_doc = []
+        all_tokens: list[int] = []
+        for path in files:
+            content = path.read_bytes()
+            elapsed = []
+            segments = []
+            for _ in range(max(1, repeat)):
+                start = time.perf_counter()
+                doc = Document(io.BytesIO(content))
+                segments = build_segments(doc, name)
+                elapsed.append(time.perf_counter() - start)
+            tokens = [seg.token_estimate for seg in segments]
+            all_tokens.extend(tokens)
+            doc_result = {
+                "arquivo": path.name,
+                "segmentos": len(segments),
+                "tokens_total": sum(tokens),
+                "tempo_ms": min(elapsed) * 1000.0,
+            }
+            gold = _load_gold(gold_dir, path)
+            if gold is not None:
+                doc_result["concordancia"] = _agreement(_boundaries(segments), gold)
+            per_doc.append(doc_result)
+
+        with_gold = [d["concordancia"] for d in per_doc if "concordancia" in d]
+        results.append({
+            "estrategia": name,
+            "documentos": len(per_doc),
+            "segmentos_total": sum(d["segmentos"] for d in per_doc),
+            "segmentos_por_doc": statistics.mean(d["segmentos"] for d in per_doc) if per_doc else 0.0,
+            "tokens_por_segmento": {
+                "min": min(all_tokens) if all_tokens else 0,
+                "mediana": statistics.median(all_tokens) if all_tokens else 0,
+                "p90": _percentile(all_tokens, 0.9),
+                "max": max(all_tokens) if all_tokens else 0,
+            },
+            "tempo_ms_total": sum(d["tempo_ms"] for d in per_doc),
+            "f1_medio": statistics.mean(c["f1"] for c in with_gold) if with_gold else None,
+            "recall_medio": statistics.mean(c["recall"] for c in with_gold) if with_gold else None,
+            "por_documento": per_doc,
+        })
+    return results
+
+
+def write_gold(files: list[Path], strategy: str, gold_dir: Path) -> None:
+    gold_dir.mkdir(parents=True, exist_ok=True)
+    for path in files:
+        segments = build_segments(Document(str(path)), strategy)
+        payload = {
+            "estrategia_origem": strategy,
+            "fronteiras": sorted(_boundaries(segments)),
+            "titulos": [seg.title for seg in segments],
+        }
+        (gold_dir / f"{path.stem}.json").write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+        print("Gabarito gerado:", gold_dir / f"{path.stem}.json")
+
+
+def print_report(results: list[dict]) -> None:
+    header = f"{'estrategia':<24}{'seg/doc':>9}{'seg tot':>9}{'tok med':>9}{'tok p90':>9}{'tok max':>9}{'tempo ms':>11}{'F1':>7}{'recall':>8}"
+    print(header)
+    print('-' * len(header))
+    for r in results:
+        tok = r["tokens_por_segmento"]
+        f1 = f"{r['f1_medio']:.3f}" if r["f1_medio"] is not None else "-"
+        rec = f"{r['recall_medio']:.3f}" if r["recall_medio"] is not None else "-"
+        print(
+            f"{r['estrategia']:<24}{r['segmentos_por_doc']:>9.1f}{r['segmentos_total']:>9}"
+            f"{tok['mediana']:>9.0f}{tok['p90']:>9.0f}{tok['max']:>9}{r['tempo_ms_total']:>11.1f}{f1:>7}{rec:>8}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de estratégias de segmentação")
+    parser.add_argument("pasta", type=Path)
+    parser.add_argument("--gold", type=Path, default=None, help="Pasta com gabaritos <nome>.json")
+    parser.add_argument("--strategies", default="", help="Lista separada por vírgula (padrão: todas)")
+    parser.add_argument("--repeat", type=int, default=1, help="Repetições por documento (usa o menor tempo)")
+    parser.add_argument("--json", type=Path, default=None, help="Salva o relatório completo em JSON")
+    parser.add_argument("--write-gold", default="", help="Gera gabaritos iniciais a partir desta estratégia")
+    args = parser.parse_args()
+
+    files = sorted(p for p in args.pasta.rglob("*.docx") if not p.name.startswith("~$"))
+    if not files:
+        print("Nenhum DOCX encontrado em", args.pasta)
+        sys.exit(1)
+
+    if args.write_gold:
+        write_gold(files, args.write_gold, args.gold or (args.pasta / "gold"))
+        return
+
+    strategies = [s.strip() for s in args.strategies.split(",") if s.strip()] or list(SEGMENTATION_STRATEGIES)
+    results = run_benchmark(files, strategies, args.gold, args.repeat)
+    print_report(results)
+
+    if args.json:
+        args.json.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+        print("Relatório salvo em", args.json)
+
+
+if __name__ == "__main__":
+    main()
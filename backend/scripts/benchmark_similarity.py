@@ -0,0 +1,94 @@
+"""Benchmark do ranqueamento do /rag-context: cosseno em Python puro x VectorScorer (NumPy).
+
+Gera vetores aleatórios na dimensão do ada-002, mede a montagem da matriz normalizada e a consulta
+top-k (mediana de várias repetições) e confere que os k índices coincidem com o cálculo antigo.
+O Python puro (laço + sort da lista inteira) só roda até --python-max vetores. Tamanhos cuja matriz
+float32 passaria de --max-gb são pulados (1M x 1536 ocupa ~6 GB; use --dim menor em máquinas
+com pouca memória).
+
+Uso:
+    python scripts/benchmark_similarity.py [--sizes 10000 100000 1000000] [--dim 1536] [--k 5]
+        [--python-max 10000] [--max-gb 4]
+"""
+import argparse
+import math
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.similarity import VectorScorer  # noqa: E402
+
+
+def python_top_k(query_vec, vectors, k):
+    # Mesmo algoritmo que o /rag-context usava antes do VectorScorer
+    q_norm = math.sqrt(sum(v * v for v in query_vec)) or 1e-9
+    scored = []
+    for i, vec in enumerate(vectors):
+        v_norm = math.sqrt(sum(x * x for x in vec)) or 1e-9
+        dot = sum(a * b for a, b in zip(query_vec, vec))
+        scored.append((dot / (q_norm * v_norm), i))
+    scored.sort(key=lambda t: t[0], reverse=True)
+    return [i for _, i in scored[:k]]
+
+
+def _median_ms(fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de similaridade/top-k do RAG")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--python-max", type=int, default=10_000)
+    parser.add_argument("--max-gb", type=float, default=4.0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    print(f"dim={args.dim} k={args.k}")
+    print(f"{'vetores':>10} {'matriz MB':>10} {'montagem ms':>12} {'consulta ms':>12} {'python ms':>12} {'ganho':>8}")
+    for n in args.sizes:
+        size_gb = n * args.dim * 4 / 1024 ** 3
+        if size_gb > args.max_gb:
+            print(f"{n:>10} pulado: matriz de {size_gb:.1f} GB > --max-gb {args.max_gb}")
+            continue
+        vectors = rng.standard_normal((n, args.dim), dtype=np.float32)
+        query = rng.standard_normal(args.dim, dtype=np.float32)
+
+        start = time.perf_counter()
+        scorer = VectorScorer(vectors)
+        build_ms = (time.perf_counter() - start) * 1000
+        del vectors
+        query_ms = _median_ms(lambda: scorer.top_k(query, args.k), args.repeats)
+
+        python_ms = None
+        if n <= args.python_max:
+            vectors_list = (scorer.matrix * scorer.norms[:, None]).tolist()
+            query_list = query.tolist()
+            start = time.perf_counter()
+            expected = python_top_k(query_list, vectors_list, args.k)
+            python_ms = (time.perf_counter() - start) * 1000
+            got = [i for i, _ in scorer.top_k(query, args.k)]
+            if got != expected:
+                raise SystemExit(f"Top-k divergente em n={n}: {got} != {expected}")
+
+        python_col = f"{python_ms:12.1f}" if python_ms is not None else f"{'-':>12}"
+        gain_col = f"{python_ms / query_ms:7.0f}x" if python_ms is not None else f"{'-':>8}"
+        print(f"{n:>10} {scorer.matrix.nbytes / 1024 ** 2:10.0f} {build_ms:12.1f} {query_ms:12.2f} "
+              f"{python_col} {gain_col}", flush=True)
+        del scorer
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Exporta um corpus de DOCX revisados para Parquet (app/analysis/change_corpus.py) e lê de volta.
+
+Uso:
+    python scripts/export_change_corpus.py exportar <pasta_docx> <saida.parquet> [--method hierarquico_comentarios]
+    python scripts/export_change_corpus.py ler <corpus.parquet> [--colunas texto,comentario] [--tipo Comentário] [--autor Ana]
+
+Requer pyarrow.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.analysis.change_corpus import DEFAULT_CORPUS_METHOD, load_change_corpus, write_change_corpus  # noqa: E402
+
+
+def exportar(args):
+    paths = sorted(p for p in args.pasta_docx.rglob('*.docx') if not p.name.startswith('~$'))
+    start = time.perf_counter()
+    total = write_change_corpus(((str(p), p.name) for p in paths), str(args.saida), method=args.method)
+    elapsed = time.perf_counter() - start
+    size_kb = args.saida.stat().st_size / 1024
+    print(f"{len(paths)} DOCX -> {total} linhas em {args.saida} ({size_kb:.0f} KB, {elapsed:.2f} s)")
+
+
+def ler(args):
+    filters = []
+    if args.tipo:
+        filters.append(('tipo', '=', args.tipo))
+    if args.autor:
+        filters.append(('autor', '=', args.autor))
+    columns = [c.strip() for c in args.colunas.split(',')] if args.colunas else None
+    start = time.perf_counter()
+    table = load_change_corpus(str(args.corpus), columns=columns, filters=filters or None)
+    elapsed = time.perf_counter() - start
+    print(f"{table.num_rows} linhas, colunas {table.column_names} ({elapsed * 1000:.1f} ms)")
+    print(table.slice(0, 5).to_pylist())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Corpus colunar das alterações extraídas")
+    sub = parser.add_subparsers(dest='modo', required=True)
+    p_exp = sub.add_parser('exportar')
+    p_exp.add_argument('pasta_docx', type=Path)
+    p_exp.add_argument('saida', type=Path)
+    p_exp.add_argument('--method', default=DEFAULT_CORPUS_METHOD)
+    p_exp.set_defaults(func=exportar)
+    p_ler = sub.add_parser('ler')
+    p_ler.add_argument('corpus', type=Path)
+    p_ler.add_argument('--colunas', default='')
+    p_ler.add_argument('--tipo', default='')
+    p_ler.add_argument('--autor', default='')
+    p_ler.set_defaults(func=ler)
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,368 @@
+"""Extração de track changes/comentários de um acervo inteiro de DOCX, com retomada.
+
+Percorre a pasta (recursivamente), extrai cada DOCX em um pool de processos e grava as linhas em
+shards (NDJSON, CSV ou Parquet) na pasta de saída. O manifest.jsonl registra cada arquivo como
+done, failed ou skipped; ao rodar de novo com a mesma saída, os arquivos já concluídos (mesmo
+caminho, tamanho e data de modificação) são pulados. As entradas de um shard vão para o manifest
+(com fsync) antes do rename do arquivo temporário do shard; entradas cujo shard não existe são
+ignoradas, então uma interrupção perde no máximo o shard em andamento, que é refeito na próxima
+execução, e os números de shard nunca são reaproveitados. Um arquivo alterado depois de extraído
+é extraído de novo; ao fim de cada execução, as linhas antigas dele são apagadas dos shards
+anteriores (registrado no manifest como limpeza). Um DOCX que derruba o processo do worker é
+isolado, registrado como failed, e o pool é recriado. Método e formato ficam em run.json e não
+podem mudar entre execuções.
+
+Uso:
+    python scripts/extract_corpus.py <pasta_docx> <pasta_saida> [--method hierarquico_comentarios]
+        [--format ndjson|csv|parquet] [--workers N] [--shard-rows 100000] [--retry-failed]
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.analysis.change_corpus import CORPUS_METHODS, is_corpus_method  # noqa: E402
+from app.analysis.extract_changes_csv import get_csv_columns, get_parser_rows  # noqa: E402
+
+MANIFEST_NAME = 'manifest.jsonl'
+RUN_CONFIG_NAME = 'run.json'
+FORMATS = {'ndjson': '.ndjson', 'csv': '.csv', 'parquet': '.parquet'}
+
+
+def _extract(path: str, rel: str, method: str) -> tuple[str, list, str, float]:
+    start = time.perf_counter()
+    try:
+        rows = get_parser_rows(path, rel, method=method)
+        return rel, rows, '', (time.perf_counter() - start) * 1000
+    except Exception as e:
+        return rel, [], f"{type(e).__name__}: {e}", (time.perf_counter() - start) * 1000
+
+
+def _extract_isolated(item: tuple[Path, str, dict], method: str) -> tuple[str, list, str, float]:
+    """Extrai um arquivo em um processo só dele: se o processo morrer, só este arquivo falha."""
+    path, rel, _ = item
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=1) as solo:
+        try:
+            return solo.submit(_extract, str(path), rel, method).result()
+        except BrokenProcessPool:
+            erro = 'BrokenProcessPool: processo do worker encerrado durante a extração (memória ou falha nativa)'
+            return rel, [], erro, (time.perf_counter() - start) * 1000
+
+
+def _fingerprint(path: Path) -> dict:
+    stat = path.stat()
+    return {'tamanho': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _shard_number(shard_name: str) -> int:
+    return int(shard_name.split('_')[1].split('.')[0])
+
+
+@dataclass
+class ManifestState:
+    entries: dict[str, dict] = field(default_factory=dict)  # última entrada válida de cada arquivo
+    stale: dict[str, set[str]] = field(default_factory=dict)  # shard -> arquivos com linhas substituídas
+    last_shard: int = -1  # maior número de shard já citado (gravado ou não)
+
+
+def load_manifest(output_dir: Path) -> ManifestState:
+    """Estado do manifest (só recebe acréscimos): última entrada de cada arquivo e linhas obsoletas.
+
+    Entradas que apontam para um shard inexistente (interrupção antes do rename) são ignoradas.
+    """
+    state = ManifestState()
+    manifest_path = output_dir / MANIFEST_NAME
+    if not manifest_path.exists():
+        return state
+    history = []
+    cleaned = set()
+    with open(manifest_path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # última linha truncada por uma interrupção
+            shard = entry.get('shard') or entry.get('limpeza')
+            if shard:
+                state.last_shard = max(state.last_shard, _shard_number(shard))
+            if 'limpeza' in entry:
+                cleaned.update((arquivo, entry['limpeza']) for arquivo in entry['arquivos'])
+                continue
+            if entry.get('shard') and not (output_dir / entry['shard']).exists():
+                continue
+            state.entries[entry['arquivo']] = entry
+            history.append(entry)
+    for entry in history:
+        pair = (entry['arquivo'], entry.get('shard'))
+        if pair[1] and state.entries[pair[0]] is not entry and pair not in cleaned:
+            state.stale.setdefault(pair[1], set()).add(pair[0])
+    return state
+
+
+def _shard_tmp(path: Path) -> Path:
+    return path.with_suffix(path.suffix + '.tmp')
+
+
+def _write_shard(path: Path, rows: list, fmt: str, method: str, rename: bool = True) -> None:
+    tmp = _shard_tmp(path)
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        from app.analysis.change_corpus import rows_to_table
+        pq.write_table(rows_to_table(rows), tmp, compression='zstd')
+    elif fmt == 'csv':
+        with open(tmp, 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.DictWriter(f, fieldnames=get_csv_columns(method), quoting=csv.QUOTE_ALL)
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        with open(tmp, 'w', encoding='utf-8') as f:
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False))
+                f.write('\n')
+    if rename:
+        os.replace(tmp, path)
+
+
+def _drop_rows(path: Path, arquivos: set[str], fmt: str, method: str) -> int:
+    """Regrava o shard sem as linhas dos arquivos indicados; retorna quantas linhas saíram."""
+    if fmt == 'parquet':
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.parquet as pq
+        table = pq.read_table(path)
+        names = pc.cast(table['arquivo'], pa.string())
+        kept = table.filter(pc.invert(pc.is_in(names, value_set=pa.array(sorted(arquivos)))))
+        removed = table.num_rows - kept.num_rows
+        if removed:
+            pq.write_table(kept, _shard_tmp(path), compression='zstd')
+            os.replace(_shard_tmp(path), path)
+        return removed
+    if fmt == 'csv':
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            rows = list(csv.DictReader(f))
+    else:
+        with open(path, encoding='utf-8') as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+    kept = [row for row in rows if row.get('Nome_arquivo') not in arquivos]
+    if len(kept) != len(rows):
+        _write_shard(path, kept, fmt, method)
+    return len(rows) - len(kept)
+
+
+class CorpusRun:
+    def __init__(self, output_dir: Path, fmt: str, method: str, shard_rows: int, last_shard: int):
+        self.output_dir = output_dir
+        self.fmt = fmt
+        self.method = method
+        self.shard_rows = shard_rows
+        # Shard interrompido antes do rename: o temporário é descartado e o número não é reusado.
+        for tmp in output_dir.glob('shard_*.tmp'):
+            tmp.unlink()
+        existing = [_shard_number(path.name) for path in output_dir.glob(f'shard_*{FORMATS[fmt]}')]
+        self.next_shard = max(existing + [last_shard]) + 1
+        self.manifest = open(output_dir / MANIFEST_NAME, 'a', encoding='utf-8')
+        self.buffer_rows = []
+        self.buffer_entries = []
+
+    def _log(self, entry: dict) -> None:
+        self.manifest.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+    def _sync(self) -> None:
+        self.manifest.flush()
+        os.fsync(self.manifest.fileno())
+
+    def record(self, entry: dict, rows: list) -> None:
+        if entry['status'] != 'done' or not rows:
+            # Falha, arquivo ignorado ou sem linhas: nada a gravar em shard.
+            entry['shard'] = None
+            self._log(entry)
+            return
+        self.buffer_rows.extend(rows)
+        self.buffer_entries.append(entry)
+        if len(self.buffer_rows) >= self.shard_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.buffer_entries:
+            shard_name = f'shard_{self.next_shard:05d}{FORMATS[self.fmt]}'
+            shard_path = self.output_dir / shard_name
+            _write_shard(shard_path, self.buffer_rows, self.fmt, self.method, rename=False)
+            self.next_shard += 1
+            # Manifest antes do rename: sem o shard, as entradas são ignoradas na retomada.
+            for entry in self.buffer_entries:
+                entry['shard'] = shard_name
+                self._log(entry)
+            self._sync()
+            os.replace(_shard_tmp(shard_path), shard_path)
+            self.buffer_rows = []
+            self.buffer_entries = []
+        self._sync()
+
+    def purge_stale(self) -> int:
+        """Apaga dos shards as linhas de arquivos extraídos de novo (ou que passaram a falhar)."""
+        self.flush()
+        removed = 0
+        for shard_name, arquivos in sorted(load_manifest(self.output_dir).stale.items()):
+            removed += _drop_rows(self.output_dir / shard_name, arquivos, self.fmt, self.method)
+            self._log({'limpeza': shard_name, 'arquivos': sorted(arquivos)})
+            self._sync()
+        return removed
+
+    def close(self) -> None:
+        self.flush()
+        self.manifest.close()
+
+
+def _format_eta(seconds: float) -> str:
+    seconds = int(seconds)
+    return f'{seconds // 3600:d}h{seconds % 3600 // 60:02d}m{seconds % 60:02d}s'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Extração de alterações de um acervo de DOCX, com retomada')
+    parser.add_argument('pasta_docx', type=Path)
+    parser.add_argument('pasta_saida', type=Path)
+    parser.add_argument('--method', default='hierarquico_comentarios')
+    parser.add_argument('--format', choices=list(FORMATS), default='ndjson')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--shard-rows', type=int, default=100_000)
+    parser.add_argument('--retry-failed', action='store_true', help='Tenta de novo os arquivos que falharam')
+    parser.add_argument('--progress-every', type=float, default=5.0, help='Segundos entre linhas de progresso')
+    args = parser.parse_args()
+
+    if args.format == 'parquet' and not is_corpus_method(args.method):
+        parser.error(f"--format parquet exige um método hierárquico ({', '.join(CORPUS_METHODS)})")
+    args.pasta_saida.mkdir(parents=True, exist_ok=True)
+    config_path = args.pasta_saida / RUN_CONFIG_NAME
+    config = {'method': args.method, 'format': args.format}
+    if config_path.exists():
+        previous_config = json.loads(config_path.read_text(encoding='utf-8'))
+        if previous_config != config:
+            parser.error(f'{args.pasta_saida} foi gerada com {previous_config}; use outra pasta de saída')
+    else:
+        config_path.write_text(json.dumps(config) + '\n', encoding='utf-8')
+    state = load_manifest(args.pasta_saida)
+    manifest = state.entries
+    run = CorpusRun(args.pasta_saida, args.format, args.method, args.shard_rows, state.last_shard)
+
+    pending = []
+    skipped = already_done = 0
+    for path in sorted(args.pasta_docx.rglob('*.docx')):
+        rel = path.relative_to(args.pasta_docx).as_posix()
+        if path.name.startswith('~$'):
+            # Arquivo de lock do Word, não é um documento.
+            if rel not in manifest:
+                run.record({'arquivo': rel, 'status': 'skipped', 'motivo': 'arquivo temporário do Word'}, [])
+            skipped += 1
+            continue
+        fingerprint = _fingerprint(path)
+        previous = manifest.get(rel)
+        if previous and {k: previous.get(k) for k in fingerprint} == fingerprint:
+            if previous['status'] == 'done' or (previous['status'] == 'failed' and not args.retry_failed):
+                already_done += 1
+                continue
+        pending.append((path, rel, fingerprint))
+    run.flush()
+
+    total = len(pending)
+    print(f'{total} arquivo(s) a extrair ({already_done} já processados, {skipped} ignorados), '
+          f'{args.workers} worker(s), formato {args.format}', flush=True)
+
+    start = time.perf_counter()
+    last_report = start
+    done = failed = rows_total = 0
+    fingerprints = {rel: fp for _, rel, fp in pending}
+    queue = iter(pending)
+    workers = max(1, args.workers)
+
+    def record(result: tuple[str, list, str, float]) -> None:
+        nonlocal done, failed, rows_total
+        rel, rows, erro, tempo_ms = result
+        entry = {'arquivo': rel, **fingerprints[rel], 'tempo_ms': round(tempo_ms, 1)}
+        if erro:
+            entry.update(status='failed', erro=erro)
+            failed += 1
+        else:
+            entry.update(status='done', linhas=len(rows))
+            rows_total += len(rows)
+            done += 1
+        run.record(entry, rows)
+
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        # Janela limitada de tarefas em voo: a memória não cresce com o tamanho do acervo.
+        in_flight = {}
+
+        def fill() -> None:
+            while len(in_flight) < workers * 4:
+                item = next(queue, None)
+                if item is None:
+                    break
+                in_flight[pool.submit(_extract, str(item[0]), item[1], args.method)] = item
+
+        fill()
+        while in_flight:
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            crashed = []
+            for future in finished:
+                item = in_flight.pop(future)
+                try:
+                    record(future.result())
+                except BrokenProcessPool:
+                    crashed.append(item)
+                except Exception as e:
+                    record((item[1], [], f"{type(e).__name__}: {e}", 0.0))
+
+            if crashed:
+                # Um worker morreu (OOM, segfault): o pool inteiro fica inutilizável e todas as
+                # tarefas em voo falham juntas. Cada uma roda de novo isolada, para achar o culpado.
+                for future in wait(in_flight).done:
+                    item = in_flight.pop(future)
+                    try:
+                        record(future.result())
+                    except Exception:
+                        crashed.append(item)
+                pool.shutdown(wait=False, cancel_futures=True)
+                print(f'Processo de extração encerrado; refazendo {len(crashed)} arquivo(s) um a um', flush=True)
+                for item in crashed:
+                    record(_extract_isolated(item, args.method))
+                pool = ProcessPoolExecutor(max_workers=workers)
+            fill()
+
+            now = time.perf_counter()
+            if now - last_report >= args.progress_every:
+                last_report = now
+                processed = done + failed
+                rate = processed / (now - start)
+                eta = (total - processed) / rate if rate else 0
+                print(f'[{processed}/{total}] {rate:.1f} arq/s, {rows_total / (now - start):.0f} linhas/s, '
+                      f'{failed} falha(s), ETA {_format_eta(eta)}', flush=True)
+        pool.shutdown()
+        removed = run.purge_stale()
+        if removed:
+            print(f'{removed} linha(s) de extrações anteriores removidas dos shards', flush=True)
+    except KeyboardInterrupt:
+        pool.shutdown(wait=False, cancel_futures=True)
+        print('\nInterrompido: gravando o shard em andamento; rode de novo para continuar.', flush=True)
+    finally:
+        run.close()
+
+    elapsed = time.perf_counter() - start
+    print(f'Concluído: {done} ok, {failed} falha(s), {rows_total} linhas em {elapsed:.1f} s '
+          f'-> {args.pasta_saida}', flush=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,310 @@
+"""Comparação golden das linhas extraídas pelos parsers de track changes/comentários.
+
+Gera (ou lê) um conjunto de DOCX e grava, para cada arquivo e método, as linhas retornadas por
+get_parser_rows. Depois de uma refatoração, o modo `check` confirma que a saída não mudou.
+
+Corpus sintético: `--synthetic N` gera N contratos com inserções, exclusões, movimentações,
+comentários (inclusive vazios e sem texto), caixas de texto aninhadas, tabelas, cabeçalhos,
+rodapés e uma parte XML inválida. O XML é montado à mão, então os bytes são determinísticos.
+O resumo (número de linhas + SHA-256 das linhas) do corpus sintético padrão fica versionado
+em scripts/golden/extraction_synthetic.json.
+
+Uso:
+    python scripts/golden_extraction.py check                       # corpus sintético x resumo versionado
+    python scripts/golden_extraction.py write-digest                # regrava o resumo versionado
+    python scripts/golden_extraction.py write <pasta_docx> <pasta_golden>
+    python scripts/golden_extraction.py check <pasta_docx> <pasta_golden>
+"""
+import argparse
+import hashlib
+import io
+import json
+import random
+import sys
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.analysis.extract_changes_csv import get_parser_rows, iter_parser_rows  # noqa: E402
+
+METHODS = ['padrao', 'alternativo', 'hierarquico', 'hierarquico_filtrado', 'hierarquico_comentarios']
+DIGEST_FILE = Path(__file__).resolve().parent / 'golden' / 'extraction_synthetic.json'
+SYNTHETIC_DOCS = 8
+SYNTHETIC_SEED = 2024
+
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+NSDECLS = (
+    f'xmlns:w="{W_NS}" '
+    'xmlns:v="urn:schemas-microsoft-com:vml" '
+    'xmlns:wp="http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing" '
+    'xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+    'xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006"'
+)
+WORDS = (
+    'contrato prazo "valor" pagamento multa rescisão CONTRATADA CONTRATANTE serviço '
+    'vigência reajuste foro notificação garantia R$ 1.000,00 12 (doze) meses'
+).split(' ')
+AUTHORS = ['Ana Souza', 'Jurídico', 'Bruno', '']
+
+
+def _esc(text: str) -> str:
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('"', '&quot;')
+
+
+class _SyntheticDoc:
+    def __init__(self, rnd: random.Random):
+        self.rnd = rnd
+        self.comment_ids: list[int] = []
+        self.next_change = 1
+        self.open_comments: list[int] = []
+
+    def words(self, lo=1, hi=8) -> str:
+        text = ' '.join(self.rnd.choice(WORDS) for _ in range(self.rnd.randint(lo, hi)))
+        if self.rnd.random() < 0.1:
+            text = '  ' + text + '\n '
+        return text
+
+    def tc_attrs(self) -> str:
+        author = self.rnd.choice(AUTHORS)
+        self.next_change += 1
+        style = self.rnd.random()
+        if style < 0.1:
+            # Atributos sem namespace: exercita o fallback de _get_safe_attrib.
+            return f'w:id="{self.next_change}" author="{_esc(author)}" date="2024-01-0{self.rnd.randint(1, 9)}T10:00:00Z"'
+        date = '' if style < 0.2 else f' w:date="2024-0{self.rnd.randint(1, 9)}-1{self.rnd.randint(0, 9)}T08:30:00Z"'
+        return f'w:id="{self.next_change}" w:author="{_esc(author)}"{date}'
+
+    def run(self, text: str, deleted=False) -> str:
+        tag = 'w:delText' if deleted else 'w:t'
+        extra = ''
+        roll = self.rnd.random()
+        if roll < 0.08:
+            extra = '<w:tab/>'
+        elif roll < 0.12:
+            extra = '<w:br/>'
+        elif roll < 0.14:
+            extra = '<w:cr/>'
+        rpr = '<w:rPr><w:b/></w:rPr>' if self.rnd.random() < 0.3 else ''
+        if self.rnd.random() < 0.05:
+            rpr = f'<w:rPr><w:ins {self.tc_attrs()}/></w:rPr>'
+        space = ' xml:space="preserve"' if text != text.strip() else ''
+        return f'<w:r>{rpr}<{tag}{space}>{_esc(text)}</{tag}>{extra}</w:r>'
+
+    def comment_marks(self) -> str:
+        out = ''
+        if self.open_comments and self.rnd.random() < 0.35:
+            out += f'<w:commentRangeEnd w:id="{self.open_comments.pop(0)}"/>'
+        if self.rnd.random() < 0.15:
+            c_id = len(self.comment_ids) + (0 if self.rnd.random() < 0.9 else 500)
+            self.comment_ids.append(c_id)
+            out += f'<w:commentRangeStart w:id="{c_id}"/>'
+            if self.rnd.random() < 0.2:
+                # Intervalo vazio (comentario sem texto ancorado).
+                out += f'<w:commentRangeEnd w:id="{c_id}"/>'
+            else:
+                self.open_comments.append(c_id)
+        return out
+
+    def inline(self, depth=0) -> str:
+        parts = []
+        for _ in range(self.rnd.randint(1, 6)):
+            parts.append(self.comment_marks())
+            roll = self.rnd.random()
+            if roll < 0.45:
+                parts.append(self.run(self.words()))
+            elif roll < 0.6:
+                inner = self.run(self.words())
+                if self.rnd.random() < 0.2:
+                    inner += f'<w:del {self.tc_attrs()}>{self.run(self.words(), deleted=True)}</w:del>'
+                parts.append(f'<w:ins {self.tc_attrs()}>{inner}</w:ins>')
+            elif roll < 0.72:
+                parts.append(f'<w:del {self.tc_attrs()}>{self.run(self.words(), deleted=True)}</w:del>')
+            elif roll < 0.77:
+                parts.append(f'<w:moveFrom {self.tc_attrs()}>{self.run(self.words(), deleted=True)}</w:moveFrom>')
+            elif roll < 0.82:
+                parts.append(f'<w:moveTo {self.tc_attrs()}>{self.run(self.words())}</w:moveTo>')
+            elif roll < 0.86 and depth == 0:
+                # Caixa de texto: paragrafos aninhados dentro do paragrafo externo.
+                inner_ps = ''.join(self.paragraph(depth + 1) for _ in range(self.rnd.randint(1, 2)))
+                parts.append(
+                    '<w:r><mc:AlternateContent><mc:Choice Requires="wps"><w:drawing>'
+                    '<wp:anchor><wp:positionH><wp:posOffset>914400</wp:posOffset></wp:positionH>'
+                    f'<w:txbxContent>{inner_ps}</w:txbxContent></wp:anchor></w:drawing></mc:Choice>'
+                    f'<mc:Fallback><w:pict><v:shape><v:textbox><w:txbxContent>{inner_ps}</w:txbxContent>'
+                    '</v:textbox></v:shape></w:pict></mc:Fallback></mc:AlternateContent></w:r>'
+                )
+            elif roll < 0.88:
+                parts.append('<w:r><w:fldChar w:fldCharType="begin"/></w:r><w:r><w:instrText> PAGE </w:instrText></w:r>')
+            elif roll < 0.9:
+                parts.append('<w:r><w:t></w:t></w:r>')
+            else:
+                parts.append(self.run(self.words(1, 3)))
+        return ''.join(parts)
+
+    def paragraph(self, depth=0) -> str:
+        ppr = ''
+        if self.rnd.random() < 0.2:
+            ppr = '<w:pPr><w:tabs><w:tab w:val="left" w:pos="720"/></w:tabs></w:pPr>'
+        elif self.rnd.random() < 0.1:
+            ppr = f'<w:pPr><w:rPr><w:del {self.tc_attrs()}/></w:rPr></w:pPr>'
+        if self.rnd.random() < 0.08:
+            return f'<w:p>{ppr}</w:p>'
+        if self.rnd.random() < 0.04:
+            return f'<w:p>{ppr}<w:r><w:t xml:space="preserve">   </w:t></w:r></w:p>'
+        return f'<w:p>{ppr}{self.inline(depth)}</w:p>'
+
+    def table(self) -> str:
+        rows = []
+        for _ in range(self.rnd.randint(1, 3)):
+            cells = ''.join(f'<w:tc>{self.paragraph()}{self.paragraph()}</w:tc>' for _ in range(self.rnd.randint(1, 3)))
+            rows.append(f'<w:tr>{cells}</w:tr>')
+        return f'<w:tbl>{"".join(rows)}</w:tbl>'
+
+    def body(self, blocks: int) -> str:
+        items = []
+        for i in range(blocks):
+            if i % 7 == 0:
+                items.append(f'<w:p><w:r><w:t>CLÁUSULA {i // 7 + 1} - DO OBJETO</w:t></w:r></w:p>')
+            items.append(self.table() if self.rnd.random() < 0.12 else self.paragraph())
+        while self.open_comments:
+            items.append(f'<w:p><w:commentRangeEnd w:id="{self.open_comments.pop()}"/></w:p>')
+        return ''.join(items)
+
+    def comments_xml(self) -> str:
+        comments = []
+        for c_id in self.comment_ids:
+            if c_id >= 500:
+                continue  # referencia sem comentario correspondente
+            texts = ''.join(f'<w:p><w:r><w:t>{_esc(self.words(2, 10))}</w:t></w:r></w:p>' for _ in range(self.rnd.randint(1, 2)))
+            author = self.rnd.choice(AUTHORS)
+            comments.append(f'<w:comment w:id="{c_id}" w:author="{_esc(author)}" w:date="2024-05-0{c_id % 9 + 1}T12:00:00Z">{texts}</w:comment>')
+        return f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><w:comments {NSDECLS}>{"".join(comments)}</w:comments>'
+
+
+def build_synthetic_docx(path: Path, seed: int, blocks: int = 60, pretty: bool = False, broken_header: bool = False) -> None:
+    rnd = random.Random(seed)
+    doc = _SyntheticDoc(rnd)
+    header = f'<w:hdr {NSDECLS}>{doc.paragraph()}{doc.paragraph()}</w:hdr>'
+    body = doc.body(blocks)
+    footer = f'<w:ftr {NSDECLS}>{doc.paragraph()}</w:ftr>'
+    document = (
+        f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?><w:document {NSDECLS}>'
+        f'<w:body>{body}<w:sectPr><w:pgSz w:w="11906"/></w:sectPr></w:body></w:document>'
+    )
+    if pretty:
+        document = document.replace('><w:', '>\n  <w:').replace('></w:', '>\n</w:')
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('[Content_Types].xml', '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types"/>')
+        zf.writestr('word/document.xml', document)
+        zf.writestr('word/comments.xml', doc.comments_xml())
+        zf.writestr('word/header1.xml', header)
+        zf.writestr('word/header2.xml', '<w:hdr><w:p>quebrado' if broken_header else header.replace('<w:hdr', '<w:hdr ', 1))
+        zf.writestr('word/footer1.xml', footer)
+
+
+def build_synthetic_corpus(folder: Path, count: int = SYNTHETIC_DOCS, seed: int = SYNTHETIC_SEED) -> list[Path]:
+    folder.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for i in range(count):
+        path = folder / f'sintetico_{i:02d}.docx'
+        build_synthetic_docx(path, seed + i, blocks=40 + 15 * i, pretty=(i % 3 == 1), broken_header=(i % 4 == 2))
+        paths.append(path)
+    return paths
+
+
+def extract_all(paths: list[Path]) -> tuple[dict, float]:
+    results = {}
+    start = time.perf_counter()
+    for path in paths:
+        results[path.name] = {method: get_parser_rows(str(path), path.name, method) for method in METHODS}
+    return results, time.perf_counter() - start
+
+
+def check_in_memory(paths: list[Path], results: dict) -> list[str]:
+    """Bytes, arquivo aberto e streaming (iter_parser_rows) devem dar as mesmas linhas do caminho."""
+    problems = []
+    for path in paths:
+        content = path.read_bytes()
+        for method in METHODS:
+            expected = results[path.name][method]
+            if get_parser_rows(content, path.name, method) != expected:
+                problems.append(f'{path.name} [{method}]: extração a partir de bytes difere do caminho')
+            if get_parser_rows(io.BytesIO(content), path.name, method) != expected:
+                problems.append(f'{path.name} [{method}]: extração a partir de BytesIO difere do caminho')
+            if list(iter_parser_rows(content, path.name, method)) != expected:
+                problems.append(f'{path.name} [{method}]: iter_parser_rows difere de get_parser_rows')
+    return problems
+
+
+def digest(rows: list[dict]) -> dict:
+    payload = json.dumps(rows, ensure_ascii=False, sort_keys=False).encode('utf-8')
+    return {'linhas': len(rows), 'sha256': hashlib.sha256(payload).hexdigest()}
+
+
+def _compare(expected: dict, actual: dict) -> list[str]:
+    problems = []
+    for name in sorted(set(expected) | set(actual)):
+        for method in METHODS:
+            exp = expected.get(name, {}).get(method)
+            act = actual.get(name, {}).get(method)
+            if exp != act:
+                problems.append(f'{name} [{method}]: esperado {exp and exp.get("linhas")} linhas, obtido {act and act.get("linhas")}')
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Comparação golden da extração de alterações')
+    parser.add_argument('modo', choices=['check', 'write', 'write-digest'])
+    parser.add_argument('pasta_docx', type=Path, nargs='?')
+    parser.add_argument('pasta_golden', type=Path, nargs='?')
+    args = parser.parse_args()
+
+    if args.pasta_docx is None:
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = build_synthetic_corpus(Path(tmp))
+            results, elapsed = extract_all(paths)
+            in_memory_problems = check_in_memory(paths, results)
+        digests = {name: {m: digest(rows) for m, rows in per_method.items()} for name, per_method in results.items()}
+        if args.modo == 'write-digest':
+            DIGEST_FILE.parent.mkdir(parents=True, exist_ok=True)
+            DIGEST_FILE.write_text(json.dumps(digests, ensure_ascii=False, indent=2) + '\n', encoding='utf-8')
+            print('Resumo gravado em', DIGEST_FILE)
+            return
+        expected = json.loads(DIGEST_FILE.read_text(encoding='utf-8'))
+        problems = _compare(expected, digests) + in_memory_problems
+        total = sum(d['linhas'] for per in digests.values() for d in per.values())
+        print(f'{len(paths)} documentos, {total} linhas, {elapsed * 1000:.0f} ms')
+    else:
+        if args.pasta_golden is None:
+            parser.error('informe a pasta golden')
+        paths = sorted(p for p in args.pasta_docx.rglob('*.docx') if not p.name.startswith('~$'))
+        results, elapsed = extract_all(paths)
+        args.pasta_golden.mkdir(parents=True, exist_ok=True)
+        if args.modo == 'write':
+            for name, per_method in results.items():
+                for method, rows in per_method.items():
+                    out = args.pasta_golden / f'{Path(name).stem}.{method}.json'
+                    out.write_text(json.dumps(rows, ensure_ascii=False, indent=1), encoding='utf-8')
+            print(f'Golden gravado para {len(paths)} documentos em', args.pasta_golden)
+            return
+        problems = []
+        for name, per_method in results.items():
+            for method, rows in per_method.items():
+                golden = args.pasta_golden / f'{Path(name).stem}.{method}.json'
+                if not golden.exists():
+                    problems.append(f'{name} [{method}]: golden ausente')
+                elif json.loads(golden.read_text(encoding='utf-8')) != rows:
+                    problems.append(f'{name} [{method}]: linhas diferentes do golden')
+        print(f'{len(paths)} documentos, {elapsed * 1000:.0f} ms')
+
+    if problems:
+        print('\n'.join(problems))
+        sys.exit(1)
+    print('OK: saída idêntica ao golden')
+
+
+if __name__ == '__main__':
+    main()
@@ -4,7 +4,7 @@ import io
 from pathlib import Path
 from docx import Document
 
-from app.analysis.doc_parser import get_paragraph_raw_text, segment_document
+from app.analysis.doc_parser import build_segments, get_paragraph_raw_text
 from app.analysis.docx_comments import add_error_comments_to_docx
 from app.services.storage import LocalFileStorage
 
@@ -39,14 +39,14 @@ async def main():
     target_trecho = 'multa compensatória devida pela CONTRATADA para a CONTRATANTE'
     target_norm = norm(target_trecho).lower()
 
-    segmented = segment_document(doc)
+    segmented = build_segments(doc)
     errors_by_clause = {}
 
     matched = False
-    for title, paragraphs in segmented:
-        for p in paragraphs:
-            if target_norm in get_paragraph_raw_text(p).lower():
-                errors_by_clause.setdefault(title, []).append({
+    for segment in segmented:
+        for text in segment.texts:
+            if target_norm in text.lower():
+                errors_by_clause.setdefault(segment.title, []).append({
                     'id_regra': 'R003',
                     'comentario': 'Alerta: A penalidade (multa) se aplica claramente apenas à CONTRATADA.',
                     'trecho_exato': target_trecho
@@ -58,7 +58,7 @@ async def main():
 
     if not matched and segmented:
         # fallback: coloca no primeiro título
-        first_title = segmented[0][0]
+        first_title = segmented[0].title
         errors_by_clause.setdefault(first_title, []).append({
             'id_regra': 'R003',
             'comentario': 'Alerta: A penalidade (multa) se aplica claramente apenas à CONTRATADA.',
@@ -3,7 +3,7 @@ import json
 from pathlib import Path
 from docx import Document
 from app.analysis.docx_comments import add_error_comments_to_docx
-from app.analysis.doc_parser import get_paragraph_raw_text, segment_document
+from app.analysis.doc_parser import get_paragraph_raw_text
 
 base = Path(__file__).parent.parent
 uploads = base / 'data' / 'uploads'
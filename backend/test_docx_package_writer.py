@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Teste de ida e volta do DOCX comentado gravado com save_docx_reusing_source.
+
+A saida precisa passar no zipfile.ZipFile.testzip() (CRC de todos os membros, inclusive os
+copiados crus) e abrir de novo no python-docx com os comentarios. Se a copia crua falhar,
+add_error_comments_to_docx cai no doc.save e o resultado continua valido.
+"""
+
+import io
+import os
+import sys
+import zipfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from docx import Document
+from docx.shared import Inches
+
+from app.analysis import docx_comments
+from app.analysis.docx_comments import add_error_comments_to_docx
+from app.analysis.docx_package_writer import save_docx_reusing_source
+
+# PNG 1x1 valido: garante uma parte binaria copiada crua (word/media/...)
+PNG_1X1 = bytes.fromhex(
+    '89504e470d0a1a0a0000000d49484452000000010000000108060000001f15c489'
+    '0000000d4944415478da63f8cfc0f01f0005000201a3b1f5e40000000049454e44ae426082'
+)
+
+ERRORS_BY_CLAUSE = {
+    "CLÁUSULA SEGUNDA - DO VALOR": [
+        {
+            "id_regra": "VALOR",
+            "comentario": "Valor das parcelas não fecha com o total.",
+            "trecho_exato": "parcelas mensais de R$ 10.000,00",
+            "tipo_erro": "Inconsistência",
+        }
+    ],
+}
+
+
+def create_source_docx() -> bytes:
+    doc = Document()
+    doc.add_heading('CONTRATO DE PRESTAÇÃO DE SERVIÇOS', 0)
+    doc.add_paragraph('CLÁUSULA PRIMEIRA - DO OBJETO')
+    doc.add_paragraph('O presente contrato tem por objeto a prestação de serviços de consultoria.')
+    doc.add_picture(io.BytesIO(PNG_1X1), width=Inches(0.5))
+    doc.add_paragraph('CLÁUSULA SEGUNDA - DO VALOR')
+    doc.add_paragraph('O valor total do contrato é de R$ 100.000,00, a ser pago em parcelas mensais de R$ 10.000,00.')
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def check_round_trip(output: bytes, source: bytes, expect_comment: bool) -> None:
+    with zipfile.ZipFile(io.BytesIO(output)) as out_zip:
+        assert out_zip.testzip() is None, "membro com CRC inválido na saída"
+        names = set(out_zip.namelist())
+        with zipfile.ZipFile(io.BytesIO(source)) as src_zip:
+            media = [name for name in src_zip.namelist() if name.startswith('word/media/')]
+            assert media, "documento de origem sem imagem"
+            for name in media:
+                assert out_zip.read(name) == src_zip.read(name), f"{name} alterado na cópia"
+        if expect_comment:
+            assert 'word/comments.xml' in names, "comments.xml ausente"
+            assert 'Valor das parcelas' in out_zip.read('word/comments.xml').decode('utf-8'), "comentário não gravado"
+
+    reopened = Document(io.BytesIO(output))
+    texts = [p.text for p in reopened.paragraphs]
+    assert 'CLÁUSULA SEGUNDA - DO VALOR' in texts, "parágrafos perdidos na ida e volta"
+
+
+def test_save_reusing_source_round_trip():
+    source = create_source_docx()
+    doc = Document(io.BytesIO(source))
+    check_round_trip(save_docx_reusing_source(doc, source), source, expect_comment=False)
+
+
+def test_add_error_comments_round_trip():
+    source = create_source_docx()
+    output = add_error_comments_to_docx(source, ERRORS_BY_CLAUSE)
+    check_round_trip(output, source, expect_comment=True)
+
+
+def test_fallback_to_doc_save_when_raw_copy_fails():
+    def broken_save(*args, **kwargs):
+        raise AttributeError("'ZipFile' object has no attribute '_didModify'")
+
+    source = create_source_docx()
+    original = docx_comments.save_docx_reusing_source
+    docx_comments.save_docx_reusing_source = broken_save
+    try:
+        output = add_error_comments_to_docx(source, ERRORS_BY_CLAUSE)
+    finally:
+        docx_comments.save_docx_reusing_source = original
+    check_round_trip(output, source, expect_comment=True)
+
+
+if __name__ == "__main__":
+    test_save_reusing_source_round_trip()
+    test_add_error_comments_round_trip()
+    test_fallback_to_doc_save_when_raw_copy_fails()
+    print("OK: saída íntegra no testzip() e reaberta pelo python-docx")
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Testes offline da busca lexical (BM25) e híbrida do RAG, sem provedor de embeddings.
+
+Usa um corpus fixo de cláusulas curtas: confere o ranqueamento BM25 (acentos, idf), o peso
+alpha da fusão com o cosseno, o retorno ao só lexical quando os scores densos faltam ou falham,
+e consultas vazias ou só com stopwords.
+"""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.lexical_index import BM25Index, hybrid_scores, normalize_lexical, search, tokenize
+
+CORPUS = [
+    "A CONTRATADA pagará multa de 10% em caso de rescisão antecipada.",       # 0
+    "O pagamento será feito em até 30 dias após o aceite da fatura.",          # 1
+    "A rescisão do contrato exige notificação prévia de 60 dias.",            # 2
+    "Os dados pessoais serão tratados conforme a LGPD.",                      # 3
+    "O prazo de vigência é de 12 meses, prorrogável por igual período.",      # 4
+    "Multa moratória de 2% sobre o valor da fatura em atraso no pagamento.",  # 5
+]
+
+
+def ids(ranked):
+    return [i for i, _ in ranked]
+
+
+def test_tokenize_removes_accents_and_stopwords():
+    assert tokenize("A Rescisão do CONTRATO, sem ônus.") == ["rescisao", "contrato", "onus"]
+    assert tokenize("") == []
+    assert tokenize(None) == []
+
+
+def test_bm25_ranks_documents_with_all_query_terms_first():
+    index = BM25Index(CORPUS)
+    ranked = index.top_k("multa rescisão", 6)
+    assert ids(ranked)[0] == 0, ranked
+    assert set(ids(ranked)) == {0, 2, 5}, "só documentos com algum termo da query"
+    scores = [score for _, score in ranked]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_bm25_matches_without_accents_and_weights_rare_terms():
+    index = BM25Index(CORPUS)
+    assert ids(index.top_k("rescisao", 6)) == ids(index.top_k("RESCISÃO", 6))
+    # "lgpd" aparece em um documento só; "pagamento" em dois: o termo raro pesa mais.
+    scores = index.scores("lgpd pagamento")
+    assert scores[3] > scores[1] and scores[3] > scores[5]
+
+
+def test_hybrid_scores_weighting():
+    lexical = np.array([4.0, 2.0, 0.0], dtype=np.float32)
+    dense = np.array([0.1, 0.3, 0.5], dtype=np.float32)
+    np.testing.assert_allclose(hybrid_scores(dense, lexical, alpha=0.0), [1.0, 0.5, 0.0])
+    np.testing.assert_allclose(hybrid_scores(dense, lexical, alpha=1.0), [0.0, 0.5, 1.0], atol=1e-6)
+    np.testing.assert_allclose(hybrid_scores(dense, lexical, alpha=0.5), [0.5, 0.5, 0.5], atol=1e-6)
+    np.testing.assert_allclose(hybrid_scores(dense, lexical, alpha=0.25), [0.75, 0.5, 0.25], atol=1e-6)
+
+
+def test_hybrid_scores_without_dense_is_relative_bm25():
+    lexical = np.array([4.0, 2.0, 0.0], dtype=np.float32)
+    np.testing.assert_allclose(hybrid_scores(None, lexical), normalize_lexical(lexical))
+    try:
+        hybrid_scores(np.zeros(2), lexical)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("scores densos de outro corpus deveriam ser rejeitados")
+
+
+def test_search_falls_back_to_lexical_when_dense_fails():
+    index = BM25Index(CORPUS)
+    lexical_only = search(index, "multa rescisão", 3)
+
+    def offline():
+        raise ConnectionError("provedor de embeddings indisponível")
+
+    assert search(index, "multa rescisão", 3, dense_fn=offline) == lexical_only
+    assert search(index, "multa rescisão", 3, dense_fn=lambda: np.zeros(2)) == lexical_only
+    assert lexical_only[0] == (0, 1.0)
+
+
+def test_search_hybrid_uses_dense_scores():
+    index = BM25Index(CORPUS)
+    dense = np.array([0.0, 0.0, 0.0, 1.0, 0.0, 0.0], dtype=np.float32)
+    # alpha=1: só o cosseno decide, mesmo sem nenhum termo em comum
+    assert ids(search(index, "multa", 1, dense_fn=lambda: dense, alpha=1.0)) == [3]
+    # alpha=0.5: o documento 0 (multa + rescisão) empata com o denso do 3 e mantém a ordem original
+    ranked = search(index, "multa rescisão", 2, dense_fn=lambda: dense, alpha=0.5)
+    assert ids(ranked) == [0, 3], ranked
+
+
+def test_empty_and_stopword_only_queries():
+    index = BM25Index(CORPUS)
+    for query in ["", "   ", "de o a que para com", "!!! ..."]:
+        assert not index.scores(query).any(), query
+        assert index.top_k(query, 3) == [], query
+        assert search(index, query, 3) == [], query
+    # Sem termos úteis, o híbrido fica só com o cosseno
+    dense = np.linspace(0, 1, len(CORPUS), dtype=np.float32)
+    assert ids(search(index, "de o a", 2, dense_fn=lambda: dense)) == [5, 4]
+
+
+def test_empty_corpus():
+    index = BM25Index([])
+    assert len(index) == 0
+    assert index.top_k("multa", 3) == []
+    assert search(index, "multa", 3) == []
+
+
+if __name__ == "__main__":
+    test_tokenize_removes_accents_and_stopwords()
+    test_bm25_ranks_documents_with_all_query_terms_first()
+    test_bm25_matches_without_accents_and_weights_rare_terms()
+    test_hybrid_scores_weighting()
+    test_hybrid_scores_without_dense_is_relative_bm25()
+    test_search_falls_back_to_lexical_when_dense_fails()
+    test_search_hybrid_uses_dense_scores()
+    test_empty_and_stopword_only_queries()
+    test_empty_corpus()
+    print("OK: BM25, fusão híbrida e fallback lexical")
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Teste gerativo da normalizacao com mapa de offsets usada na insercao de comentarios.
+
+Propriedade: para qualquer texto, _normalize_with_map produz exatamente o mesmo texto que
+normalize_visible_text e um mapa de offsets crescente que aponta para o caractere de origem.
+Os textos sao sorteados de um alfabeto concentrado nos casos de borda (espacos unicode,
+larguras zero, pontos e virgulas repetidos).
+"""
+
+import os
+import random
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.analysis.doc_parser import NON_BREAKING_SPACES, ZERO_WIDTH_CHARACTERS, normalize_visible_text
+from app.analysis.docx_comments import _normalize_with_map
+
+ALPHABET = (
+    ['a', 'b', 'Ç', 'ã', '1', '.', '.', ',', ',', ';', '-']
+    + [' ', ' ', '\t', '\n', '\r', '\x0b', '\x0c', '\x1c', '\x85', ' ', ' ', '　']
+    + sorted(NON_BREAKING_SPACES)
+    + sorted(ZERO_WIDTH_CHARACTERS)
+)
+
+CASES = 20000
+SEED = 20240611
+
+
+def random_text(rnd: random.Random) -> str:
+    length = rnd.choice([0, 1, 2, 3, 5, 8, 13, 40, 120])
+    return ''.join(rnd.choice(ALPHABET) for _ in range(length))
+
+
+def check_text(raw: str) -> None:
+    text, mapping = _normalize_with_map(raw)
+    expected = normalize_visible_text(raw)
+    assert text == expected, f"{raw!r}: {text!r} != {expected!r}"
+    assert len(mapping) == len(text), f"{raw!r}: mapa com {len(mapping)} offsets para {len(text)} caracteres"
+    previous = -1
+    for out_char, offset in zip(text, mapping):
+        assert previous < offset < len(raw), f"{raw!r}: offsets fora de ordem {list(mapping)}"
+        source = raw[offset]
+        if out_char == ' ':
+            # Espaco colapsado aponta para o primeiro espaco; em ",," aponta para a segunda virgula.
+            assert source.isspace() or source in NON_BREAKING_SPACES or source == ',', f"{raw!r}: espaco de {source!r}"
+        else:
+            assert source == out_char, f"{raw!r}: {out_char!r} mapeado para {source!r}"
+        previous = offset
+
+
+def test_normalize_with_map_matches_normalize_visible_text():
+    rnd = random.Random(SEED)
+    for _ in range(CASES):
+        check_text(random_text(rnd))
+
+
+def test_normalize_with_map_edge_cases():
+    for raw in [
+        '', ' ', '​', ' ​ ', 'a​ b', 'a ​', ' a ', 'a..b', 'a...b', '..',
+        'a,,b', 'a, ,b', 'a,  \n,b', ',,,', ',,,,', ', , ,', 'a.​.b', 'fim.. ', '﻿CLÁUSULA  1',
+    ]:
+        check_text(raw)
+
+
+if __name__ == "__main__":
+    test_normalize_with_map_edge_cases()
+    test_normalize_with_map_matches_normalize_visible_text()
+    print(f"OK: {CASES} textos sorteados + casos de borda")
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Teste dos offsets do Segment e do seu uso na ancoragem de comentarios.
+
+paragraph_at mapeia um offset do texto unido de volta ao paragrafo (inclusive nas fronteiras e
+no "\\n" separador); find_paragraph_index acha o paragrafo da ocorrencia exata. Na insercao de
+comentarios, a ocorrencia exata dentro da clausula vence uma correspondencia aproximada em um
+paragrafo anterior da mesma clausula.
+"""
+
+import io
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from docx import Document
+
+from app.analysis.doc_parser import Segment
+from app.analysis.docx_comments import add_error_comments_to_docx
+
+W_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+
+def test_paragraph_at_boundaries():
+    segment = Segment('CLÁUSULA PRIMEIRA', [4, 5, 7], ['abc', '', 'de'])
+    assert segment.text == 'abc\n\nde'
+    assert list(segment.offsets) == [0, 4, 5]
+    expected = {0: 0, 2: 0, 3: 0, 4: 1, 5: 2, 6: 2}
+    for offset, position in expected.items():
+        assert segment.paragraph_at(offset) == position, (offset, segment.paragraph_at(offset))
+
+
+def test_find_paragraph_index():
+    segment = Segment('CLÁUSULA PRIMEIRA', [10, 11, 12], ['O prazo é de 12 meses.', 'Multa de 2%.', 'Multa de 10%.'])
+    assert segment.find_paragraph_index('Multa de 10%') == 12
+    assert segment.find_paragraph_index('prazo') == 10
+    assert segment.find_paragraph_index('meses.\nMulta') is None
+    assert segment.find_paragraph_index('inexistente') is None
+    assert segment.find_paragraph_index('') is None
+
+
+def test_comment_prefers_exact_paragraph_in_clause():
+    doc = Document()
+    doc.add_paragraph('CLÁUSULA PRIMEIRA - DO VALOR')
+    doc.add_paragraph('O pagamento será feito em parcelas mensais de R$ 20.000,00 até o fim do contrato.')
+    doc.add_paragraph('Fica ajustado o pagamento em parcelas mensais de R$ 10.000,00 a partir do aceite.')
+    buffer = io.BytesIO()
+    doc.save(buffer)
+
+    errors = {
+        'CLÁUSULA PRIMEIRA - DO VALOR': [{
+            'id_regra': 'VALOR',
+            'comentario': 'Valor da parcela diverge do total.',
+            'trecho_exato': 'pagamento em parcelas mensais de R$ 10.000,00',
+            'tipo_erro': 'Inconsistência',
+        }],
+    }
+    # Cláusula inteira em um segmento (sem subdivisão por parágrafo)
+    output_bytes = add_error_comments_to_docx(buffer.getvalue(), errors, segmentation_strategy='padrao_sem_subdivisao')
+    output = Document(io.BytesIO(output_bytes))
+    commented = [
+        p.text for p in output.paragraphs
+        if p._p.find(f'.//{W_NS}commentRangeStart') is not None
+    ]
+    assert commented == ['Fica ajustado o pagamento em parcelas mensais de R$ 10.000,00 a partir do aceite.'], commented
+
+
+if __name__ == "__main__":
+    test_paragraph_at_boundaries()
+    test_find_paragraph_index()
+    test_comment_prefers_exact_paragraph_in_clause()
+    print("OK: offsets do Segment e ancoragem na ocorrência exata")